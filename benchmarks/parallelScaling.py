@@ -0,0 +1,47 @@
+#!/usr/bin/python
+
+"""Measure how playouts per second scale with the number of search workers."""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from imago.data.enums import Player
+from imago.engine.monteCarlo import MCTS
+from imago.engine.parallelSearch import ParallelSearch
+from imago.gameLogic.gameState import GameState
+
+def measure(size, workers, playouts, seed):
+    """Returns the playouts per second of a search from the empty board."""
+    gameState = GameState(size)
+    if workers == 1:
+        search = MCTS(7.5, playouts, None, seed)
+    else:
+        search = ParallelSearch(7.5, playouts, None, workers, seed)
+        # Start the processes before measuring
+        search.search(gameState, Player.BLACK)
+    search.search(gameState, Player.BLACK)
+    if workers > 1:
+        search.shutdown()
+    return search.getPlayoutRate()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=9)
+    parser.add_argument("--playouts", type=int, default=2000,
+            help="playouts per worker")
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count())
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    baseRate = None
+    workers = 1
+    while workers <= args.max_workers:
+        rate = measure(args.size, workers, args.playouts * workers, args.seed)
+        if baseRate is None:
+            baseRate = rate
+        print("%3d workers: %9.1f playouts/s, speedup %5.2f, efficiency %3.0f%%" % (
+            workers, rate, rate / baseRate, 100 * rate / baseRate / workers))
+        workers *= 2
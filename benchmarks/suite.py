@@ -0,0 +1,359 @@
+#!/usr/bin/python
+
+"""Measure the speed of the board, game state, SGF parser and search, and compare the
+results with a stored baseline.
+
+Every benchmark uses fixed seeds, so each call does the same work. Each one is called
+in runs long enough to be timed and the median of several runs is kept. Times are the
+processor time of this process, so other processes sharing the machine do not count
+in them. After each run a fixed reference workload is timed too, and every result is
+also kept relative to it, which cancels the changes of speed of the machine itself.
+Results are written as JSON and, given a baseline written by an earlier run, any
+result worse than the baseline by more than the tolerance, compared relative to the
+reference, is reported as a regression and the exit status is 1.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from imago.data.enums import Player
+from imago.engine.core import GameEngine
+from imago.gameLogic.gameBoard import GameBoard, PLAYER_CODES
+from imago.gameLogic.gameData import GameData
+from imago.gameLogic.gameMove import GameMove
+from imago.gameLogic.gameState import GameState
+from imago.gameLogic.gameTree import GameTree
+from imago.gameLogic.playoutBoard import PlayoutBoard, PLAYOUT_MOVES_PER_CELL
+from imago.sgfParser.sgf import readGames, gameTreeToSgf
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+DEF_CORPUS = os.path.join(BENCHMARK_DIR, "corpus.sgf")
+DEF_BASELINE = os.path.join(BENCHMARK_DIR, "baseline.json")
+
+SIZES = (9, 13, 19)
+SEED = 1
+
+# Results worse than the baseline by more than this fraction are regressions
+DEF_TOLERANCE = 0.15
+DEF_REPEAT = 7
+# Benchmarks are called as many times as needed to run for at least this long
+MIN_RUN_SECONDS = 0.5
+# Cells filled and scanned by the reference workload timed after each run
+REFERENCE_CELLS = 1000000
+
+# Work done by each call of a benchmark
+GAMES_PER_CALL = 20
+COPIES_PER_CALL = 100
+CAPTURES_PER_CALL = 100
+PLAYOUTS_PER_CALL = 10
+GENMOVE_PLAYOUTS = 300
+GENMOVE_SIZE = 9
+GENMOVE_OPENING_MOVES = 6
+
+# Games of the corpus written by writeCorpus
+CORPUS_GAMES = 40
+CORPUS_SIZE = 19
+
+def getRandomGame(size, seed):
+    """Returns the moves, as (player, row, col) tuples, of a random game between two
+    players which do not fill their own eyes. The game ends when a player has no move
+    left or a move would repeat a position.
+    """
+    rand = random.Random(seed).random
+    board = PlayoutBoard(size)
+    gameState = GameState(size)
+    stride = size + 2
+    moves = []
+    player = Player.BLACK
+    for _ in range(PLAYOUT_MOVES_PER_CELL * size * size):
+        point = board.playRandomMove(PLAYER_CODES[player], rand)
+        if point is None:
+            break
+        row, col = divmod(point, stride)
+        row -= 1
+        col -= 1
+        if not gameState.isLegalMove(row, col, player):
+            break
+        gameState.playMoveForPlayer(row, col, player)
+        moves.append((player, row, col))
+        player = Player.otherPlayer(player)
+    return moves
+
+def getRandomGames(size, count):
+    """Returns the moves of count random games, always the same ones for a size."""
+    return [getRandomGame(size, SEED * 1000 + size * 100 + index)
+            for index in range(count)]
+
+def measure(function, repeat):
+    """Returns the seconds spent by a call of the function and the same time relative
+    to the reference workload. The function is called in runs of at least
+    MIN_RUN_SECONDS, repeat times, and the median run is kept. The reference workload
+    is timed after each run and the relative time is the median of the ratios of both.
+    """
+    calls = 1
+    while timeCalls(function, calls) < MIN_RUN_SECONDS:
+        calls *= 2
+    runs = []
+    ratios = []
+    for _ in range(repeat):
+        seconds = timeCalls(function, calls)
+        runs.append(seconds)
+        ratios.append(seconds / timeCalls(runReference, 1))
+    return statistics.median(runs) / calls, statistics.median(ratios) / calls
+
+def runReference():
+    """A fixed amount of interpreted work, not using any code of the engine, against
+    which the speed of the machine is measured.
+    """
+    cells = bytearray(REFERENCE_CELLS)
+    for index in range(REFERENCE_CELLS):
+        cells[index] = index * 7 % 3
+    count = 0
+    for cell in cells:
+        if cell == 1:
+            count += 1
+    return count
+
+def timeCalls(function, calls):
+    """Returns the processor seconds spent calling the function a number of times."""
+    startTime = time.process_time()
+    for _ in range(calls):
+        function()
+    return time.process_time() - startTime
+
+def getRate(count, measurement, unit):
+    """Returns a result measured as count per second, where higher is better, from
+    the seconds and relative time returned by measure.
+    """
+    seconds, relativeSeconds = measurement
+    return {"value": count / seconds, "relativeValue": count / relativeSeconds,
+            "unit": unit, "higherIsBetter": True}
+
+def getLatency(measurement, unit="s"):
+    """Returns a result measured in seconds, where lower is better, from the seconds
+    and relative time returned by measure.
+    """
+    seconds, relativeSeconds = measurement
+    return {"value": seconds, "relativeValue": relativeSeconds, "unit": unit,
+            "higherIsBetter": False}
+
+def benchBoardPlay(size, repeat):
+    """Stones placed per second on a GameBoard, captures included."""
+    games = getRandomGames(size, GAMES_PER_CALL)
+    codes = [[(PLAYER_CODES[player], (row + 1) * (size + 2) + col + 1)
+        for player, row, col in moves] for moves in games]
+    def run():
+        for moves in codes:
+            board = GameBoard(size)
+            for color, point in moves:
+                board.placeStoneAtPoint(point, color)
+    measurement = measure(run, repeat)
+    return getRate(sum(len(moves) for moves in games), measurement, "moves/s")
+
+def benchBoardCapture(size, repeat):
+    """Captures per second of a group of a whole side of the board, putting the stones
+    back after each one.
+    """
+    board = GameBoard(size)
+    for col in range(size - 1):
+        board.placeStone(0, col, Player.WHITE)
+        board.placeStone(1, col, Player.BLACK)
+    board.placeStone(1, size - 1, Player.BLACK)
+    def run():
+        for _ in range(CAPTURES_PER_CALL):
+            captured = board.placeStone(0, size - 1, Player.BLACK)
+            board.revertStone(0, size - 1, captured)
+    measurement = measure(run, repeat)
+    return getRate(CAPTURES_PER_CALL, measurement, "captures/s")
+
+def benchBoardCopy(size, repeat):
+    """Copies per second of a GameBoard in the middle of a game."""
+    moves = getRandomGames(size, 1)[0]
+    board = GameBoard(size)
+    for player, row, col in moves[:len(moves) // 2]:
+        board.placeStone(row, col, player)
+    def run():
+        for _ in range(COPIES_PER_CALL):
+            board.getDeepCopy()
+    measurement = measure(run, repeat)
+    return getRate(COPIES_PER_CALL, measurement, "copies/s")
+
+def benchGameStateReplay(size, repeat):
+    """Moves per second replaying whole games through a GameState, which checks each
+    move and keeps the history and the positions played.
+    """
+    games = getRandomGames(size, GAMES_PER_CALL)
+    def run():
+        for moves in games:
+            gameState = GameState(size)
+            for player, row, col in moves:
+                gameState.playMoveForPlayer(row, col, player)
+    measurement = measure(run, repeat)
+    return getRate(sum(len(moves) for moves in games), measurement, "moves/s")
+
+def benchSgfParse(corpus, repeat):
+    """Moves per second parsed from the SGF games of the corpus."""
+    moveCount = 0
+    for gameTree in readGames(corpus):
+        moveCount += len(gameTree.getMainLine())
+    def run():
+        for _ in readGames(corpus):
+            pass
+    measurement = measure(run, repeat)
+    return getRate(moveCount, measurement, "moves/s")
+
+def benchPlayouts(size, repeat):
+    """Random games per second played on a PlayoutBoard from the empty board."""
+    emptyBoard = PlayoutBoard(size)
+    maxMoves = PLAYOUT_MOVES_PER_CELL * size * size
+    def run():
+        rand = random.Random(SEED).random
+        for _ in range(PLAYOUTS_PER_CALL):
+            emptyBoard.copy().playRandomGame(PLAYER_CODES[Player.BLACK], rand, maxMoves)
+    measurement = measure(run, repeat)
+    return getRate(PLAYOUTS_PER_CALL, measurement, "playouts/s")
+
+def benchGenmove(repeat):
+    """Seconds of a genmove with a fixed number of playouts, early in a game. The move
+    is undone after each one and the engine has no transposition table, so every
+    genmove searches from scratch.
+    """
+    moves = getRandomGames(GENMOVE_SIZE, 1)[0][:GENMOVE_OPENING_MOVES]
+    player = Player.otherPlayer(moves[-1][0])
+    engine = GameEngine(GENMOVE_PLAYOUTS, None, SEED, tableSize=0)
+    engine.setBoardsize(GENMOVE_SIZE)
+    for movePlayer, row, col in moves:
+        engine.play(movePlayer, [row, col])
+    def run():
+        engine.search.rand.seed(SEED)
+        engine.genmove(player)
+        engine.undo()
+    return getLatency(measure(run, repeat))
+
+def getBenchmarks(corpus):
+    """Returns (name, function) pairs of every benchmark, the function taking the
+    number of times to repeat it.
+    """
+    benchmarks = []
+    for size in SIZES:
+        benchmarks.extend([
+            ("board_play_%d" % size, lambda repeat, size=size:
+                benchBoardPlay(size, repeat)),
+            ("board_capture_%d" % size, lambda repeat, size=size:
+                benchBoardCapture(size, repeat)),
+            ("board_copy_%d" % size, lambda repeat, size=size:
+                benchBoardCopy(size, repeat)),
+            ("gamestate_replay_%d" % size, lambda repeat, size=size:
+                benchGameStateReplay(size, repeat)),
+            ("playouts_%d" % size, lambda repeat, size=size:
+                benchPlayouts(size, repeat))
+        ])
+    benchmarks.append(("sgf_parse", lambda repeat: benchSgfParse(corpus, repeat)))
+    benchmarks.append(("genmove_%d" % GENMOVE_SIZE, benchGenmove))
+    return benchmarks
+
+def runBenchmarks(corpus=DEF_CORPUS, repeat=DEF_REPEAT, pattern=None):
+    """Runs the benchmarks whose name contains the pattern, every one by default, and
+    returns their results along with the machine they were run on.
+    """
+    results = {}
+    for name, function in getBenchmarks(corpus):
+        if pattern is not None and pattern not in name:
+            continue
+        results[name] = function(repeat)
+        print("%-20s %12.5g %s" % (name, results[name]["value"],
+            results[name]["unit"]), file=sys.stderr)
+    return {
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "python": platform.python_version(),
+        "repeat": repeat,
+        "results": results
+    }
+
+def compareResults(results, baseline, tolerance=DEF_TOLERANCE):
+    """Returns (name, value, baseline value, change) for each result also in the
+    baseline and the list of names of those which are regressions. The change is the
+    fraction the result is better than the baseline, negative if it is worse, and is
+    computed from the values relative to the reference workload when both have them.
+    """
+    comparison = []
+    regressions = []
+    for name, result in results["results"].items():
+        base = baseline["results"].get(name)
+        if base is None:
+            continue
+        key = "value"
+        if "relativeValue" in result and "relativeValue" in base:
+            key = "relativeValue"
+        change = result[key] / base[key] - 1
+        if not result["higherIsBetter"]:
+            change = base[key] / result[key] - 1
+        comparison.append((name, result["value"], base["value"], change))
+        if change < -tolerance:
+            regressions.append(name)
+    return comparison, regressions
+
+def writeCorpus(path, games=CORPUS_GAMES, size=CORPUS_SIZE):
+    """Writes an SGF collection of random games to be used as the corpus."""
+    with open(path, "w") as corpusFile:
+        for moves in getRandomGames(size, games):
+            gameTree = GameTree(gameData=GameData(size=size, komi=7.5))
+            lastMove = None
+            for player, row, col in moves:
+                if lastMove is None:
+                    lastMove = GameMove(player, row, col)
+                    gameTree.firstMoves.append(lastMove)
+                else:
+                    lastMove = lastMove.addMove(player, row, col)
+            corpusFile.write(gameTreeToSgf(gameTree))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--output", default=None,
+            help="JSON file for the results, standard output by default")
+    parser.add_argument("--baseline", nargs="?", const=DEF_BASELINE, default=None,
+            help="JSON results to compare with, benchmarks/baseline.json if no file is"
+            " given")
+    parser.add_argument("--tolerance", type=float, default=DEF_TOLERANCE,
+            help="fraction a result can be worse than the baseline")
+    parser.add_argument("--repeat", type=int, default=DEF_REPEAT,
+            help="runs of each benchmark, the median one being kept")
+    parser.add_argument("--filter", default=None,
+            help="run only the benchmarks whose name contains this text")
+    parser.add_argument("--corpus", default=DEF_CORPUS,
+            help="SGF collection for the parsing benchmark")
+    parser.add_argument("--write-corpus", action="store_true",
+            help="write the corpus of random games and exit")
+    args = parser.parse_args()
+
+    if args.write_corpus:
+        writeCorpus(args.corpus)
+        sys.exit(0)
+
+    results = runBenchmarks(args.corpus, args.repeat, args.filter)
+    if args.output is None:
+        print(json.dumps(results, indent=4, sort_keys=True))
+    else:
+        with open(args.output, "w") as outputFile:
+            json.dump(results, outputFile, indent=4, sort_keys=True)
+
+    if args.baseline is not None:
+        with open(args.baseline) as baselineFile:
+            baseline = json.load(baselineFile)
+        comparison, regressions = compareResults(results, baseline, args.tolerance)
+        for name, value, baseValue, change in comparison:
+            print("%-20s %12.5g %12.5g %+7.1f%%%s" % (name, value, baseValue,
+                100 * change, "  REGRESSION" if name in regressions else ""),
+                file=sys.stderr)
+        if regressions:
+            print("%d regressions" % len(regressions), file=sys.stderr)
+            sys.exit(1)
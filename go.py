@@ -25,6 +25,10 @@ if __name__ == "__main__":
 
         player = str(GAMESTATE.getPlayerCode())
 
+        if move is None:
+            GAMESTATE.playPass()
+            continue
+
         moveRow = move[0]
         moveCol = move[1]
 
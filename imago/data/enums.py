@@ -16,3 +16,13 @@ class Player(Enum):
         if player == cls.WHITE:
             return cls.BLACK
         return cls.EMPTY
+
+class KoRule(Enum):
+    """Rules forbidding the repetition of positions."""
+    POSITIONAL_SUPERKO = enumAuto()
+    SITUATIONAL_SUPERKO = enumAuto()
+
+class ScoringRule(Enum):
+    """Ways of counting the points of each player."""
+    AREA = enumAuto()
+    TERRITORY = enumAuto()
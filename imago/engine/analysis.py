@@ -0,0 +1,270 @@
+"""Analysis of many positions at once, on all the cores.
+
+Positions are read from JSON lines, each one like
+{"id": "a", "size": 9, "komi": 6.5, "moves": [["B", "E5"], ["W", "C3"]], "player": "B"}
+where only moves is required and setup stones, such as handicap stones, can be given
+as "setup": [["B", "C3"], ["B", "G7"]], or from the games of SGF files. The result of each one
+is written as a JSON line with its best move, win rate, playouts and principal
+variation, in the order the positions were read.
+
+Each worker process keeps its engine between positions and goes from one position to
+the next by undoing moves back to the moves both share and playing the rest, so
+positions which are continuations of each other are built in a few moves.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from imago.data.enums import Player
+from imago.engine import parseHelpers
+from imago.engine.core import GameEngine, DEF_KOMI, DEF_SIZE
+from imago.engine.monteCarlo import DEF_PLAYOUTS
+from imago.sgfParser.sgf import readGames
+
+POSITIONS_PER_BATCH = 32
+BATCHES_PER_WORKER = 2
+
+PLAYER_NAMES = {
+    Player.BLACK: "B",
+    Player.WHITE: "W"
+}
+
+# Engine and moves on its board of the worker process
+workerEngine = None
+workerMoves = []
+
+class Position:
+    """A position to analyze: moves as (player, row, col) tuples, row and col being
+    None for a pass, from a board of the given size with the setup stones, given as
+    lists of (row, col) vertices of black and white stones, and the player to move.
+    """
+
+    def __init__(self, positionId, size, komi, moves, player=None, setupStones=None):
+        self.positionId = positionId
+        self.size = size
+        self.komi = komi
+        if setupStones is None:
+            setupStones = ([], [])
+        self.setupStones = ([tuple(vertex) for vertex in setupStones[0]],
+                [tuple(vertex) for vertex in setupStones[1]])
+        self.moves = tuple(moves)
+        if player is None:
+            player = Player.BLACK
+            if self.moves:
+                player = Player.otherPlayer(self.moves[-1][0])
+        self.player = player
+
+def parsePosition(line, lineNumber):
+    """Returns the Position of a JSON line, raising an Exception if it is wrong."""
+    query = json.loads(line)
+    size = query.get("size", DEF_SIZE)
+    moves = []
+    for color, vertex in query["moves"]:
+        player = parseHelpers.parseColor(color)
+        move = parseHelpers.parseVertex(vertex, size)
+        if parseHelpers.ParseCodes.ERROR in (player, move):
+            raise Exception("Wrong move %s %s" % (color, vertex))
+        moves.append((player, None, None) if move is None else (player, *move))
+    setupStones = ([], [])
+    for color, vertex in query.get("setup", []):
+        player = parseHelpers.parseColor(color)
+        stone = parseHelpers.parseVertex(vertex, size)
+        if parseHelpers.ParseCodes.ERROR in (player, stone) or stone is None:
+            raise Exception("Wrong setup stone %s %s" % (color, vertex))
+        setupStones[0 if player == Player.BLACK else 1].append(tuple(stone))
+    player = None
+    if "player" in query:
+        player = parseHelpers.parseColor(query["player"])
+        if player == parseHelpers.ParseCodes.ERROR:
+            raise Exception("Wrong player %s" % query["player"])
+    return Position(query.get("id", lineNumber), size, query.get("komi", DEF_KOMI),
+            moves, player, setupStones)
+
+def readJsonPositions(lines):
+    """Yields the Positions of JSON lines, or (id, error) pairs for wrong lines."""
+    for lineNumber, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            yield parsePosition(line, lineNumber)
+        except Exception as error:
+            yield (lineNumber, str(error))
+
+def readSgfPositions(path, everyMove=False):
+    """Yields the Position at the end of each game of an SGF file or, if everyMove is
+    True, the Position before each move and at the end. Setup stones of the games are
+    kept.
+    """
+    for gameIndex, gameTree in enumerate(readGames(path)):
+        gameData = gameTree.gameData
+        komi = DEF_KOMI if gameData.komi is None else gameData.komi
+        moves = [(move.player, move.row, move.col) for move in gameTree.getMainLine()]
+        setupStones = (gameData.addedBlack or [], gameData.addedWhite or [])
+        first = 0 if everyMove else len(moves)
+        for moveCount in range(first, len(moves) + 1):
+            yield Position("%s:%d:%d" % (path, gameIndex, moveCount), gameData.size,
+                    komi, moves[:moveCount], setupStones=setupStones)
+
+def initWorker(engineOptions):
+    """Creates the engine of a worker process."""
+    global workerEngine
+    workerEngine = GameEngine(*engineOptions)
+    workerMoves.clear()
+
+def setPosition(engine, moves, position):
+    """Takes the engine from the given moves to those of the position, keeping the
+    moves both share if they have the same setup stones. Returns the new moves on the
+    board, which are those of the position unless one of them is illegal, raising an
+    Exception then.
+    """
+    if engine.gameState.size != position.size:
+        engine.setBoardsize(position.size)
+        moves = []
+    if engine.gameState.getSetupStones() != position.setupStones:
+        engine.clearBoard()
+        moves = []
+        if position.setupStones[0] or position.setupStones[1]:
+            engine.gameState.addSetupStones(*position.setupStones)
+    if engine.komi != position.komi:
+        engine.setKomi(position.komi)
+    shared = 0
+    while (shared < len(moves) and shared < len(position.moves)
+            and moves[shared] == position.moves[shared]):
+        shared += 1
+    moves = list(moves)
+    while len(moves) > shared:
+        engine.undo()
+        moves.pop()
+    for player, row, col in position.moves[shared:]:
+        if not engine.play(player, None if row is None else [row, col]):
+            raise Exception("Illegal move %d" % (len(moves) + 1))
+        moves.append((player, row, col))
+    return moves
+
+def getSortKey(position):
+    """Returns a key sorting positions so those sharing setup stones and moves are next
+    to each other.
+    """
+    return (position.size, position.komi, position.setupStones,
+            tuple((player.value, -1 if row is None else row * position.size + col)
+                for player, row, col in position.moves))
+
+def analyzeBatch(positions):
+    """Analyzes positions in a worker process, in an order sharing as many moves as
+    possible between consecutive positions. Returns the results in the given order.
+    """
+    global workerMoves
+    order = sorted(range(len(positions)),
+            key=lambda index: getSortKey(positions[index]))
+    results = [None] * len(positions)
+    for index in order:
+        position = positions[index]
+        result = {"id": position.positionId}
+        try:
+            workerMoves = setPosition(workerEngine, workerMoves, position)
+            move, winRate, visits, variation = workerEngine.analyze(position.player)
+            result.update({
+                "player": PLAYER_NAMES[position.player],
+                "move": parseHelpers.vertexToString(move, position.size),
+                "winrate": winRate,
+                "visits": visits,
+                "pv": [parseHelpers.vertexToString(vertex, position.size)
+                    for vertex in variation]
+            })
+        except Exception as error:
+            # The moves on the board are not known after an error
+            workerEngine.setBoardsize(position.size)
+            workerMoves = []
+            result["error"] = str(error)
+        results[index] = result
+    return results
+
+def getBatches(positions):
+    """Yields lists of POSITIONS_PER_BATCH positions, or (id, error) pairs."""
+    batch = []
+    for position in positions:
+        batch.append(position)
+        if len(batch) == POSITIONS_PER_BATCH:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def submitBatch(pool, batch):
+    """Submits the positions of a batch and returns a function giving their results."""
+    positions = [position for position in batch if isinstance(position, Position)]
+    future = pool.submit(analyzeBatch, positions)
+    def getResults():
+        results = iter(future.result())
+        return [next(results) if isinstance(position, Position)
+                else {"id": position[0], "error": position[1]} for position in batch]
+    return getResults
+
+def analyzePositions(positions, output, workers=None, engineOptions=()):
+    """Analyzes Positions, or (id, error) pairs, with a pool of worker processes, all
+    the cores by default, and writes their results to the output as JSON lines as they
+    are ready. Returns the number of positions analyzed and the seconds spent.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    startTime = time.perf_counter()
+    count = 0
+    pending = deque()
+    with ProcessPoolExecutor(max_workers=workers, initializer=initWorker,
+            initargs=(tuple(engineOptions),)) as pool:
+        batches = getBatches(positions)
+        while True:
+            for batch in batches:
+                pending.append(submitBatch(pool, batch))
+                if len(pending) >= workers * BATCHES_PER_WORKER:
+                    break
+            if not pending:
+                break
+            for result in pending.popleft()():
+                output.write(json.dumps(result) + "\n")
+                count += 1
+            output.flush()
+    return count, time.perf_counter() - startTime
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Analyze many positions with Imago.")
+    parser.add_argument("input",
+            help="JSON lines file of positions, SGF file, or - for standard input")
+    parser.add_argument("--output", default=None,
+            help="JSON lines file for the results, standard output by default")
+    parser.add_argument("--every-move", action="store_true",
+            help="analyze the position before each move of SGF games")
+    parser.add_argument("--playouts", type=int, default=DEF_PLAYOUTS,
+            help="playouts per position")
+    parser.add_argument("--time", type=float, default=0,
+            help="maximum seconds of search per position, 0 for no limit")
+    parser.add_argument("--seed", type=int, default=None,
+            help="seed for the random number generators")
+    parser.add_argument("--workers", type=int, default=None,
+            help="worker processes, all the cores by default")
+    args = parser.parse_args()
+
+    inputFile = None
+    if args.input == "-":
+        inputPositions = readJsonPositions(sys.stdin)
+    elif args.input.lower().endswith(".sgf"):
+        inputPositions = readSgfPositions(args.input, args.every_move)
+    else:
+        inputFile = open(args.input)
+        inputPositions = readJsonPositions(inputFile)
+    outputFile = sys.stdout if args.output is None else open(args.output, "w")
+    try:
+        nPositions, seconds = analyzePositions(inputPositions, outputFile, args.workers,
+                (args.playouts, args.time or None, args.seed))
+    finally:
+        if inputFile is not None:
+            inputFile.close()
+        if outputFile is not sys.stdout:
+            outputFile.close()
+    print("%d positions in %.2f s (%.1f positions/s)" % (
+        nPositions, seconds, nPositions / seconds), file=sys.stderr)
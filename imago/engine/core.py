@@ -2,20 +2,85 @@
 
 """Imago GTP engine"""
 
-from random import randrange
+import threading
+import time
 
-from imago.data.enums import Player
+from imago import instrumentation
+from imago.data.enums import Player, ScoringRule
+from imago.engine.monteCarlo import MCTS, DEF_PLAYOUTS, DEF_TIME_LIMIT, getBestMove
+from imago.engine.parallelSearch import ParallelSearch
+from imago.engine.timeControl import TimeControl
+from imago.engine.transpositionTable import TranspositionTable, DEF_TABLE_SIZE
+from imago.gameLogic.gameBoard import PLAYER_CODES
 from imago.gameLogic.gameState import GameState
+from imago.gameLogic.scoring import getDeadStones, getScore, scoreToString
 
 DEF_SIZE = 19
 DEF_KOMI = 5.5
+DEF_PV_LENGTH = 10
+
+# Pondering stops once its tree holds this many playouts, which bounds its size
+PONDER_PLAYOUTS = 200000
 
 class GameEngine:
     """Plays the game of Go."""
 
-    def __init__(self):
+    def __init__(self, playouts=DEF_PLAYOUTS, timeLimit=DEF_TIME_LIMIT, seed=None,
+            workers=1, tableSize=DEF_TABLE_SIZE, scoringRule=ScoringRule.AREA, book=None):
         self.komi = DEF_KOMI
+        self.scoringRule = scoringRule
+        self.book = book
         self.gameState = GameState(DEF_SIZE)
+        self.playouts = playouts
+        self.timeLimit = timeLimit
+        self.seed = seed
+        self.timeControl = TimeControl()
+        self.tableSize = tableSize
+        self.table = None
+        if tableSize > 0:
+            self.table = TranspositionTable(tableSize)
+        self.search = None
+        self.setWorkers(workers)
+        self.ponderPlayouts = PONDER_PLAYOUTS
+        self.ponderSearch = MCTS(self.komi, PONDER_PLAYOUTS, None, seed,
+                stopWhenDecided=False, table=self.table)
+        self.ponderThread = None
+        self.ponderStop = None
+        self.searchTree = None
+        self.searchTreeKey = None
+        self.reusedVisits = 0
+        self.bookMove = False
+
+    def setWorkers(self, workers):
+        """Sets the number of processes searching in parallel on each move."""
+        if workers < 1:
+            raise Exception("Wrong number of workers")
+        if self.search is not None and isinstance(self.search, ParallelSearch):
+            self.search.shutdown()
+        if workers == 1:
+            self.search = MCTS(self.komi, self.playouts, self.timeLimit, self.seed,
+                    table=self.table)
+        else:
+            self.search = ParallelSearch(self.komi, self.playouts, self.timeLimit,
+                    workers, self.seed, tableSize=self.tableSize)
+        self.workers = workers
+
+    def setTableSize(self, tableSize):
+        """Sets the megabytes of the transposition table, 0 disabling it."""
+        if tableSize < 0:
+            raise Exception("Wrong transposition table size")
+        self.tableSize = tableSize
+        if tableSize == 0:
+            self.table = None
+        elif self.table is None:
+            self.table = TranspositionTable(tableSize)
+        else:
+            self.table.setSize(tableSize)
+        self.ponderSearch.table = self.table
+        if isinstance(self.search, ParallelSearch):
+            self.search.tableSize = tableSize
+        else:
+            self.search.table = self.table
 
     def setBoardsize(self, newSize):
         """Changes the size of the board.
@@ -23,16 +88,23 @@ class GameEngine:
         It is wise to call clear_board after this command.
         """
         self.gameState = GameState(newSize)
+        self.searchTree = None
+        self.clearTable()
 
     def clearBoard(self):
         """The board is cleared, the number of captured stones reset to zero and the move
         history reset to empty.
         """
         self.gameState.clearBoard()
+        self.searchTree = None
 
     def setKomi(self, komi):
         """Sets a new value of komi."""
         self.komi = komi
+        self.search.komi = komi
+        self.ponderSearch.komi = komi
+        self.searchTree = None
+        self.clearTable()
 
     def setFixedHandicap(self, stones):
         """Sets handicap stones in fixed vertexes."""
@@ -42,27 +114,191 @@ class GameEngine:
         return [[0,0], [0,1]]
 
     def play(self, color, vertex):
-        """Plays in the vertex passed as argument"""
-        row = vertex[0]
-        col = vertex[1]
-        self.gameState.playMoveForPlayer(row, col, color)
+        """Plays in the vertex passed as argument, None being a pass. Returns False if the
+        move is illegal.
+        """
+        searchTree = self.getSearchTree(color)
+        if vertex is None:
+            self.gameState.playPassForPlayer(color)
+            point = None
+        else:
+            row = vertex[0]
+            col = vertex[1]
+            if not self.gameState.playMoveForPlayer(row, col, color):
+                return False
+            point = self.gameState.getBoard().toPoint(row, col)
+        self.searchTree = None
+        if searchTree is not None:
+            # The subtree of the move played is kept for the next search
+            subtree = searchTree.getChild(point)
+            if subtree is not None:
+                subtree.makeRoot()
+                self.searchTree = subtree
+                self.searchTreeKey = self.getPositionKey()
+        return True
+
+    def setTimeSettings(self, mainTime, byoYomiTime, byoYomiStones):
+        """Sets the time settings of the game for both players."""
+        self.timeControl.setTimeSettings(mainTime, byoYomiTime, byoYomiStones)
+
+    def setTimeLeft(self, color, timeLeft, stonesLeft):
+        """Sets the time left for a player."""
+        self.timeControl.setTimeLeft(color, timeLeft, stonesLeft)
 
     def genmove(self, color):
         """The key of this TFG."""
-        validCells = []
-        board = self.gameState.getBoard().board
-        size = self.gameState.size
-        for row in range(size):
-            for col in range(size):
-                if board[row][col] == Player.EMPTY:
-                    validCells.append([row, col])
-        randIndex = randrange(0, len(validCells))
-        move = validCells[randIndex]
-        self.gameState.playMoveForPlayer(move[0], move[1], color)
+        startTime = time.perf_counter()
+        moveNumber = 0
+        if self.gameState.lastMove is not None:
+            moveNumber = self.gameState.lastMove.moveNumber
+        timeBudget = self.timeControl.getMoveBudget(color, self.gameState.size,
+                moveNumber)
+        self.bookMove = False
+        if self.book is not None:
+            move = self.book.getMove(self.gameState.getBoard(), color)
+            if move is not None and self.play(color, move):
+                if instrumentation.enabled:
+                    instrumentation.count("bookMoves")
+                self.bookMove = True
+                self.reusedVisits = 0
+                self.timeControl.registerMoveTime(color, time.perf_counter() - startTime)
+                return move
+        searchTree = self.getSearchTree(color)
+        self.reusedVisits = 0
+        if searchTree is not None:
+            self.reusedVisits = self.search.getReusedVisits(searchTree)
+        root = self.search.searchRoot(self.gameState, color, timeBudget, searchTree)
+        move = getBestMove(root, self.gameState.getBoard())
+        self.searchTree = root
+        self.searchTreeKey = self.getPositionKey()
+        self.play(color, move)
+        moveTime = time.perf_counter() - startTime
+        if instrumentation.enabled:
+            instrumentation.count("searches")
+            instrumentation.addTime("genmove", moveTime)
+        self.timeControl.registerMoveTime(color, moveTime)
         return move
 
+    def analyze(self, color, pvLength=DEF_PV_LENGTH):
+        """Searches the current position for the player without playing. Returns the
+        vertex of the best move, its win rate, the playouts of the search tree and the
+        principal variation as a list of vertices, None being a pass.
+        """
+        searchTree = self.getSearchTree(color)
+        root = self.search.searchRoot(self.gameState, color, None, searchTree)
+        self.searchTree = root
+        self.searchTreeKey = self.getPositionKey()
+        if not root.children:
+            return None, 0.0, root.visits, []
+        board = self.gameState.getBoard()
+        variation = []
+        node = root
+        while node.children and len(variation) < pvLength:
+            node = node.getBestChild()
+            variation.append(None if node.isPass() else board.toVertex(node.point))
+        return variation[0], root.getBestChild().getWinRate(), root.visits, variation
+
+    def getSearchStats(self):
+        """Returns the number of playouts, time in seconds and playouts per second of the
+        last search. Playouts reused from previous searches are in reusedVisits. All of
+        them are 0 if the last move generated came from the opening book.
+        """
+        if self.bookMove:
+            return 0, 0.0, 0.0
+        return (self.search.playoutCount, self.search.searchTime,
+                self.search.getPlayoutRate())
+
+    def startPondering(self):
+        """Starts searching the current position in the background, so the search tree
+        can be used when the next move arrives. Nothing is searched if the tree already
+        holds ponderPlayouts playouts, and the search stops when it reaches them.
+        """
+        if self.ponderThread is not None or self.gameState.isFinished():
+            return
+        player = self.gameState.getCurrentPlayer()
+        root = self.getSearchTree(player)
+        if root is None:
+            root = self.ponderSearch.getRoot(self.gameState, player)
+            self.searchTree = root
+            self.searchTreeKey = self.getPositionKey()
+        # Pondering can be stopped and started again many times on the same tree
+        remainingPlayouts = self.ponderPlayouts - root.visits
+        if remainingPlayouts <= 0:
+            return
+        self.ponderSearch.maxPlayouts = remainingPlayouts
+        self.ponderStop = threading.Event()
+        self.ponderThread = threading.Thread(target=self.ponderSearch.runSearch,
+                args=(root, self.gameState, None, self.ponderStop), daemon=True)
+        self.ponderThread.start()
+
+    def stopPondering(self):
+        """Stops the background search and waits for it to finish."""
+        if self.ponderThread is None:
+            return
+        self.ponderStop.set()
+        self.ponderThread.join()
+        self.ponderThread = None
+
+    def clearTable(self):
+        """Empties the transposition table, whose statistics depend on the komi."""
+        if self.table is not None:
+            self.table.clear()
+
+    def getPositionKey(self):
+        """Returns a key identifying the current position and player to move."""
+        moveNumber = 0
+        if self.gameState.lastMove is not None:
+            moveNumber = self.gameState.lastMove.moveNumber
+        return (self.gameState.getHash(), moveNumber)
+
+    def getSearchTree(self, color):
+        """Returns the kept search tree if it belongs to the current position with the
+        given player to move, None otherwise.
+        """
+        if (self.searchTree is None
+            or self.searchTree.color != PLAYER_CODES[Player.otherPlayer(color)]
+            or self.searchTreeKey != self.getPositionKey()):
+            return None
+        return self.searchTree
+
+    def getDeadStones(self):
+        """Returns the points of the stones estimated to be dead in the current position.
+        """
+        board = self.gameState.getBoard()
+        koPoint = None
+        koVertex = self.gameState.getKoPoint()
+        if koVertex is not None:
+            koPoint = board.toPoint(koVertex[0], koVertex[1])
+        color = PLAYER_CODES[self.gameState.getCurrentPlayer()]
+        return getDeadStones(board, color, koPoint, seed=self.seed)
+
+    def getFinalScore(self):
+        """Returns the result of the game, such as B+3.5, with dead stones removed."""
+        score = getScore(self.gameState.getBoard(), self.komi, self.scoringRule,
+                self.getDeadStones())
+        return scoreToString(score)
+
+    def getFinalStatusList(self, status):
+        """Returns the vertices of the stones with the given status: alive, dead or seki.
+        Stones in seki are not told apart from alive ones, so there are none.
+        """
+        if status not in ("alive", "dead", "seki"):
+            raise Exception("Wrong stone status")
+        if status == "seki":
+            return []
+        board = self.gameState.getBoard()
+        deadStones = self.getDeadStones()
+        points = []
+        for point in range(len(board.cells)):
+            if board.groups[point] is None:
+                continue
+            if (point in deadStones) == (status == "dead"):
+                points.append(point)
+        return [list(board.toVertex(point)) for point in points]
+
     def undo(self):
         """The board configuration and number of captured stones are reset to the state
             before the last move, which is removed from the move history.
         """
         self.gameState.undo()
+        self.searchTree = None
@@ -0,0 +1,239 @@
+"""GTP server serving many games at once over TCP or Unix sockets.
+
+Each connection is a session with its own GameEngine, living in one of a fixed pool of
+worker processes shared by all the sessions. Inside a worker each session runs its
+commands on a thread of its own, so a session searching a move does not hold back the
+commands of the other sessions of the worker, which are answered as soon as they are
+run. The asyncio event loop only moves lines between the sockets and the workers,
+writing to the workers from a thread of each one so it never waits for a pipe.
+"""
+
+import asyncio
+import multiprocessing
+import os
+import queue
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from imago.engine.core import GameEngine
+from imago.engine.imagoIO import ImagoIO
+
+def runSession(sessionId, lines, connection, lock, engineOptions):
+    """Runs the lines of a session on its own engine until a None line, sending each
+    response with the id of the session and whether the session asked to quit.
+    """
+    imagoIO = ImagoIO(GameEngine(*engineOptions))
+    imagoIO.running = True
+    while True:
+        line = lines.get()
+        if line is None:
+            break
+        response = imagoIO.handleLine(line)
+        with lock:
+            if connection.closed:
+                break
+            connection.send((sessionId, response, not imagoIO.running))
+
+def runWorker(connection, engineOptions):
+    """Serves the sessions assigned to a worker process. Receives (sessionId, line)
+    messages and passes each line to the thread of its session, which answers it. A
+    None line closes a session and is not answered, and a None message ends the worker.
+    """
+    lock = threading.Lock()
+    sessions = {}
+    while True:
+        message = connection.recv()
+        if message is None:
+            break
+        sessionId, line = message
+        if line is None:
+            lines = sessions.pop(sessionId, None)
+            if lines is not None:
+                lines.put(None)
+            continue
+        lines = sessions.get(sessionId)
+        if lines is None:
+            lines = queue.Queue()
+            threading.Thread(target=runSession, daemon=True,
+                    args=(sessionId, lines, connection, lock, engineOptions)).start()
+            sessions[sessionId] = lines
+        lines.put(line)
+    for lines in sessions.values():
+        lines.put(None)
+    with lock:
+        connection.close()
+
+class Worker:
+    """A worker process and the responses its sessions are waiting for. Each session
+    waits for the response of a line before sending the next one, so responses are
+    matched to their sessions by id.
+    """
+
+    def __init__(self, context, engineOptions):
+        self.connection, childConnection = context.Pipe()
+        self.process = context.Process(target=runWorker,
+                args=(childConnection, engineOptions), daemon=True)
+        self.process.start()
+        childConnection.close()
+        self.sender = ThreadPoolExecutor(max_workers=1)
+        self.pending = {}
+        self.sessionCount = 0
+        self.alive = True
+        self.stopped = False
+
+    def send(self, message):
+        """Writes a message to the worker from the sending thread, in order. Nothing is
+        sent once the worker is stopped.
+        """
+        if not self.stopped:
+            self.sender.submit(self.connection.send, message)
+
+    def request(self, sessionId, line):
+        """Sends a line of a session and returns a future of its response."""
+        future = asyncio.get_running_loop().create_future()
+        if self.stopped:
+            future.set_result((None, True))
+            return future
+        if not self.alive:
+            future.set_exception(Exception("Worker process died"))
+            return future
+        self.pending[sessionId] = future
+        self.send((sessionId, line))
+        return future
+
+    def closeSession(self, sessionId):
+        """Frees the engine of a session."""
+        self.sessionCount -= 1
+        self.pending.pop(sessionId, None)
+        self.send((sessionId, None))
+
+    def readResponses(self):
+        """Gives the responses received to the sessions waiting for them."""
+        try:
+            while self.connection.poll():
+                sessionId, response, finished = self.connection.recv()
+                future = self.pending.pop(sessionId, None)
+                if future is not None and not future.done():
+                    future.set_result((response, finished))
+        except (EOFError, OSError):
+            self.alive = False
+            asyncio.get_running_loop().remove_reader(self.connection.fileno())
+            for future in self.pending.values():
+                if not future.done():
+                    future.set_exception(Exception("Worker process died"))
+            self.pending.clear()
+
+    def detach(self):
+        """Stops sending lines to the worker and ends the sessions waiting for a
+        response as if they had quit. Called from the event loop before stop.
+        """
+        self.stopped = True
+        for future in self.pending.values():
+            if not future.done():
+                future.set_result((None, True))
+        self.pending.clear()
+
+    def stop(self):
+        """Ends the worker process once it is detached. It blocks until the process
+        ends.
+        """
+        self.sender.submit(self.connection.send, None)
+        self.sender.shutdown()
+        self.process.join()
+        self.connection.close()
+
+class GtpServer:
+    """Accepts GTP connections and serves each with its own engine in a shared pool of
+    worker processes, all the cores by default.
+    """
+
+    def __init__(self, workers=None, engineOptions=()):
+        if workers is None:
+            workers = os.cpu_count() or 1
+        if workers < 1:
+            raise Exception("Wrong number of workers")
+        self.workerCount = workers
+        self.engineOptions = tuple(engineOptions)
+        self.workers = []
+        self.server = None
+        self.clients = set()
+        self.handlers = set()
+        self.nextSessionId = 0
+
+    async def start(self, host="127.0.0.1", port=0, path=None):
+        """Starts the workers and listens on a Unix socket if a path is given or on a
+        TCP port otherwise. Returns the asyncio server.
+        """
+        loop = asyncio.get_running_loop()
+        context = multiprocessing.get_context()
+        for _ in range(self.workerCount):
+            worker = Worker(context, self.engineOptions)
+            loop.add_reader(worker.connection.fileno(), worker.readResponses)
+            self.workers.append(worker)
+        if path is not None:
+            self.server = await asyncio.start_unix_server(self.handleClient, path)
+        else:
+            self.server = await asyncio.start_server(self.handleClient, host, port)
+        return self.server
+
+    async def handleClient(self, reader, writer):
+        """Serves a connection until it sends quit or closes."""
+        if not self.workers:
+            # The server is stopping
+            writer.close()
+            return
+        sessionId = self.nextSessionId
+        self.nextSessionId += 1
+        worker = min(self.workers, key=lambda worker: worker.sessionCount)
+        worker.sessionCount += 1
+        self.clients.add(writer)
+        handler = asyncio.current_task()
+        self.handlers.add(handler)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                response, finished = await worker.request(sessionId,
+                        line.decode(errors="replace"))
+                if response is not None:
+                    writer.write(response.encode())
+                    await writer.drain()
+                if finished:
+                    break
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            self.clients.discard(writer)
+            self.handlers.discard(handler)
+            worker.closeSession(sessionId)
+            writer.close()
+
+    async def stop(self):
+        """Stops listening, ends the sessions and then the workers."""
+        loop = asyncio.get_running_loop()
+        if self.server is not None:
+            self.server.close()
+        workers, self.workers = self.workers, []
+        for worker in workers:
+            loop.remove_reader(worker.connection.fileno())
+            worker.detach()
+        if self.server is not None:
+            for writer in list(self.clients):
+                writer.close()
+            await asyncio.gather(*self.handlers, return_exceptions=True)
+            await self.server.wait_closed()
+            self.server = None
+        for worker in workers:
+            await loop.run_in_executor(None, worker.stop)
+
+    async def serveForever(self, host="127.0.0.1", port=0, path=None):
+        """Starts the server and serves connections until cancelled."""
+        server = await self.start(host, port, path)
+        for socket in server.sockets:
+            print("Serving GTP on %s" % (socket.getsockname(),), file=sys.stderr)
+        try:
+            await server.serve_forever()
+        finally:
+            await self.stop()
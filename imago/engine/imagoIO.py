@@ -2,22 +2,31 @@
 
 """Imago GTP engine input output"""
 
+import re
 import sys
 
+from imago import instrumentation
 from imago.engine import parseHelpers
 from imago.engine.core import GameEngine
+from imago.gameLogic.gameData import GameData
+
+# Control characters other than tabs and line feeds are discarded from the input
+CONTROL_CHARACTERS = re.compile("[\x00-\x08\x0b-\x1f\x7f]")
+
+# Biggest board which can be named with GTP vertices
+MAX_BOARD_SIZE = 25
 
 def protocol_version(_):
     """Version of the GTP Protocol"""
-    print("2")
+    return "2"
 
 def name(_):
     """Name of the engine"""
-    print("Imago")
+    return "Imago"
 
 def version(_):
     """Version of the engine"""
-    print("0.0.0")
+    return "0.0.0"
 
 def getCoordsText(row, col):
     """Returns a string representation of row and col.
@@ -25,16 +34,55 @@ def getCoordsText(row, col):
     """
     return "%s%d" % (chr(65+row), col+1)
 
+def cleanLine(line):
+    """Returns a line of input without comments and control characters and with tabs
+    turned into spaces.
+    """
+    line = line.split("#", 1)[0]
+    return CONTROL_CHARACTERS.sub("", line).replace("\t", " ")
+
+def formatResponse(success, commandId, text):
+    """Returns a response framed as GTP requires: = for success or ? for failure,
+    the id of the command if it had one, the text and an empty line.
+    """
+    return "%s%s %s\n\n" % ("=" if success else "?", commandId, text)
+
+def checkArgCount(args, count):
+    """Raises an Exception if the number of arguments is not the expected one."""
+    if len(args) != count:
+        raise Exception("syntax error")
+
+def parseColor(text):
+    """Returns the player of a color argument, raising an Exception if it is wrong."""
+    color = parseHelpers.parseColor(text)
+    if color == parseHelpers.ParseCodes.ERROR:
+        raise Exception("syntax error")
+    return color
+
+def parseVertex(text, size):
+    """Returns the vertex of a vertex argument, raising an Exception if it is wrong."""
+    vertex = parseHelpers.parseVertex(text, size)
+    if vertex == parseHelpers.ParseCodes.ERROR:
+        raise Exception("syntax error")
+    return vertex
+
 class ImagoIO:
-    """Recieves and handles commands."""
+    """Recieves and handles commands.
+
+    Each command is a method, or a function, named like the GTP command, which takes
+    the list of arguments, returns the text of the response and raises an Exception
+    with the error message when the command fails.
+    """
 
-    def __init__(self):
-        self.commands_set = {
+    def __init__(self, gameEngine=None, ponder=False, recorder=None,
+            inputStream=None, outputStream=None):
+        self.commands = {command.__name__: command for command in (
             protocol_version,
             name,
             version,
             self.known_command,
             self.list_commands,
+            self.quit,
             self.boardsize,
             self.clear_board,
             self.komi,
@@ -43,69 +91,133 @@ class ImagoIO:
             self.set_free_handicap,
             self.play,
             self.genmove,
-            self.undo
-        }
-        self.gameEngine = GameEngine()
+            self.undo,
+            self.showboard,
+            self.time_settings,
+            self.time_left,
+            self.final_score,
+            self.final_status_list,
+            self.imago_workers,
+            self.imago_tt_size,
+            self.imago_stats,
+            self.imago_profile
+        )}
+        if gameEngine is None:
+            gameEngine = GameEngine()
+        self.gameEngine = gameEngine
+        self.ponder = ponder
+        self.recorder = recorder
+        self.engineColor = None
+        self.profile = False
+        self.profilePath = None
+        self.input = sys.stdin if inputStream is None else inputStream
+        self.output = sys.stdout if outputStream is None else outputStream
+        self.running = False
 
     def start(self):
-        """Starts reading commands interactively."""
-        while True:
-            input_tokens = input().split()
+        """Reads commands until quit is received or the input ends. Each response is
+        written at once and flushed.
+        """
+        self.running = True
+        while self.running:
+            line = self.input.readline()
+            if not line:
+                break
+
+            self.gameEngine.stopPondering()
+
+            response = self.handleLine(line)
+            if response is not None:
+                self.output.write(response)
+                self.output.flush()
+
+            if self.running and self.ponder and self.isOpponentTurn():
+                self.gameEngine.startPondering()
 
-            if input_tokens[0] == "quit":
-                sys.exit(0)
+    def handleLine(self, line):
+        """Runs the command in a line of input and returns its framed response, or None
+        if the line has no command.
+        """
+        tokens = cleanLine(line).split()
+        if not tokens:
+            return None
+        commandId = ""
+        if tokens[0].isdigit():
+            commandId = tokens.pop(0)
+            if not tokens:
+                return formatResponse(False, commandId, "unknown command")
+        command = self.commands.get(tokens[0])
+        if command is None:
+            return formatResponse(False, commandId, "unknown command")
+        try:
+            text = command(tokens[1:])
+        except ValueError:
+            return formatResponse(False, commandId, "syntax error")
+        except Exception as error:
+            return formatResponse(False, commandId, str(error))
+        return formatResponse(True, commandId, "" if text is None else text)
+
+    def recordMove(self, color, vertex):
+        """Appends a move to the game record, if there is one, starting a new game in it
+        if needed.
+        """
+        if self.recorder is None:
+            return
+        if not self.recorder.isRecording():
+            self.recorder.startGame(GameData(size=self.gameEngine.gameState.size,
+                komi=self.gameEngine.komi))
+        if vertex is None:
+            self.recorder.addMove(color, None, None)
+        else:
+            self.recorder.addMove(color, vertex[0], vertex[1])
 
-            command = None
-            for comm in self.commands_set:
-                if comm.__name__ == input_tokens[0]:
-                    command = comm
+    def endRecord(self):
+        """Ends the game being recorded, if any."""
+        if self.recorder is not None:
+            self.recorder.endGame()
 
-            if command is not None:
-                arguments = input_tokens[1:]
-                #print("[DEBUG]:Selected command: %s; args: %s" % (command, arguments))
-                command(arguments)
-            else:
-                print("unknown command")
+    def isOpponentTurn(self):
+        """True if the engine has played and the opponent is the next to move."""
+        return (self.engineColor is not None
+                and self.gameEngine.gameState.getCurrentPlayer() != self.engineColor)
 
     def known_command(self, args):
         """True if command is known, false otherwise"""
-        if len(args) != 1:
-            print ("Wrong number of args.")
-            print ("Usage: known_command COMMAND_NAME")
-            sys.exit(0)
-        out = "false"
-        for c in self.commands_set:
-            if c.__name__ == args[0]:
-                out = "true"
-        print(out)
+        checkArgCount(args, 1)
+        return "true" if args[0] in self.commands else "false"
 
     def list_commands(self, _):
         """List of commands, one per row"""
-        for c in self.commands_set:
-            print("%s - %s" % (c.__name__, c.__doc__))
+        return "\n".join(self.commands)
+
+    def quit(self, _):
+        """Ends the session, closing the game record if there is one."""
+        self.running = False
+        if self.recorder is not None:
+            self.recorder.close()
 
     def boardsize(self, args):
         """Changes the size of the board.
         Board state, number of stones and move history become arbitrary.
         It is wise to call clear_board after this command.
         """
-        if len(args) != 1:
-            print("Error - Wrong n of args")
-            sys.exit(1)
+        checkArgCount(args, 1)
         size = int(args[0])
+        if size < 1 or size > MAX_BOARD_SIZE:
+            raise Exception("unacceptable size")
         self.gameEngine.setBoardsize(size)
+        self.endRecord()
 
     def clear_board(self, _):
         """The board is cleared, the number of captured stones reset to zero and the move
         history reset to empty.
         """
         self.gameEngine.clearBoard()
+        self.endRecord()
 
     def komi(self, args):
         """Sets a new value of komi."""
-        if len(args) != 1:
-            print("Error - Wrong n of args")
-            sys.exit(1)
+        checkArgCount(args, 1)
         komi = float(args[0])
         self.gameEngine.setKomi(komi)
 
@@ -113,15 +225,10 @@ class ImagoIO:
         """Handicap stones are placed on the board on standard vertices.
             These vertices follow the GTP specification.
         """
-        if len(args) != 1:
-            print("Error - Wrong n of args")
-            sys.exit(1)
+        checkArgCount(args, 1)
         stones = float(args[0])
         vertices = self.gameEngine.setFixedHandicap(stones)
-        out = getCoordsText(vertices[0][0], vertices[0][1])
-        for vertex in vertices[1:]:
-            out += " " + getCoordsText(vertex[0], vertex[1])
-        print(out)
+        return " ".join(getCoordsText(vertex[0], vertex[1]) for vertex in vertices)
 
     def place_free_handicap(self, args):
         """Handicap stones are placed on the board by the AI criteria."""
@@ -133,25 +240,109 @@ class ImagoIO:
 
     def play(self, args):
         """A stone of the requested color is played at the requested vertex."""
-        if len(args) != 2:
-            print("Error - Wrong n of args")
-            sys.exit(1)
-        move = parseHelpers.parseMove(args, self.gameEngine.gameState.size)
-        self.gameEngine.play(move.color, move.vertex)
+        checkArgCount(args, 2)
+        color = parseColor(args[0])
+        vertex = parseVertex(args[1], self.gameEngine.gameState.size)
+        if not self.gameEngine.play(color, vertex):
+            raise Exception("illegal move")
+        self.recordMove(color, vertex)
 
     def genmove(self, args):
         """A stone of the requested color is played where the engine chooses."""
-        if len(args) != 1:
-            print("Error - Wrong n of args")
-            sys.exit(1)
-        color = parseHelpers.parseColor(args[0])
-        output = parseHelpers.vertexToString(self.gameEngine.genmove(color),
-                self.gameEngine.gameState.size)
-        print(output)
-        self.gameEngine.gameState.getBoard().printBoard()
+        checkArgCount(args, 1)
+        color = parseColor(args[0])
+        self.engineColor = color
+        if self.profile:
+            vertex = instrumentation.profileCall(self.gameEngine.genmove, (color,),
+                    self.profilePath)
+        else:
+            vertex = self.gameEngine.genmove(color)
+        self.recordMove(color, vertex)
+        if self.gameEngine.bookMove:
+            print("Move from the opening book", file=sys.stderr)
+        else:
+            playouts, seconds, rate = self.gameEngine.getSearchStats()
+            print("%d playouts in %.2f s (%.1f playouts/s), %d reused" % (
+                playouts, seconds, rate, self.gameEngine.reusedVisits), file=sys.stderr)
+        return parseHelpers.vertexToString(vertex, self.gameEngine.gameState.size)
 
     def undo(self, _):
         """The board configuration and number of captured stones are reset to the state
             before the last move, which is removed from the move history.
         """
+        if self.gameEngine.gameState.lastMove is None:
+            raise Exception("cannot undo")
+        if self.recorder is not None:
+            self.recorder.undo()
         self.gameEngine.undo()
+
+    def showboard(self, _):
+        """The board, starting on the line after the = of the response."""
+        return "\n" + self.gameEngine.gameState.getBoard().toString()
+
+    def time_settings(self, args):
+        """Sets the main time, byo-yomi time and byo-yomi stones of the game."""
+        checkArgCount(args, 3)
+        mainTime, byoYomiTime, byoYomiStones = (int(arg) for arg in args)
+        self.gameEngine.setTimeSettings(mainTime, byoYomiTime, byoYomiStones)
+
+    def time_left(self, args):
+        """Sets the time and stones left for a player in the current period."""
+        checkArgCount(args, 3)
+        color = parseColor(args[0])
+        self.gameEngine.setTimeLeft(color, int(args[1]), int(args[2]))
+
+    def final_score(self, _):
+        """Score of the game, such as B+3.5, with dead stones estimated."""
+        return self.gameEngine.getFinalScore()
+
+    def final_status_list(self, args):
+        """Vertices of the stones with the given status: alive, dead or seki."""
+        checkArgCount(args, 1)
+        vertices = self.gameEngine.getFinalStatusList(args[0].lower())
+        size = self.gameEngine.gameState.size
+        return " ".join(parseHelpers.vertexToString(vertex, size) for vertex in vertices)
+
+    def imago_workers(self, args):
+        """Sets the number of processes searching in parallel on each move."""
+        checkArgCount(args, 1)
+        workers = int(args[0])
+        self.gameEngine.setWorkers(workers)
+
+    def imago_tt_size(self, args):
+        """Sets the megabytes of the transposition table, 0 disabling it."""
+        checkArgCount(args, 1)
+        tableSize = float(args[0])
+        self.gameEngine.setTableSize(tableSize)
+
+    def imago_stats(self, args):
+        """Counters and timers of the engine as JSON. With on, off or reset as argument
+        it turns them on or off or sets them to zero, and with dump and a file name it
+        writes them to the file.
+        """
+        if not args:
+            return instrumentation.toJson()
+        action = args[0].lower()
+        if action == "dump":
+            checkArgCount(args, 2)
+            instrumentation.dump(args[1])
+            return None
+        checkArgCount(args, 1)
+        if action == "on":
+            instrumentation.setEnabled(True)
+        elif action == "off":
+            instrumentation.setEnabled(False)
+        elif action == "reset":
+            instrumentation.reset()
+        else:
+            raise Exception("syntax error")
+        return None
+
+    def imago_profile(self, args):
+        """Turns on or off running genmove under cProfile. The statistics are printed on
+        the standard error output or, if a file name follows on, written to the file.
+        """
+        if not args or len(args) > 2 or args[0].lower() not in ("on", "off"):
+            raise Exception("syntax error")
+        self.profile = args[0].lower() == "on"
+        self.profilePath = args[1] if self.profile and len(args) == 2 else None
@@ -0,0 +1,357 @@
+"""Monte Carlo Tree Search."""
+
+import math
+import time
+from random import Random
+
+from imago import instrumentation
+from imago.data.enums import Player
+from imago.engine.transpositionTable import NodeStats
+from imago.gameLogic.gameBoard import EMPTY, BLACK, WHITE, PLAYER_CODES, CODE_PLAYERS
+from imago.gameLogic.playoutBoard import PlayoutBoard, PLAYOUT_MOVES_PER_CELL
+from imago.gameLogic.scoring import scoreArea
+
+DEF_PLAYOUTS = 1000
+DEF_TIME_LIMIT = 10 # Seconds
+
+EXPLORATION_CONSTANT = math.sqrt(2)
+
+# Every how many playouts the clock and the state of the search are checked
+CHECK_INTERVAL = 8
+
+class MCTSNode:
+    """Node of the search tree: a move and the results of the playouts through it.
+
+    Moves are stored as board points, None being a pass. Wins are counted for the player
+    who made the move. The visits and wins can be shared with other nodes reaching the
+    same position through a transposition table.
+    """
+
+    def __init__(self, point, color, koPoint=None, positionKey=None, parent=None,
+            stats=None):
+        self.point = point
+        self.color = color
+        self.koPoint = koPoint
+        self.positionKey = positionKey
+        self.parent = parent
+        self.children = []
+        self.untriedPoints = None
+        if stats is None:
+            stats = NodeStats()
+        self.stats = stats
+
+    @property
+    def visits(self):
+        """Number of playouts through the node."""
+        return self.stats.visits
+
+    @visits.setter
+    def visits(self, visits):
+        self.stats.visits = visits
+
+    @property
+    def wins(self):
+        """Number of playouts through the node won by the player who made the move."""
+        return self.stats.wins
+
+    @wins.setter
+    def wins(self, wins):
+        self.stats.wins = wins
+
+    def isPass(self):
+        """Returns True if the move of the node is a pass."""
+        return self.point is None
+
+    def isTerminal(self):
+        """Returns True if the game ends after the move of the node."""
+        return self.isPass() and self.parent is not None and self.parent.isPass()
+
+    def getWinRate(self):
+        """Returns the ratio of won playouts through this node."""
+        if self.visits == 0:
+            return 0.0
+        return self.wins / self.visits
+
+    def addChild(self, point, color, koPoint, positionKey, stats=None):
+        """Adds a node to the children of this one."""
+        child = MCTSNode(point, color, koPoint, positionKey, self, stats)
+        self.children.append(child)
+        return child
+
+    def getChild(self, point):
+        """Returns the child with the given move, or None if it has not been expanded."""
+        for child in self.children:
+            if child.point == point:
+                return child
+        return None
+
+    def makeRoot(self):
+        """Detaches this node from its parent so it can be the root of a new search."""
+        self.parent = None
+
+    def selectChild(self, explorationConstant):
+        """Returns the child with the highest UCB1 value."""
+        logVisits = math.log(self.stats.visits)
+        return max(self.children, key=lambda child:
+                child.stats.wins / child.stats.visits
+                + explorationConstant * math.sqrt(logVisits / child.stats.visits))
+
+    def getBestChild(self):
+        """Returns the most visited child."""
+        return max(self.children, key=lambda child: (child.visits, child.wins))
+
+class MCTS:
+    """Chooses moves by building a search tree with the results of random playouts.
+
+    The search stops when the playouts per move are exhausted or when the time limit
+    in seconds is reached, whichever comes first. A time limit of None means no limit.
+    It also stops early when the remaining playouts could not change the chosen move.
+    If a transposition table is given, nodes of the same position share its statistics.
+    """
+
+    def __init__(self, komi, playouts=DEF_PLAYOUTS, timeLimit=DEF_TIME_LIMIT,
+            seed=None, stopWhenDecided=True, table=None):
+        self.komi = komi
+        self.table = table
+        self.maxPlayouts = playouts
+        self.timeLimit = timeLimit
+        self.stopWhenDecided = stopWhenDecided
+        self.explorationConstant = EXPLORATION_CONSTANT
+        self.rand = Random(seed)
+        self.playoutCount = 0
+        self.searchTime = 0.0
+
+    def getPlayoutRate(self):
+        """Returns the playouts per second of the last search."""
+        if self.searchTime == 0:
+            return 0.0
+        return self.playoutCount / self.searchTime
+
+    def getReusedVisits(self, root):
+        """Returns the visits of a previous search tree kept by searching from it."""
+        return root.visits
+
+    def search(self, gameState, player, timeBudget=None):
+        """Returns the best move found for the player in the given state, as a row and
+        column pair or None for pass. The time budget in seconds, if given, further
+        limits the time limit of the search.
+        """
+        root = self.searchRoot(gameState, player, timeBudget)
+        return getBestMove(root, gameState.getBoard())
+
+    def searchRoot(self, gameState, player, timeBudget=None, root=None):
+        """Searches the given state and returns the root of the search tree. The search
+        can continue the tree of a previous search of the same state.
+        """
+        if root is None:
+            root = self.getRoot(gameState, player)
+        self.runSearch(root, gameState, timeBudget)
+        return root
+
+    def getRoot(self, gameState, player):
+        """Returns a new search tree root for the player to move in the given state."""
+        board = gameState.getBoard()
+        koVertex = gameState.getKoPoint()
+        koPoint = None
+        if koVertex is not None:
+            koPoint = board.toPoint(koVertex[0], koVertex[1])
+        # The root stands for the last move, -1 if there is none
+        lastMove = gameState.lastMove
+        point = -1
+        if lastMove is not None:
+            point = None
+            if not lastMove.isPass():
+                point = board.toPoint(lastMove.row, lastMove.col)
+        return MCTSNode(point, PLAYER_CODES[Player.otherPlayer(player)], koPoint)
+
+    def runSearch(self, root, gameState, timeBudget=None, stopEvent=None):
+        """Runs playouts from the root until the playouts or time run out or, if given,
+        until the stop event is set.
+        """
+        self.playoutCount = 0
+        startTime = time.perf_counter()
+        timeLimit = getTimeLimit(self.timeLimit, timeBudget)
+        deadline = None
+        if timeLimit is not None:
+            deadline = startTime + timeLimit
+        rootBoard = PlayoutBoard.fromGameBoard(gameState.getBoard(), root.koPoint)
+        while self.playoutCount < self.maxPlayouts:
+            self.runIteration(root, rootBoard, gameState)
+            self.playoutCount += 1
+            if self.playoutCount % CHECK_INTERVAL != 0:
+                continue
+            if stopEvent is not None and stopEvent.is_set():
+                break
+            remainingPlayouts = self.maxPlayouts - self.playoutCount
+            if deadline is not None:
+                now = time.perf_counter()
+                if now >= deadline:
+                    break
+                rate = self.playoutCount / (now - startTime)
+                remainingPlayouts = min(remainingPlayouts, rate * (deadline - now))
+            if self.stopWhenDecided and isDecided(root, remainingPlayouts):
+                break
+        self.searchTime = time.perf_counter() - startTime
+
+    def runIteration(self, root, rootBoard, gameState):
+        """Selects a node, expands it, runs a playout from it and updates the results of
+        its path. With instrumentation enabled the time of each phase is measured.
+        """
+        board = rootBoard.copy()
+        pathKeys = set()
+        if not instrumentation.enabled:
+            node = self.selectNode(root, board, pathKeys)
+            node = self.expandCandidate(board, node, gameState, pathKeys)
+            backpropagate(node, self.simulate(board, node))
+            return
+
+        instrumentation.count("playouts")
+        startTime = time.perf_counter()
+        node = self.selectNode(root, board, pathKeys)
+        selectionTime = time.perf_counter()
+        node = self.expandCandidate(board, node, gameState, pathKeys)
+        expansionTime = time.perf_counter()
+        winner = self.simulate(board, node)
+        simulationTime = time.perf_counter()
+        backpropagate(node, winner)
+        endTime = time.perf_counter()
+        instrumentation.addTime("selection", selectionTime - startTime)
+        instrumentation.addTime("expansion", expansionTime - selectionTime)
+        instrumentation.addTime("simulation", simulationTime - expansionTime)
+        instrumentation.addTime("backpropagation", endTime - simulationTime)
+
+    def selectNode(self, root, board, pathKeys):
+        """Descends from the root through fully expanded nodes, playing their moves on
+        the board, and returns the node reached.
+        """
+        node = root
+        while node.untriedPoints is not None and not node.untriedPoints and node.children:
+            node = node.selectChild(self.explorationConstant)
+            if node.isPass():
+                board.playPass()
+            else:
+                board.play(node.point, node.color)
+                pathKeys.add(node.positionKey)
+        return node
+
+    def expandCandidate(self, board, node, gameState, pathKeys):
+        """Expands a random untried move of the node and returns the new child, or the
+        node itself if it has no untried moves.
+        """
+        if node.untriedPoints is None:
+            node.untriedPoints = self.getCandidates(board, node, gameState, pathKeys)
+        if not node.untriedPoints:
+            return node
+        index = self.rand.randrange(len(node.untriedPoints))
+        point = node.untriedPoints[index]
+        node.untriedPoints[index] = node.untriedPoints[-1]
+        node.untriedPoints.pop()
+        color = BLACK + WHITE - node.color
+        return self.expandNode(board, node, point, color, gameState)
+
+    def simulate(self, board, node):
+        """Returns the color code of the winner of a playout from the node."""
+        if node.isTerminal():
+            return self.getWinner(board)
+        return self.playout(board, BLACK + WHITE - node.color)
+
+    def getCandidates(self, board, node, gameState, pathKeys):
+        """Returns the legal points the player after the node can play, excluding the
+        filling of its own eyes. If there are none, pass is the only candidate.
+        """
+        if node.isTerminal():
+            return []
+        color = BLACK + WHITE - node.color
+        player = CODE_PLAYERS[color]
+        nextPlayer = Player.otherPlayer(player)
+        cells = board.cells
+        candidates = []
+        for point in range(len(cells)):
+            if (cells[point] != EMPTY or point == board.koPoint
+                or board.isSuicide(point, color)
+                or board.isEye(point, color)):
+                continue
+            key = gameState.getRepetitionKey(
+                    board.getHashAfterMove(point, color), nextPlayer)
+            if key in gameState.positionHistory or key in pathKeys:
+                continue
+            candidates.append(point)
+        if not candidates:
+            candidates.append(None)
+        return candidates
+
+    def expandNode(self, board, node, point, color, gameState):
+        """Plays a candidate move of a node on the board and adds its child node."""
+        if instrumentation.enabled:
+            instrumentation.count("nodesExpanded")
+        nextPlayer = CODE_PLAYERS[BLACK + WHITE - color]
+        positionKey = None
+        if point is None:
+            board.playPass()
+        else:
+            board.play(point, color)
+            positionKey = gameState.getRepetitionKey(board.hash, nextPlayer)
+        # Passes are not shared, the same position can be the end of the game or not.
+        # Neither are the children of the root, which count the playouts of this search.
+        stats = None
+        if self.table is not None and point is not None and node.parent is not None:
+            stats = self.table.getStats(board.getHash(nextPlayer))
+        return node.addChild(point, color, board.koPoint, positionKey, stats)
+
+    def playout(self, board, color):
+        """Plays random moves on the board until both players pass and returns the color
+        code of the winner.
+        """
+        board.playRandomGame(color, self.rand.random,
+                PLAYOUT_MOVES_PER_CELL * board.size * board.size)
+        return self.getWinner(board)
+
+    def getWinner(self, board):
+        """Returns the color code of the winner of a finished position by area."""
+        black, white = scoreArea(board)
+        if black > white + self.komi:
+            return BLACK
+        return WHITE
+
+def backpropagate(node, winner):
+    """Adds the result of a playout to the node and its ancestors."""
+    while node is not None:
+        node.visits += 1
+        if node.color == winner:
+            node.wins += 1
+        node = node.parent
+
+def getTimeLimit(timeLimit, timeBudget):
+    """Returns the lowest of two time limits, None meaning no limit."""
+    if timeLimit is None:
+        return timeBudget
+    if timeBudget is None:
+        return timeLimit
+    return min(timeLimit, timeBudget)
+
+def isDecided(root, remainingPlayouts):
+    """Returns True if no other move could become the most visited child of the root
+    with the given number of playouts.
+    """
+    if not root.children:
+        return False
+    mostVisits = 0
+    secondVisits = 0
+    for child in root.children:
+        if child.visits > mostVisits:
+            secondVisits = mostVisits
+            mostVisits = child.visits
+        elif child.visits > secondVisits:
+            secondVisits = child.visits
+    return mostVisits - secondVisits > remainingPlayouts
+
+def getBestMove(root, board):
+    """Returns the move of the most visited child of a search tree root, as a row and
+    column pair or None for pass.
+    """
+    if not root.children:
+        return None
+    best = root.getBestChild()
+    if best.isPass():
+        return None
+    return board.toVertex(best.point)
@@ -0,0 +1,181 @@
+"""Opening book built from game records, stored in a hash table read through mmap.
+
+Positions are keyed by the smallest Zobrist hash of their 8 symmetric versions with
+the player to move, so the same opening played in any corner shares its entry. Moves
+are stored as seen from that canonical version of the position. Each entry keeps the
+most played move of its position, how many times it was played and how many of those
+games were won by the player who played it.
+"""
+
+import argparse
+import mmap
+import struct
+import sys
+
+from imago.data.enums import Player
+from imago.gameLogic.gameState import GameState
+from imago.sgfParser.sgf import readGames
+
+MAGIC = b"IMOB"
+VERSION = 1
+
+DEF_BOOK_MOVES = 20
+DEF_MIN_COUNT = 3
+
+# Magic, version, board size and number of slots of the table
+FILE_HEADER = struct.Struct("<4sHHI")
+# Position key, times played, games won and point of the move. Empty slots are the ones
+# played 0 times, as the empty board with black to move has key 0
+ENTRY = struct.Struct("<QIIH")
+
+def getCanonicalPoint(board, row, col, symmetries):
+    """Returns the point a move is stored as. On symmetric positions, where several
+    symmetries give the canonical version, the equivalent moves share the smallest one.
+    """
+    return min(newRow * board.size + newCol for newRow, newCol in
+            (board.toCanonicalVertex(row, col, symmetry) for symmetry in symmetries))
+
+def getWinner(result):
+    """Returns the player winning a game with the given SGF result, or None."""
+    if result is None:
+        return None
+    if result.startswith("B+"):
+        return Player.BLACK
+    if result.startswith("W+"):
+        return Player.WHITE
+    return None
+
+def addGame(stats, gameTree, maxMoves=DEF_BOOK_MOVES):
+    """Adds the first moves of a game to the statistics of the moves played on each
+    position, a dictionary of position keys to dictionaries of canonical points to
+    [played, won] lists. Stops at the first illegal move.
+    """
+    gameData = gameTree.gameData
+    size = gameData.size
+    winner = getWinner(gameData.result)
+    state = GameState(size)
+    state.addSetupStones(gameData.addedBlack, gameData.addedWhite)
+    for move in gameTree.getMainLine()[:maxMoves]:
+        if move.isPass() or not state.isLegalMove(move.row, move.col, move.player):
+            return
+        board = state.getBoard()
+        key, symmetries = board.getCanonicalSymmetries(move.player)
+        point = getCanonicalPoint(board, move.row, move.col, symmetries)
+        moveStats = stats.setdefault(key, {}).setdefault(point, [0, 0])
+        moveStats[0] += 1
+        if move.player == winner:
+            moveStats[1] += 1
+        state.playMoveForPlayer(move.row, move.col, move.player)
+
+def getSlotCount(entries):
+    """Returns the power of two number of slots keeping the table at most half full."""
+    slots = 1
+    while slots < 2 * entries:
+        slots *= 2
+    return slots
+
+def writeBook(stats, size, path, minCount=DEF_MIN_COUNT):
+    """Writes the most played move of each position played at least minCount times.
+    Returns the number of positions written.
+    """
+    entries = []
+    for key, moves in stats.items():
+        point, (played, won) = max(moves.items(),
+                key=lambda item: (item[1][0], item[1][1]))
+        if played >= max(minCount, 1):
+            entries.append((key, played, won, point))
+    slotCount = getSlotCount(len(entries))
+    table = bytearray(slotCount * ENTRY.size)
+    mask = slotCount - 1
+    for entry in entries:
+        slot = entry[0] & mask
+        while ENTRY.unpack_from(table, slot * ENTRY.size)[1] != 0:
+            slot = (slot + 1) & mask
+        ENTRY.pack_into(table, slot * ENTRY.size, *entry)
+    with open(path, "wb") as bookFile:
+        bookFile.write(FILE_HEADER.pack(MAGIC, VERSION, size, slotCount))
+        bookFile.write(table)
+    return len(entries)
+
+def buildBook(sources, outputPath, size, maxMoves=DEF_BOOK_MOVES,
+        minCount=DEF_MIN_COUNT):
+    """Builds a book from the games of the given size in SGF files. Returns the number
+    of games used and of positions written.
+    """
+    stats = {}
+    games = 0
+    for source in sources:
+        for gameTree in readGames(source):
+            if gameTree.gameData.size != size:
+                continue
+            addGame(stats, gameTree, maxMoves)
+            games += 1
+    return games, writeBook(stats, size, outputPath, minCount)
+
+class OpeningBook:
+    """Gives the book move of a position from a book file mapped in memory."""
+
+    def __init__(self, path):
+        self.file = open(path, "rb")
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.size, self.slotCount = FILE_HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise Exception("Not an opening book file of version %d" % VERSION)
+        self.mask = self.slotCount - 1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def getEntry(self, board, player):
+        """Returns the vertex of the book move of the player in the board, the times it
+        was played and the ratio of those games won, or None if the position is not in
+        the book.
+        """
+        if board.size != self.size:
+            return None
+        key, symmetry = board.getCanonicalHash(player)
+        slot = key & self.mask
+        while True:
+            slotKey, played, won, point = ENTRY.unpack_from(self.map,
+                    FILE_HEADER.size + slot * ENTRY.size)
+            if played == 0:
+                return None
+            if slotKey == key:
+                vertex = board.fromCanonicalVertex(point // self.size,
+                        point % self.size, symmetry)
+                return list(vertex), played, won / played
+            slot = (slot + 1) & self.mask
+
+    def getMove(self, board, player):
+        """Returns the vertex of the book move of the player in the board, or None."""
+        entry = self.getEntry(board, player)
+        if entry is None:
+            return None
+        return entry[0]
+
+    def close(self):
+        """Unmaps and closes the file."""
+        if self.file is None:
+            return
+        self.map.close()
+        self.file.close()
+        self.file = None
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build an opening book from SGF files.")
+    parser.add_argument("output", help="book file to write")
+    parser.add_argument("sources", nargs="+", help="SGF files to read")
+    parser.add_argument("--size", type=int, default=19,
+            help="size of the board of the games used")
+    parser.add_argument("--moves", type=int, default=DEF_BOOK_MOVES,
+            help="moves of each game added to the book")
+    parser.add_argument("--min-count", type=int, default=DEF_MIN_COUNT,
+            help="times a position must be played to be in the book")
+    args = parser.parse_args()
+    gameCount, positionCount = buildBook(args.sources, args.output, args.size,
+            args.moves, args.min_count)
+    print("%d games, %d positions" % (gameCount, positionCount), file=sys.stderr)
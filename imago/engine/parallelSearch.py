@@ -0,0 +1,146 @@
+"""Root parallel Monte Carlo Tree Search over a pool of processes."""
+
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from imago.engine.monteCarlo import MCTS, MCTSNode, getBestMove
+from imago.engine.transpositionTable import TranspositionTable
+from imago.gameLogic.gameBoard import BLACK, WHITE
+from imago.gameLogic.gameState import GameState
+
+# Transposition table of a worker process, kept between searches
+WORKER_TABLE = None
+WORKER_TABLE_KEY = None
+
+def getWorkerTable(tableSize, size, komi):
+    """Returns the transposition table of the worker process, which is emptied when the
+    board size or komi change. Returns None if the table size is 0.
+    """
+    global WORKER_TABLE, WORKER_TABLE_KEY
+    if tableSize == 0:
+        return None
+    if WORKER_TABLE is None:
+        WORKER_TABLE = TranspositionTable(tableSize)
+    if WORKER_TABLE_KEY != (size, komi):
+        WORKER_TABLE.clear()
+        WORKER_TABLE_KEY = (size, komi)
+    WORKER_TABLE.setSize(tableSize)
+    return WORKER_TABLE
+
+def runWorkerSearch(size, koRule, setupStones, moves, player, komi, playouts,
+        timeLimit, seed, timeBudget=None, tableSize=0):
+    """Searches the position reached by the given setup stones and moves in a worker
+    process.
+
+    Returns the points, visits and wins of the children of the root, the number of
+    playouts run and the time spent. The children of the root do not share their
+    statistics through the table, so they only count the playouts of this search.
+    """
+    gameState = GameState(size, koRule)
+    if setupStones[0] or setupStones[1]:
+        gameState.addSetupStones(*setupStones)
+    gameState.playMoveHistory(moves)
+    search = MCTS(komi, playouts, timeLimit, seed,
+            table=getWorkerTable(tableSize, size, komi))
+    root = search.searchRoot(gameState, player, timeBudget)
+    children = [(child.point, child.visits, child.wins) for child in root.children]
+    return children, search.playoutCount, search.searchTime
+
+class ParallelSearch:
+    """Runs an independent search in each worker process and merges the statistics of
+    their root moves into a single tree before choosing a move.
+
+    Playouts are split evenly between the workers, while each worker can use all the
+    time limit. Each worker keeps its own transposition table of the given megabytes.
+    """
+
+    def __init__(self, komi, playouts, timeLimit, workers, seed=None, pool=None,
+            tableSize=0):
+        self.komi = komi
+        self.tableSize = tableSize
+        self.maxPlayouts = playouts
+        self.timeLimit = timeLimit
+        self.workers = workers
+        self.seed = seed
+        self.searchCount = 0
+        self.pool = pool
+        self.ownsPool = pool is None
+        self.playoutCount = 0
+        self.searchTime = 0.0
+
+    def getPool(self):
+        """Returns the pool of worker processes, starting it if needed."""
+        if self.pool is None:
+            self.pool = ProcessPoolExecutor(max_workers=self.workers)
+        return self.pool
+
+    def shutdown(self):
+        """Stops the worker processes if they belong to this search."""
+        if self.pool is not None and self.ownsPool:
+            self.pool.shutdown()
+            self.pool = None
+
+    def getPlayoutRate(self):
+        """Returns the playouts per second of the last search."""
+        if self.searchTime == 0:
+            return 0.0
+        return self.playoutCount / self.searchTime
+
+    def getReusedVisits(self, root):
+        """Returns the visits of a previous search tree kept by searching from it, which
+        are those of the children of its root, the only ones merged.
+        """
+        return sum(child.visits for child in root.children)
+
+    def search(self, gameState, player, timeBudget=None):
+        """Returns the best move found for the player in the given state, as a row and
+        column pair or None for pass. The time budget in seconds, if given, further
+        limits the time limit of the search.
+        """
+        root = self.searchRoot(gameState, player, timeBudget)
+        return getBestMove(root, gameState.getBoard())
+
+    def searchRoot(self, gameState, player, timeBudget=None, root=None):
+        """Searches the given state in all the workers and returns a root whose children
+        hold the merged statistics. The statistics of the root moves of a previous search
+        of the same state are added to those of the workers.
+        """
+        startTime = time.perf_counter()
+        moves = gameState.getMoveHistory()
+        workerPlayouts = -(-self.maxPlayouts // self.workers)
+        futures = []
+        for worker in range(self.workers):
+            seed = None
+            if self.seed is not None:
+                seed = self.seed + self.searchCount * self.workers + worker
+            futures.append(self.getPool().submit(runWorkerSearch,
+                gameState.size, gameState.koRule, gameState.getSetupStones(), moves,
+                player, self.komi, workerPlayouts, self.timeLimit, seed, timeBudget,
+                self.tableSize))
+        self.searchCount += 1
+
+        previousRoot = root
+        root = MCTS(self.komi).getRoot(gameState, player)
+        mergedChildren = {}
+        if previousRoot is not None:
+            for previousChild in previousRoot.children:
+                child = MCTSNode(previousChild.point, previousChild.color, parent=root)
+                child.visits = previousChild.visits
+                child.wins = previousChild.wins
+                mergedChildren[child.point] = child
+                root.children.append(child)
+        self.playoutCount = 0
+        for future in futures:
+            children, playouts, _ = future.result()
+            self.playoutCount += playouts
+            for point, visits, wins in children:
+                child = mergedChildren.get(point)
+                if child is None:
+                    child = MCTSNode(point, BLACK + WHITE - root.color, parent=root)
+                    mergedChildren[point] = child
+                    root.children.append(child)
+                child.visits += visits
+                child.wins += wins
+        root.visits = sum(child.visits for child in root.children)
+        self.searchTime = time.perf_counter() - startTime
+        return root
@@ -1,6 +1,7 @@
 """Handles translation of input text to internal data and vice versa."""
 
 import re
+import sys
 from enum import Enum, auto as enumAuto
 
 from imago.data.enums import Player
@@ -23,7 +24,7 @@ class ParseCodes(Enum):
 def parseMove(args, boardsize):
     """Converts the textual input of a move to a move instance."""
     if len(args) != 2:
-        print("[ERROR] - Wrong n of args for move")
+        print("[ERROR] - Wrong n of args for move", file=sys.stderr)
         return ParseCodes.ERROR
     color = parseColor(args[0])
     vertex = parseVertex(args[1], boardsize)
@@ -36,17 +37,20 @@ def parseColor(text):
         return Player.WHITE
     if text in VALID_BLACK_STRINGS:
         return Player.BLACK
-    print("[ERROR] - Unknown color.")
+    print("[ERROR] - Unknown color.", file=sys.stderr)
     return ParseCodes.ERROR
 
 def parseVertex(text, boardSize):
     """Returns row and column of a vertex given its input string.
 
     GTP uses A1 style notation: columns are letters left to right, rows are number bottom
-    to top.
+    to top. A pass is returned as None.
     """
     text = text.upper()
 
+    if text == "PASS":
+        return None
+
     if not re.match("^[A-HJ-Z][1-9][0-9]*$", text):
         return ParseCodes.ERROR
 
@@ -68,8 +72,10 @@ def vertexToString(vertex, boardSize):
     """Returns a string representing the vertex.
 
     GTP uses A1 style notation: columns are letters left to right, rows are number bottom
-    to top.
+    to top. None is a pass.
     """
+    if vertex is None:
+        return "pass"
     if len(vertex) != 2:
         return ParseCodes.ERROR
     if vertex[0] >= boardSize or vertex[1] >= boardSize or vertex[0] < 0 or vertex[1] < 0:
@@ -0,0 +1,85 @@
+"""Games of the engine against itself, played in parallel by a pool of processes."""
+
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from imago.data.enums import Player
+from imago.engine.core import GameEngine
+from imago.gameLogic.gameData import GameData
+from imago.gameLogic.gameTree import GameTree
+from imago.sgfParser.sgf import gameTreeToSgf
+
+ENGINE_NAME = "Imago"
+
+# Games are stopped after this many moves per cell of the board
+MAX_MOVES_PER_CELL = 3
+
+def playGame(size, komi, playouts, seed=None):
+    """Plays a game between two engines, one for each color, and returns its result,
+    number of moves and seconds spent and its SGF text.
+    """
+    startTime = time.perf_counter()
+    engines = {}
+    for offset, player in enumerate((Player.BLACK, Player.WHITE)):
+        engineSeed = None if seed is None else seed + offset
+        engine = GameEngine(playouts, None, engineSeed)
+        engine.setBoardsize(size)
+        engine.setKomi(komi)
+        engines[player] = engine
+
+    player = Player.BLACK
+    moves = 0
+    gameState = engines[player].gameState
+    while not gameState.isFinished() and moves < MAX_MOVES_PER_CELL * size * size:
+        vertex = engines[player].genmove(player)
+        engines[Player.otherPlayer(player)].play(player, vertex)
+        moves += 1
+        player = Player.otherPlayer(player)
+
+    result = engines[Player.BLACK].getFinalScore()
+    gameData = GameData(size=size, komi=komi, blackName=ENGINE_NAME,
+            whiteName=ENGINE_NAME, result=result)
+    sgf = gameTreeToSgf(GameTree(gameState.gameTree.firstMoves, gameData))
+    return result, moves, time.perf_counter() - startTime, sgf
+
+def runSelfPlay(games, size, komi, playouts, workers=None, seed=None,
+        resultsPath=None, recordsPath=None, onGame=None):
+    """Plays the given number of games on a pool of worker processes, all the cores by
+    default. As each game finishes its result is appended as a JSON line to the results
+    file and its record to the SGF records file, if given, and onGame, if given, is
+    called with the number of games and moves finished and the seconds elapsed.
+    Returns the games and moves played and the seconds spent.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    startTime = time.perf_counter()
+    finishedGames = 0
+    totalMoves = 0
+    resultsFile = None if resultsPath is None else open(resultsPath, "a")
+    recordsFile = None if recordsPath is None else open(recordsPath, "a")
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {}
+            for game in range(games):
+                gameSeed = None if seed is None else seed + 2 * game
+                futures[pool.submit(playGame, size, komi, playouts, gameSeed)] = game
+            for future in as_completed(futures):
+                result, moves, seconds, sgf = future.result()
+                finishedGames += 1
+                totalMoves += moves
+                if resultsFile is not None:
+                    resultsFile.write(json.dumps({"game": futures[future],
+                        "result": result, "moves": moves, "seconds": seconds}) + "\n")
+                    resultsFile.flush()
+                if recordsFile is not None:
+                    recordsFile.write(sgf)
+                    recordsFile.flush()
+                if onGame is not None:
+                    onGame(finishedGames, totalMoves, time.perf_counter() - startTime)
+    finally:
+        for openFile in (resultsFile, recordsFile):
+            if openFile is not None:
+                openFile.close()
+    return finishedGames, totalMoves, time.perf_counter() - startTime
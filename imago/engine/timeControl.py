@@ -0,0 +1,103 @@
+"""Clock of a game and allocation of thinking time to each move."""
+
+from imago.data.enums import Player
+
+# Moves a player is expected to still make when the game is well advanced
+MIN_MOVES_LEFT = 20
+# Expected length of a game, in moves of both players per cell of the board
+GAME_LENGTH_PER_CELL = 0.7
+# Seconds kept aside each move for communication delays
+SAFETY_MARGIN = 0.2
+# Ratio of each byo-yomi period which is spent thinking
+BYO_YOMI_USAGE = 0.8
+
+class TimeControl:
+    """Canadian byo-yomi clock as described by the GTP time_settings command.
+
+    Main time is used first. Then each period of byo-yomi time has to be enough for a
+    number of stones. Byo-yomi time with no stones means there are no time limits. A
+    player running out of time loses on time and is given no more thinking time.
+    """
+
+    def __init__(self):
+        self.mainTime = 0
+        self.byoYomiTime = 0
+        self.byoYomiStones = 0
+        self.timeLeft = {}
+        self.stonesLeft = {}
+        self.lostOnTime = {}
+        self.setTimeSettings(0, 1, 0)
+
+    def setTimeSettings(self, mainTime, byoYomiTime, byoYomiStones):
+        """Sets the clock of both players."""
+        self.mainTime = mainTime
+        self.byoYomiTime = byoYomiTime
+        self.byoYomiStones = byoYomiStones
+        for player in (Player.BLACK, Player.WHITE):
+            self.timeLeft[player] = mainTime
+            self.stonesLeft[player] = 0
+            self.lostOnTime[player] = False
+
+    def setTimeLeft(self, player, timeLeft, stonesLeft):
+        """Sets the time left for a player. Stones are 0 while in main time."""
+        self.timeLeft[player] = timeLeft
+        self.stonesLeft[player] = stonesLeft
+        self.lostOnTime[player] = False
+
+    def hasLostOnTime(self, player):
+        """Returns True if the player ran out of time on a move."""
+        return self.lostOnTime[player]
+
+    def isLimited(self):
+        """Returns False if there are no time limits."""
+        return not (self.byoYomiStones == 0 and self.byoYomiTime > 0)
+
+    def getMoveBudget(self, player, boardSize, moveNumber):
+        """Returns the seconds the player should think its next move, or None if there
+        are no time limits.
+        """
+        if not self.isLimited():
+            return None
+        if self.lostOnTime[player]:
+            return 0.0
+
+        timeLeft = self.timeLeft[player]
+        stonesLeft = self.stonesLeft[player]
+
+        if stonesLeft > 0:
+            # In byo-yomi, the time left has to last for the stones left
+            budget = timeLeft / stonesLeft * BYO_YOMI_USAGE
+        else:
+            expectedLength = GAME_LENGTH_PER_CELL * boardSize * boardSize
+            movesLeft = max(MIN_MOVES_LEFT, (expectedLength - moveNumber) / 2)
+            budget = timeLeft / movesLeft
+            if self.byoYomiStones > 0:
+                # Byo-yomi will be there when main time runs out
+                budget += self.byoYomiTime / self.byoYomiStones * BYO_YOMI_USAGE
+                if timeLeft <= 0:
+                    budget = self.byoYomiTime / self.byoYomiStones * BYO_YOMI_USAGE
+
+        return max(0.0, budget - SAFETY_MARGIN)
+
+    def registerMoveTime(self, player, seconds):
+        """Updates the clock of a player after spending some seconds on a move."""
+        if not self.isLimited():
+            return
+        timeLeft = self.timeLeft[player] - seconds
+        stonesLeft = self.stonesLeft[player]
+        if stonesLeft == 0 and timeLeft < 0 and self.byoYomiStones > 0:
+            # Main time ran out during the move, so byo-yomi started then and its first
+            # period is charged with the rest of the move and its stone
+            timeLeft += self.byoYomiTime
+            stonesLeft = self.byoYomiStones
+        if timeLeft < 0:
+            self.lostOnTime[player] = True
+            timeLeft = 0
+        if stonesLeft > 0:
+            stonesLeft -= 1
+            if stonesLeft == 0:
+                # New byo-yomi period
+                timeLeft = self.byoYomiTime
+                stonesLeft = self.byoYomiStones
+        self.timeLeft[player] = timeLeft
+        self.stonesLeft[player] = stonesLeft
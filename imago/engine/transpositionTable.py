@@ -0,0 +1,62 @@
+"""Search statistics shared between transpositions of the same position."""
+
+from collections import OrderedDict
+
+DEF_TABLE_SIZE = 64 # Megabytes
+
+# Measured memory used by each entry of the table, in bytes
+ENTRY_BYTES = 192
+
+class NodeStats:
+    """Visits and wins of the playouts through a position."""
+
+    __slots__ = ("visits", "wins")
+
+    def __init__(self):
+        self.visits = 0
+        self.wins = 0.0
+
+class TranspositionTable:
+    """Statistics of the positions found while searching, keyed by their Zobrist hash
+    with the player to move.
+
+    The table holds as many entries as fit in the given megabytes. When it is full the
+    least recently used entry is evicted. Search nodes keep their statistics after
+    eviction, they just stop being shared.
+    """
+
+    def __init__(self, sizeMb=DEF_TABLE_SIZE):
+        self.entries = OrderedDict()
+        self.capacity = 0
+        self.hits = 0
+        self.misses = 0
+        self.setSize(sizeMb)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def setSize(self, sizeMb):
+        """Changes the megabytes of the table, evicting entries if needed."""
+        self.capacity = max(1, int(sizeMb * 2**20) // ENTRY_BYTES)
+        while len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+
+    def getStats(self, key):
+        """Returns the statistics of a position, creating them if it is not stored."""
+        stats = self.entries.get(key)
+        if stats is None:
+            self.misses += 1
+            stats = NodeStats()
+            self.entries[key] = stats
+            if len(self.entries) > self.capacity:
+                self.entries.popitem(last=False)
+        else:
+            self.hits += 1
+            self.entries.move_to_end(key)
+        return stats
+
+    def clear(self):
+        """Removes all the entries."""
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
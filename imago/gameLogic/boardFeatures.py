@@ -0,0 +1,181 @@
+"""Batched features and evaluation of boards with NumPy.
+
+NumPy is optional: this module can be imported without it, but its functions raise
+ImportError when called. Positions are handled as (N, size, size) arrays with the color
+code of each cell, so whole batches are processed by shifting arrays instead of walking
+the cells of each board.
+"""
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from imago.gameLogic.gameBoard import EMPTY, BLACK, WHITE, BORDER
+
+# Planes of the feature arrays
+BLACK_STONES = 0
+WHITE_STONES = 1
+LIBERTIES_1 = 2
+LIBERTIES_2 = 3
+LIBERTIES_3_OR_MORE = 4
+KO_POINT = 5
+LAST_MOVE = 6
+SECOND_LAST_MOVE = 7
+N_PLANES = 8
+
+# Steps a stone spreads its influence and the fraction given to each neighbour per step
+INFLUENCE_STEPS = 4
+INFLUENCE_DECAY = 0.2
+
+NEIGHBOUR_OFFSETS = ((-1, 0), (1, 0), (0, -1), (0, 1))
+
+def checkNumpy():
+    """Raises ImportError if NumPy is not installed."""
+    if np is None:
+        raise ImportError("NumPy is needed for batched board features")
+
+def getStoneArrays(boards):
+    """Returns an (N, size, size) array with the color codes of the cells of the given
+    boards, which must all be of the same size.
+    """
+    checkNumpy()
+    size = boards[0].size
+    stride = size + 2
+    stones = np.empty((len(boards), size, size), dtype=np.int8)
+    for index, board in enumerate(boards):
+        cells = np.frombuffer(bytes(board.cells), dtype=np.uint8)
+        stones[index] = cells.reshape(stride, stride)[1:-1, 1:-1]
+    return stones
+
+def getShifted(array, rowOffset, colOffset, fill):
+    """Returns an array where each cell holds the value of the cell at the given offset
+    in the last two dimensions of the given one, or fill if that cell is out of the board.
+    """
+    size = array.shape[-1]
+    shifted = np.full_like(array, fill)
+    targetRows = slice(max(0, -rowOffset), size - max(0, rowOffset))
+    targetCols = slice(max(0, -colOffset), size - max(0, colOffset))
+    sourceRows = slice(max(0, rowOffset), size - max(0, -rowOffset))
+    sourceCols = slice(max(0, colOffset), size - max(0, -colOffset))
+    shifted[..., targetRows, targetCols] = array[..., sourceRows, sourceCols]
+    return shifted
+
+def getNeighbourSum(array):
+    """Returns the sum of the four neighbours of each cell."""
+    total = np.zeros_like(array)
+    for rowOffset, colOffset in NEIGHBOUR_OFFSETS:
+        total += getShifted(array, rowOffset, colOffset, 0)
+    return total
+
+def getNeighbourMask(mask):
+    """Returns True for the cells with at least one neighbour set in the given mask."""
+    grown = np.zeros_like(mask)
+    for rowOffset, colOffset in NEIGHBOUR_OFFSETS:
+        grown |= getShifted(mask, rowOffset, colOffset, False)
+    return grown
+
+def getGroupLabels(stones):
+    """Returns an array with a label for the group of each stone, -1 for empty cells.
+    The label of a group is the lowest flat index of its stones in the batch.
+    """
+    checkNumpy()
+    occupied = stones != EMPTY
+    sentinel = stones.size
+    indices = np.arange(stones.size).reshape(stones.shape)
+    labels = np.where(occupied, indices, sentinel)
+    sameColor = [occupied & (getShifted(stones, rowOffset, colOffset, BORDER) == stones)
+            for rowOffset, colOffset in NEIGHBOUR_OFFSETS]
+    while True:
+        newLabels = labels
+        for (rowOffset, colOffset), same in zip(NEIGHBOUR_OFFSETS, sameColor):
+            neighbourLabels = getShifted(newLabels, rowOffset, colOffset, sentinel)
+            newLabels = np.where(same, np.minimum(newLabels, neighbourLabels), newLabels)
+        # Each label is a stone of the same group, so its own label can be taken
+        newLabels = np.where(occupied,
+                newLabels.ravel()[np.minimum(newLabels, sentinel - 1)], sentinel)
+        if np.array_equal(newLabels, labels):
+            break
+        labels = newLabels
+    return np.where(occupied, labels, -1)
+
+def getLibertyCounts(stones, labels=None):
+    """Returns an array with the number of liberties of the group of each stone, 0 for
+    empty cells. Group labels are computed if not given.
+    """
+    checkNumpy()
+    if labels is None:
+        labels = getGroupLabels(stones)
+    empty = stones == EMPTY
+    indices = np.arange(stones.size).reshape(stones.shape)
+    groups = []
+    liberties = []
+    for rowOffset, colOffset in NEIGHBOUR_OFFSETS:
+        neighbourLabels = getShifted(labels, rowOffset, colOffset, -1)
+        # Empty cells next to a group are its liberties
+        adjacent = empty & (neighbourLabels >= 0)
+        groups.append(neighbourLabels[adjacent])
+        liberties.append(indices[adjacent])
+    pairs = np.unique(np.concatenate(groups).astype(np.int64) * stones.size
+            + np.concatenate(liberties))
+    counts = np.bincount(pairs // stones.size, minlength=stones.size)
+    return np.where(labels >= 0, counts[labels], 0)
+
+def getFeatures(gameStates):
+    """Returns an (N, N_PLANES, size, size) float32 array with the feature planes of the
+    positions of the given game states, which must all be of the same size.
+    """
+    checkNumpy()
+    stones = getStoneArrays([state.getBoard() for state in gameStates])
+    liberties = getLibertyCounts(stones)
+    features = np.zeros((stones.shape[0], N_PLANES) + stones.shape[1:],
+            dtype=np.float32)
+    features[:, BLACK_STONES] = stones == BLACK
+    features[:, WHITE_STONES] = stones == WHITE
+    features[:, LIBERTIES_1] = liberties == 1
+    features[:, LIBERTIES_2] = liberties == 2
+    features[:, LIBERTIES_3_OR_MORE] = liberties >= 3
+    for index, state in enumerate(gameStates):
+        koPoint = state.getKoPoint()
+        if koPoint is not None:
+            features[index, KO_POINT, koPoint[0], koPoint[1]] = 1
+        move = state.lastMove
+        for plane in (LAST_MOVE, SECOND_LAST_MOVE):
+            if move is None:
+                break
+            if not move.isPass():
+                features[index, plane, move.row, move.col] = 1
+            move = move.previousMove
+    return features
+
+def getAreaScores(stones):
+    """Returns an (N, 2) array with the points of black and white by Tromp-Taylor area
+    scoring: their stones and the empty cells from which only their stones are reached.
+    """
+    checkNumpy()
+    empty = stones == EMPTY
+    reached = []
+    for color in (BLACK, WHITE):
+        colorReached = stones == color
+        while True:
+            grown = colorReached | (empty & getNeighbourMask(colorReached))
+            if np.array_equal(grown, colorReached):
+                break
+            colorReached = grown
+        reached.append(colorReached)
+    blackArea = (stones == BLACK) | (empty & reached[0] & ~reached[1])
+    whiteArea = (stones == WHITE) | (empty & reached[1] & ~reached[0])
+    return np.stack((blackArea.sum(axis=(1, 2)), whiteArea.sum(axis=(1, 2))), axis=1)
+
+def getInfluence(stones, steps=INFLUENCE_STEPS, decay=INFLUENCE_DECAY):
+    """Returns a float32 array with the influence on each cell, positive for black and
+    negative for white. Each step every cell gives a fraction of its value to each of its
+    neighbours.
+    """
+    checkNumpy()
+    field = (stones == BLACK).astype(np.float32) - (stones == WHITE)
+    influence = field.copy()
+    for _ in range(steps):
+        field = decay * getNeighbourSum(field)
+        influence += field
+    return influence
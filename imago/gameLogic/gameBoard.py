@@ -1,172 +1,504 @@
 """Representation of a board. Contains played stones and captured stones."""
 
-from copy import deepcopy
-
+from imago import instrumentation
 from imago.data.enums import Player
+from imago.gameLogic.symmetry import SYMMETRIES, getSymmetricZobristTable, \
+        inverseTransformVertex, transformVertex, unpackHashes
+from imago.gameLogic.zobrist import SIDE_TO_MOVE_KEY, getZobristTable
+
+# Codes of the cells of a board
+EMPTY = 0
+BLACK = 1
+WHITE = 2
+BORDER = 3
+
+PLAYER_CODES = {
+    Player.EMPTY: EMPTY,
+    Player.BLACK: BLACK,
+    Player.WHITE: WHITE
+}
+
+CODE_PLAYERS = (Player.EMPTY, Player.BLACK, Player.WHITE, None)
+
+NEIGHBOUR_TABLES = {}
 
 def getNewBoard(size):
-    """Return a new board."""
-    board = []
+    """Return a new board: a flat array of cells surrounded by a border of sentinel
+    cells, so the neighbours of any cell can be read without bounds checking.
+    """
+    stride = size + 2
+    cells = bytearray([BORDER]) * (stride * stride)
     for row in range(size):
-        board.append([])
-        for _ in range(size):
-            board[row].append(Player.EMPTY)
-    return board
+        start = (row+1) * stride + 1
+        cells[start:start+size] = bytes(size)
+    return cells
+
+def getNeighbourTable(size):
+    """Returns a table with the tuple of adjacent points of each point of a board of the
+    given size. Tables are shared between boards of the same size.
+    """
+    if size not in NEIGHBOUR_TABLES:
+        stride = size + 2
+        cells = getNewBoard(size)
+        # Up, right, down, left
+        offsets = (-stride, 1, stride, -1)
+        table = []
+        for point in range(stride * stride):
+            if cells[point] == BORDER:
+                table.append(())
+                continue
+            table.append(tuple(point + offset for offset in offsets
+                if cells[point + offset] != BORDER))
+        NEIGHBOUR_TABLES[size] = table
+    return NEIGHBOUR_TABLES[size]
+
+class Group:
+    """A chain of connected stones of the same color and its liberties."""
+
+    def __init__(self, color):
+        self.color = color
+        self.stones = set()
+        self.liberties = set()
+
+    def getCopy(self):
+        """Returns a copy of the group."""
+        newGroup = Group(self.color)
+        newGroup.stones = set(self.stones)
+        newGroup.liberties = set(self.liberties)
+        return newGroup
+
+class BoardRow:
+    """Read only view of a row of a board as Player values."""
+
+    def __init__(self, cells, start, size):
+        self.cells = cells
+        self.start = start
+        self.size = size
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, col):
+        if isinstance(col, slice):
+            return [self[index] for index in range(*col.indices(self.size))]
+        if col < 0:
+            col += self.size
+        if col < 0 or col >= self.size:
+            raise IndexError("board column out of range")
+        return CODE_PLAYERS[self.cells[self.start + col]]
+
+    def __iter__(self):
+        for point in range(self.start, self.start + self.size):
+            yield CODE_PLAYERS[self.cells[point]]
+
+class BoardView:
+    """Read only view of the cells of a board accessed as board[row][col]."""
+
+    def __init__(self, cells, size):
+        self.cells = cells
+        self.size = size
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, row):
+        if row < 0:
+            row += self.size
+        if row < 0 or row >= self.size:
+            raise IndexError("board row out of range")
+        return BoardRow(self.cells, (row+1) * (self.size+2) + 1, self.size)
+
+    def __iter__(self):
+        for row in range(self.size):
+            yield self[row]
 
 class GameBoard:
+    """Stones on the board and the groups they form.
+
+    Cells are stored in a flat array with a border around the board and are addressed
+    by points, being point = (row+1) * (size+2) + (col+1). Groups are kept up to date as
+    stones are placed and captured, so the liberties of a group are known without
+    exploring the board. The same goes for the Zobrist hash of the position and for the
+    hashes of its 8 symmetric versions, which give the canonical form of the position.
+    """
 
     def __init__(self, size):
-        self.board = getNewBoard(size)
+        self.size = size
+        self.stride = size + 2
+        self.cells = getNewBoard(size)
+        self.groups = [None] * len(self.cells)
+        self.neighbours = getNeighbourTable(size)
+        self.zobrist = getZobristTable(size)
+        self.hash = 0
+        self.symmetricZobrist = getSymmetricZobristTable(size)
+        self.symmetricHashes = 0
         self.capturesBlack = 0
         self.capturesWhite = 0
         self.lastStone = None
 
+    @property
+    def board(self):
+        """The cells of the board as Player values, accessed as board[row][col]."""
+        return BoardView(self.cells, self.size)
+
+    def toPoint(self, row, col):
+        """Returns the point of a cell given its row and column."""
+        return (row+1) * self.stride + col + 1
+
+    def toVertex(self, point):
+        """Returns the row and column of a point."""
+        return (point // self.stride - 1, point % self.stride - 1)
+
+    def getPlayer(self, row, col):
+        """Returns the player occupying a cell or Player.EMPTY."""
+        return CODE_PLAYERS[self.cells[(row+1) * self.stride + col + 1]]
+
     def getDeepCopy(self):
         """Returns a copy GameBoard."""
-        newBoard = GameBoard(len(self.board))
+        if instrumentation.enabled:
+            instrumentation.count("boardCopies")
+        newBoard = GameBoard.__new__(GameBoard)
+        newBoard.size = self.size
+        newBoard.stride = self.stride
+        newBoard.cells = self.cells[:]
+        newBoard.neighbours = self.neighbours
+        newBoard.zobrist = self.zobrist
+        newBoard.hash = self.hash
+        newBoard.symmetricZobrist = self.symmetricZobrist
+        newBoard.symmetricHashes = self.symmetricHashes
         newBoard.capturesBlack = self.capturesBlack
         newBoard.capturesWhite = self.capturesWhite
         newBoard.lastStone = self.lastStone
-        newBoard.board = deepcopy(self.board)
+        newGroups = self.groups[:]
+        copiedGroups = {}
+        for point, group in enumerate(newGroups):
+            if group is None:
+                continue
+            newGroup = copiedGroups.get(group)
+            if newGroup is None:
+                newGroup = group.getCopy()
+                copiedGroups[group] = newGroup
+            newGroups[point] = newGroup
+        newBoard.groups = newGroups
         return newBoard
 
-    def getGroupLiberties(self, row, col):
-        """Returns the empty vertexes adjacent to the group occupying a cell (its
-        liberties) or -1 if the cell is empty.
+    def getHash(self, player=None):
+        """Returns the Zobrist hash of the position. If the player to move is given it is
+        also taken into account.
         """
-        groupColor = self.board[row][col]
-        if groupColor == Player.EMPTY:
-            return -1
-        emptyCells = set()
-        exploredCells = set()
-        self.__exploreLiberties(row, col, groupColor, emptyCells, exploredCells)
-        return emptyCells
+        if player == Player.WHITE:
+            return self.hash ^ SIDE_TO_MOVE_KEY
+        return self.hash
+
+    def getSymmetricHashes(self):
+        """Returns the Zobrist hashes of the 8 symmetric versions of the position, the
+        first one being the hash of the position itself.
+        """
+        return unpackHashes(self.symmetricHashes)
 
-    def __exploreLiberties(self, row, col, groupColor, emptyCells, exploredCells):
-        """Adds surrounding empty cells to array if they have not been added yet
-            and explores adjacent occupied cells of the same group.
+    def getCanonicalHash(self, player=None):
+        """Returns the smallest hash of the symmetric versions of the position and the
+        symmetry moving the position to that canonical version. If the player to move is
+        given it is also taken into account.
         """
-        if (row, col) in exploredCells:
-            return
+        hashes = unpackHashes(self.symmetricHashes)
+        canonicalHash = min(hashes)
+        symmetry = hashes.index(canonicalHash)
+        if player == Player.WHITE:
+            canonicalHash ^= SIDE_TO_MOVE_KEY
+        return canonicalHash, symmetry
 
-        exploredCells.add((row, col))
+    def getCanonicalSymmetries(self, player=None):
+        """Returns the canonical hash of the position like getCanonicalHash and all the
+        symmetries giving it, more than one if the position is symmetric itself.
+        """
+        hashes = unpackHashes(self.symmetricHashes)
+        canonicalHash = min(hashes)
+        symmetries = [symmetry for symmetry in range(SYMMETRIES)
+                if hashes[symmetry] == canonicalHash]
+        if player == Player.WHITE:
+            canonicalHash ^= SIDE_TO_MOVE_KEY
+        return canonicalHash, symmetries
 
-        cellColor = self.board[row][col]
+    def toCanonicalVertex(self, row, col, symmetry):
+        """Returns the vertex of the canonical version of the position a vertex is moved
+        to by the symmetry given by getCanonicalHash.
+        """
+        return transformVertex(row, col, self.size, symmetry)
 
-        if cellColor != groupColor:
-            if cellColor == Player.EMPTY:
-                emptyCells.add((row, col))
-            return
+    def fromCanonicalVertex(self, row, col, symmetry):
+        """Returns the vertex of the position a vertex of its canonical version comes
+        from, being symmetry the one given by getCanonicalHash.
+        """
+        return inverseTransformVertex(row, col, self.size, symmetry)
 
-        # Up
-        if row > 0:
-            self.__exploreLiberties(row-1, col, groupColor, emptyCells, exploredCells)
+    def getHashAfterMove(self, row, col, player):
+        """Returns the Zobrist hash the position would have after the player places a
+        stone in an empty cell, without placing it.
+        """
+        return self.getHashAfterMoveAtPoint(self.toPoint(row, col), PLAYER_CODES[player])
 
-        # Right
-        if col < len(self.board[0])-1:
-            self.__exploreLiberties(row, col+1, groupColor, emptyCells, exploredCells)
+    def getHashAfterMoveAtPoint(self, point, color):
+        """Returns the Zobrist hash the position would have after placing a stone of the
+        given color code in an empty point, without placing it.
+        """
+        enemyKeys = self.zobrist[BLACK + WHITE - color]
+        newHash = self.hash ^ self.zobrist[color][point]
+        capturedGroups = []
+        for neighbour in self.neighbours[point]:
+            group = self.groups[neighbour]
+            if (group is not None and group.color != color
+                and len(group.liberties) == 1 and group not in capturedGroups):
+                capturedGroups.append(group)
+                for stone in group.stones:
+                    newHash ^= enemyKeys[stone]
+        return newHash
 
-        # Down
-        if row < len(self.board)-1:
-            self.__exploreLiberties(row+1, col, groupColor, emptyCells, exploredCells)
+    def getGroupLiberties(self, row, col):
+        """Returns the empty vertexes adjacent to the group occupying a cell (its
+        liberties) or -1 if the cell is empty.
+        """
+        group = self.groups[self.toPoint(row, col)]
+        if group is None:
+            return -1
+        return {self.toVertex(point) for point in group.liberties}
 
-        # Left
-        if col > 0:
-            self.__exploreLiberties(row, col-1, groupColor, emptyCells, exploredCells)
+    def getGroupLibertyCount(self, row, col):
+        """Returns the number of liberties of the group occupying a cell or -1 if the cell
+        is empty.
+        """
+        group = self.groups[self.toPoint(row, col)]
+        if group is None:
+            return -1
+        return len(group.liberties)
 
     def getGroupCells(self, row, col):
         """Returns a set containing the cells occupied by the group in the given cell."""
-        groupColor = self.board[row][col]
-        if groupColor == Player.EMPTY:
+        group = self.groups[self.toPoint(row, col)]
+        if group is None:
             return 0
-        cells = set()
-        self.__exploreGroup(row, col, groupColor, cells)
-        return cells
+        return {self.toVertex(point) for point in group.stones}
 
-    def __exploreGroup(self, row, col, groupColor, cells):
-        if self.board[row][col] != groupColor or (row, col) in cells:
-            return
-        cells.add((row, col))
+    def getGroupSize(self, row, col):
+        """Returns the number of stones of the group occupying a cell or 0 if the cell is
+        empty.
+        """
+        group = self.groups[self.toPoint(row, col)]
+        if group is None:
+            return 0
+        return len(group.stones)
 
-        # Up
-        if row > 0:
-            self.__exploreGroup(row-1, col, groupColor, cells)
+    def isInAtari(self, row, col):
+        """Returns True if the group occupying a cell has only one liberty."""
+        return self.getGroupLibertyCount(row, col) == 1
+
+    def isSuicide(self, row, col, player):
+        """Returns True if placing a stone of the player in an empty cell would leave its
+        group without liberties and capture nothing.
+        """
+        return self.isSuicideAtPoint(self.toPoint(row, col), PLAYER_CODES[player])
 
-        # Right
-        if col < len(self.board[0])-1:
-            self.__exploreGroup(row, col+1, groupColor, cells)
+    def isSuicideAtPoint(self, point, color):
+        """Returns True if placing a stone of the given color code in an empty point would
+        leave its group without liberties and capture nothing.
+        """
+        groups = self.groups
+        for neighbour in self.neighbours[point]:
+            group = groups[neighbour]
+            if group is None:
+                return False
+            if group.color == color:
+                if len(group.liberties) > 1:
+                    return False
+            elif len(group.liberties) == 1:
+                return False
+        return True
 
-        # Down
-        if row < len(self.board)-1:
-            self.__exploreGroup(row+1, col, groupColor, cells)
+    def placeStone(self, row, col, player):
+        """Places a stone of the player in an empty cell, removes the groups it captures
+        and returns the list of captured cells.
+        """
+        captured = self.placeStoneAtPoint(self.toPoint(row, col), PLAYER_CODES[player])
+        self.lastStone = (row, col)
+        return [self.toVertex(point) for point in captured]
 
-        # Left
-        if col > 0:
-            self.__exploreGroup(row, col-1, groupColor, cells)
+    def placeStoneAtPoint(self, point, color):
+        """Places a stone of the given color code in an empty point, removes the groups
+        it captures and returns the list of captured points.
+        """
+        groups = self.groups
+        self.cells[point] = color
+        self.hash ^= self.zobrist[color][point]
+        self.symmetricHashes ^= self.symmetricZobrist[color][point]
 
+        newGroup = Group(color)
+        newGroup.stones.add(point)
+        friendGroups = [newGroup]
+        enemyGroups = []
+
+        for neighbour in self.neighbours[point]:
+            group = groups[neighbour]
+            if group is None:
+                newGroup.liberties.add(neighbour)
+            elif group.color == color:
+                if group not in friendGroups:
+                    friendGroups.append(group)
+            elif group not in enemyGroups:
+                enemyGroups.append(group)
+
+        # Merge into the biggest group so fewer cells have to be relabeled
+        mainGroup = newGroup
+        if len(friendGroups) > 1:
+            mainGroup = max(friendGroups, key=lambda group: len(group.stones))
+            for group in friendGroups:
+                if group is mainGroup:
+                    continue
+                for stone in group.stones:
+                    groups[stone] = mainGroup
+                mainGroup.stones |= group.stones
+                mainGroup.liberties |= group.liberties
+            mainGroup.liberties.discard(point)
+        groups[point] = mainGroup
+
+        captured = []
+        for group in enemyGroups:
+            group.liberties.discard(point)
+            if not group.liberties:
+                captured.extend(self.removeGroup(group))
+
+        if color == BLACK:
+            self.capturesBlack += len(captured)
+        else:
+            self.capturesWhite += len(captured)
 
-    def moveCapture(self, row, col, player):
-        """Checks surrounding captures of a move, removes them and returns the number of
-        stones captured.
-        """
-        captured = 0
-        if row > 0:
-            if (self.board[row-1][col] != player
-                and self.board[row-1][col] != Player.EMPTY
-                and len(self.getGroupLiberties(row-1, col)) == 0):
-                captured += self.captureGroup(row-1, col)
-        if row < len(self.board)-1:
-            if (self.board[row+1][col] != player
-                and self.board[row+1][col] != Player.EMPTY
-                and len(self.getGroupLiberties(row+1, col)) == 0):
-                captured += self.captureGroup(row+1, col)
-        if col > 0:
-            if (self.board[row][col-1] != player
-                and self.board[row][col-1] != Player.EMPTY
-                and len(self.getGroupLiberties(row, col-1)) == 0):
-                captured += self.captureGroup(row, col-1)
-        if col < len(self.board[0])-1:
-            if (self.board[row][col+1] != player
-                and self.board[row][col+1] != Player.EMPTY
-                and len(self.getGroupLiberties(row, col+1)) == 0):
-                captured += self.captureGroup(row, col+1)
         return captured
 
     def captureGroup(self, row, col):
         """Removes all the stones from the group occupying the given cell and returns the
         number of removed stones.
         """
-        cellsToCapture = self.getGroupCells(row, col)
-        count = 0
-        for cell in cellsToCapture:
-            self.board[cell[0]][cell[1]] = Player.EMPTY
-            count += 1
-        return count
+        group = self.groups[self.toPoint(row, col)]
+        if group is None:
+            return 0
+        return len(self.removeGroup(group))
+
+    def removeGroup(self, group):
+        """Removes the stones of a group from the board, giving their cells back as
+        liberties to adjacent groups. Returns the list of removed points.
+        """
+        cells = self.cells
+        groups = self.groups
+        keys = self.zobrist[group.color]
+        symmetricKeys = self.symmetricZobrist[group.color]
+        removed = list(group.stones)
+        for stone in removed:
+            cells[stone] = EMPTY
+            groups[stone] = None
+            self.hash ^= keys[stone]
+            self.symmetricHashes ^= symmetricKeys[stone]
+        if instrumentation.enabled:
+            instrumentation.count("capturedStones", len(removed))
+        for stone in removed:
+            for neighbour in self.neighbours[stone]:
+                adjacentGroup = groups[neighbour]
+                if adjacentGroup is not None:
+                    adjacentGroup.liberties.add(stone)
+        return removed
+
+    def moveCapture(self, row, col, player):
+        """Places a stone of the player in an empty cell, removes the groups it captures
+        and returns the number of stones captured. Kept for callers of the board before
+        placeStone, which returns the captured cells instead.
+        """
+        return len(self.placeStone(row, col, player))
+
+    def revertStone(self, row, col, captured, previousStone=None):
+        """Removes the stone placed in a cell and puts back the stones it captured,
+        leaving the board as it was before the stone was placed. The last stone becomes
+        previousStone, the cell of the stone placed before this one or None.
+        """
+        self.lastStone = previousStone
+        point = self.toPoint(row, col)
+        capturedPoints = [self.toPoint(cell[0], cell[1]) for cell in captured]
+        color = self.cells[point]
+        capturedColor = BLACK + WHITE - color
+        self.cells[point] = EMPTY
+        self.groups[point] = None
+        self.hash ^= self.zobrist[color][point]
+        self.symmetricHashes ^= self.symmetricZobrist[color][point]
+        for capturedPoint in capturedPoints:
+            self.cells[capturedPoint] = capturedColor
+            self.hash ^= self.zobrist[capturedColor][capturedPoint]
+            self.symmetricHashes ^= self.symmetricZobrist[capturedColor][capturedPoint]
+
+        if color == BLACK:
+            self.capturesBlack -= len(captured)
+        else:
+            self.capturesWhite -= len(captured)
+
+        # Only groups touching the changed cells can have changed
+        changedPoints = [point]
+        changedPoints.extend(capturedPoints)
+        seeds = set(changedPoints)
+        for changedPoint in changedPoints:
+            seeds.update(self.neighbours[changedPoint])
+        self.rebuildGroups(seeds)
+
+    def rebuildGroups(self, points):
+        """Builds again from scratch the groups occupying the given points."""
+        cells = self.cells
+        visited = set()
+        for point in points:
+            color = cells[point]
+            if color == EMPTY or point in visited:
+                continue
+            group = Group(color)
+            pending = [point]
+            visited.add(point)
+            while pending:
+                stone = pending.pop()
+                group.stones.add(stone)
+                self.groups[stone] = group
+                for neighbour in self.neighbours[stone]:
+                    neighbourColor = cells[neighbour]
+                    if neighbourColor == EMPTY:
+                        group.liberties.add(neighbour)
+                    elif neighbourColor == color and neighbour not in visited:
+                        visited.add(neighbour)
+                        pending.append(neighbour)
+        if instrumentation.enabled:
+            instrumentation.count("floodFillCells", len(visited))
 
     def printBoard(self):
         """Print the board."""
+        print(self.toString())
+
+    def toString(self):
+        """Returns the board as text, with the names of its columns and rows."""
         colTitle = 'A'
         rowTitlePadding = 2
+        lines = []
 
-        # Print column names
+        # Column names
         rowText = " " * (rowTitlePadding + 2)
         for col in range(len(self.board[0])):
             rowText += colTitle + " "
             colTitle = chr(ord(colTitle)+1)
             if colTitle == "I": # Skip I
                 colTitle = "J"
-        print(rowText)
+        lines.append(rowText)
 
-        # Print rows
+        # Rows
         rowTitle = len(self.board)
         for row in self.board:
             rowText = ""
             for col in row:
                 rowText += cellToString(col) + " "
-            print(str(rowTitle) + " " * rowTitlePadding + rowText)
+            lines.append(str(rowTitle) + " " * rowTitlePadding + rowText)
             rowTitle -= 1
             if rowTitle == 9:
                 rowTitlePadding += 1
+        return "\n".join(lines)
 
 def cellToString(code):
     """Returns the text representation of a cell."""
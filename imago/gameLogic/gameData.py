@@ -6,6 +6,7 @@ class GameData:
     def __init__(self,
             name = None,
             size = 19,
+            komi = None,
             annotator = None,
             date = None,
             blackRank = "?",
@@ -25,10 +26,13 @@ class GameData:
             roundInfo = None,
             rules = None,
             source = None,
-            user = None
+            user = None,
+            addedBlack = None,
+            addedWhite = None
         ):
         self.name = name
         self.size = size
+        self.komi = komi
         self.annotator = annotator
         self.date = date
         self.blackRank = blackRank
@@ -49,3 +53,10 @@ class GameData:
         self.rules = rules
         self.source = source
         self.user = user
+        # Stones placed before the first move, such as handicap stones
+        if addedBlack is None:
+            addedBlack = []
+        if addedWhite is None:
+            addedWhite = []
+        self.addedBlack = addedBlack
+        self.addedWhite = addedWhite
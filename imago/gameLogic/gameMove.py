@@ -1,19 +1,36 @@
 """Information about one move."""
 
 class GameMove:
+    """A move and the changes it made to the board.
 
-    def __init__(self, player, row, col, makesKo, board):
+    Instead of a whole board each move only stores what it changed: the stone placed,
+    the stones captured and the ko it creates. Some moves also keep a snapshot of the
+    board from which the positions of the following moves can be rebuilt. A pass has
+    None as row and column.
+    """
+
+    def __init__(self, player, row, col, makesKo=None, captured=None):
         self.player = player
         self.row = row
         self.col = col
         self.makesKo = makesKo
-        self.board = board
+        if captured:
+            self.captured = captured
+        else:
+            self.captured = []
+        self.board = None
+        self.moveNumber = 1
         self.nextMoves = []
         self.previousMove = None
 
-    def addMove(self, player, row, col, makesKo, board):
+    def isPass(self):
+        """Returns True if the move is a pass."""
+        return self.row is None
+
+    def addMove(self, player, row, col, makesKo=None, captured=None):
         """Adds a move to the next moves list."""
-        newMove = GameMove(player, row, col, makesKo, board)
+        newMove = GameMove(player, row, col, makesKo, captured)
         newMove.previousMove = self
+        newMove.moveNumber = self.moveNumber + 1
         self.nextMoves.append(newMove)
         return newMove
@@ -1,17 +1,29 @@
 """Storing state of the game."""
 
-from imago.data.enums import Player
+import sys
+
+from imago import instrumentation
+from imago.data.enums import Player, KoRule
 from imago.gameLogic.gameTree import GameTree
 from imago.gameLogic.gameMove import GameMove
 from imago.gameLogic.gameBoard import GameBoard, cellToString
+from imago.gameLogic.zobrist import SIDE_TO_MOVE_KEY
+
+# Every how many moves a copy of the board is kept to rebuild past positions from
+SNAPSHOT_INTERVAL = 64
 
 class GameState:
     """Stores the state of the game."""
 
-    def __init__(self, size):
+    def __init__(self, size, koRule=KoRule.POSITIONAL_SUPERKO):
         self.size = size
+        self.koRule = koRule
         self.gameTree = None
         self.lastMove = None
+        self.board = None
+        self.setupStones = None
+        self.setupBoard = None
+        self.positionHistory = None
         self.initState()
 
     def getCurrentPlayer(self):
@@ -26,9 +38,56 @@ class GameState:
 
     def getBoard(self):
         """Returns the board as of the last move."""
-        if self.lastMove is None:
-            return GameBoard(self.size)
-        return self.lastMove.board
+        return self.board
+
+    def getHash(self):
+        """Returns the Zobrist hash of the current position and player to move."""
+        return self.board.getHash(self.getCurrentPlayer())
+
+    def getMoveHistory(self):
+        """Returns the moves from the start of the game to the last move as a list of
+        (player, row, col) tuples, row and col being None for passes.
+        """
+        moves = []
+        move = self.lastMove
+        while move is not None:
+            moves.append((move.player, move.row, move.col))
+            move = move.previousMove
+        moves.reverse()
+        return moves
+
+    def getSetupStones(self):
+        """Returns the lists of vertices of the black and white setup stones."""
+        return self.setupStones
+
+    def playMoveHistory(self, moves):
+        """Plays a list of (player, row, col) moves as returned by getMoveHistory."""
+        for player, row, col in moves:
+            if row is None:
+                self.playPassForPlayer(player)
+            elif not self.playMoveForPlayer(row, col, player):
+                return False
+        return True
+
+    def getBoardAtMove(self, move):
+        """Returns a new board with the position after the given move, rebuilt from the
+        nearest snapshot before it.
+        """
+        pendingMoves = []
+        while move is not None and move.board is None:
+            pendingMoves.append(move)
+            move = move.previousMove
+        if move is None and self.setupBoard is None:
+            board = GameBoard(self.size)
+        elif move is None:
+            board = self.setupBoard.getDeepCopy()
+        else:
+            board = move.board.getDeepCopy()
+        for pendingMove in reversed(pendingMoves):
+            if pendingMove.isPass():
+                continue
+            board.placeStone(pendingMove.row, pendingMove.col, pendingMove.player)
+        return board
 
     def playMove(self, row, col):
         """Execute a move on the board for the current player and switches players."""
@@ -37,44 +96,109 @@ class GameState:
     def playMoveForPlayer(self, row, col, player):
         """Execute a move on the board for the given player."""
 
-        # Check valid move
-        if not self.prevalidateMove(row, col):
-            print("Invalid move!")
+        error = self.__getMoveError(row, col, player)
+        if error is not None:
+            print(error, file=sys.stderr)
             return False
 
-        newBoard = self.getBoard().getDeepCopy()
+        # Move is legal
+        if instrumentation.enabled:
+            instrumentation.count("moves")
 
-        newBoard.board[row][col] = player
+        board = self.getBoard()
+        newKey = self.getRepetitionKey(
+                board.getHashAfterMove(row, col, player),
+                Player.otherPlayer(player))
 
-        groupLiberties = newBoard.getGroupLiberties(row, col)
+        captured = board.placeStone(row, col, player)
 
-        # Check suicide
-        killed = newBoard.moveCapture(row, col, player)
-        if killed == 0 and len(groupLiberties) == 0:
-            print("Invalid move! (Suicide)")
-            return False
+        # Check if move makes ko
+        makesKo = None
+        if (len(captured) == 1
+            and board.getGroupSize(row, col) == 1
+            and board.getGroupLibertyCount(row, col) == 1):
+            makesKo = captured[0]
 
-        # Check ko
+        self.positionHistory[newKey] = self.positionHistory.get(newKey, 0) + 1
+
+        newMove = self.__addMove(player, row, col, makesKo, captured)
+        if newMove.moveNumber % SNAPSHOT_INTERVAL == 0:
+            newMove.board = board.getDeepCopy()
+        return True
+
+    def playPass(self):
+        """Passes the turn of the current player."""
+        self.playPassForPlayer(self.getCurrentPlayer())
+
+    def playPassForPlayer(self, player):
+        """Passes the turn of the given player."""
+        self.__addMove(player, None, None, None, None)
+
+    def addSetupStones(self, blackVertices, whiteVertices):
+        """Places stones before the first move, such as handicap stones. Raises an
+        Exception, leaving the board as it was, if a stone is repeated, falls on an
+        occupied cell or is left without liberties.
+        """
         if self.lastMove is not None:
-            illegalKoVertex = self.lastMove.makesKo
-            if illegalKoVertex is not None:
-                if row == illegalKoVertex[0] and col == illegalKoVertex[1]:
-                    print("Invalid move! (Ko)")
-                    return False
+            raise Exception("Setup stones can only be added before the first move")
+        for playerVertices in (blackVertices, whiteVertices):
+            if len({tuple(vertex) for vertex in playerVertices}) != len(playerVertices):
+                raise Exception("Repeated setup stone")
+        board = self.board.getDeepCopy()
+        for player, playerVertices in ((Player.BLACK, blackVertices),
+                (Player.WHITE, whiteVertices)):
+            for row, col in playerVertices:
+                if board.getPlayer(row, col) != Player.EMPTY:
+                    raise Exception("Setup stone on an occupied cell")
+                if board.placeStone(row, col, player):
+                    raise Exception("Setup stone without liberties")
+        for row, col in list(blackVertices) + list(whiteVertices):
+            if board.getGroupLibertyCount(row, col) == 0:
+                raise Exception("Setup stone without liberties")
+        board.lastStone = None
+        self.board = board
+        self.setupStones = (list(blackVertices), list(whiteVertices))
+        self.setupBoard = self.board.getDeepCopy()
+        self.positionHistory = {
+            self.getRepetitionKey(self.board.getHash(), Player.BLACK): 1
+        }
 
-        # Move is legal
+    def isLegalMove(self, row, col, player):
+        """Returns True if the player can place a stone in the given cell."""
+        return self.__getMoveError(row, col, player) is None
 
-        # Check if move makes ko
-        makesKo = None
-        if killed == 1 and len(groupLiberties) == 1:
-            makesKo = groupLiberties[0]
+    def getKoPoint(self):
+        """Returns the cell where the current player can not play because of ko, or None."""
+        if self.lastMove is None:
+            return None
+        return self.lastMove.makesKo
 
-        self.__addMove(player, row, col, makesKo, newBoard)
-        return True
+    def isFinished(self):
+        """Returns True if the last two moves were passes."""
+        return (self.lastMove is not None and self.lastMove.isPass()
+                and self.lastMove.previousMove is not None
+                and self.lastMove.previousMove.isPass())
 
     def undo(self):
-        """Sets the move before the last move as the new last move."""
-        self.lastMove = self.lastMove.previousMove
+        """Reverts the last move on the board and sets the move before it as the new last
+        move.
+        """
+        if self.lastMove is None:
+            return
+        move = self.lastMove
+        if not move.isPass():
+            key = self.getRepetitionKey(self.board.getHash(), self.getCurrentPlayer())
+            self.positionHistory[key] -= 1
+            if self.positionHistory[key] == 0:
+                del self.positionHistory[key]
+        self.lastMove = move.previousMove
+        previousStone = None
+        if self.lastMove is not None and not self.lastMove.isPass():
+            previousStone = (self.lastMove.row, self.lastMove.col)
+        if move.isPass():
+            self.board.lastStone = previousStone
+        else:
+            self.board.revertStone(move.row, move.col, move.captured, previousStone)
 
     def initState(self):
         """Starts current player, captured stones, board and game tree."""
@@ -82,6 +206,12 @@ class GameState:
         self.capturesWhite = 0
         self.gameTree = GameTree()
         self.lastMove = None
+        self.board = GameBoard(self.size)
+        self.setupStones = ([], [])
+        self.setupBoard = None
+        self.positionHistory = {
+            self.getRepetitionKey(self.board.getHash(), Player.BLACK): 1
+        }
 
     def clearBoard(self):
         """Clears the board, captured stones and game tree."""
@@ -92,14 +222,49 @@ class GameState:
         if (row < 0 or row >= self.size
             or col < 0 or col >= self.size):
             return False
-        if self.getBoard().board[row][col] != Player.EMPTY:
+        if self.board.getPlayer(row, col) != Player.EMPTY:
             return False
         return True
 
-    def __addMove(self, player, row, col, makesKo, newBoard):
+    def getRepetitionKey(self, boardHash, playerToMove):
+        """Returns the key identifying a position for the ko rule in use."""
+        if (self.koRule == KoRule.SITUATIONAL_SUPERKO
+            and playerToMove == Player.WHITE):
+            return boardHash ^ SIDE_TO_MOVE_KEY
+        return boardHash
+
+    def __getMoveError(self, row, col, player):
+        """Returns a message explaining why a move is illegal, or None if it is legal."""
+
+        # Check valid move
+        if not self.prevalidateMove(row, col):
+            return "Invalid move!"
+
+        board = self.getBoard()
+
+        # Check suicide
+        if board.isSuicide(row, col, player):
+            return "Invalid move! (Suicide)"
+
+        # Check ko
+        illegalKoVertex = self.getKoPoint()
+        if illegalKoVertex is not None:
+            if row == illegalKoVertex[0] and col == illegalKoVertex[1]:
+                return "Invalid move! (Ko)"
+
+        # Check superko
+        newKey = self.getRepetitionKey(
+                board.getHashAfterMove(row, col, player),
+                Player.otherPlayer(player))
+        if newKey in self.positionHistory:
+            return "Invalid move! (Superko)"
+
+        return None
+
+    def __addMove(self, player, row, col, makesKo, captured):
         if self.lastMove is None:
-            self.lastMove = GameMove(player, row, col, makesKo, newBoard)
+            self.lastMove = GameMove(player, row, col, makesKo, captured)
             self.gameTree.firstMoves.append(self.lastMove)
         else:
-            self.lastMove = self.lastMove.addMove(player, row, col, makesKo, newBoard)
+            self.lastMove = self.lastMove.addMove(player, row, col, makesKo, captured)
         return self.lastMove
@@ -1,8 +1,25 @@
 """A tree storing a match's history, variants and information."""
 
-# This class will not be necessary if it just keeps being a list of moves
+from imago.gameLogic.gameData import GameData
 
 class GameTree:
+    """Moves of a match, each one with the next moves of its variations, and the
+    information of the match.
+    """
 
-    def __init__(self):
-        self.firstMoves = []
+    def __init__(self, firstMoves=None, gameData=None):
+        if firstMoves is None:
+            firstMoves = []
+        if gameData is None:
+            gameData = GameData()
+        self.firstMoves = firstMoves
+        self.gameData = gameData
+
+    def getMainLine(self):
+        """Returns the list of moves of the main line, following the first variation."""
+        moves = []
+        nextMoves = self.firstMoves
+        while nextMoves:
+            moves.append(nextMoves[0])
+            nextMoves = nextMoves[0].nextMoves
+        return moves
@@ -0,0 +1,355 @@
+"""Lightweight board for fast random playouts."""
+
+from imago import instrumentation
+from imago.data.enums import Player
+from imago.gameLogic.gameBoard import (EMPTY, BLACK, WHITE, BORDER, getNewBoard,
+        getNeighbourTable)
+from imago.gameLogic.zobrist import SIDE_TO_MOVE_KEY, getZobristTable
+
+# Random games are stopped after this many moves per cell of the board
+PLAYOUT_MOVES_PER_CELL = 3
+
+DIAGONAL_TABLES = {}
+
+def getDiagonalTable(size):
+    """Returns a table with the tuple of diagonal points of each point of a board of the
+    given size, border points included. Tables are shared between boards of the same
+    size.
+    """
+    if size not in DIAGONAL_TABLES:
+        stride = size + 2
+        cells = getNewBoard(size)
+        offsets = (-stride - 1, -stride + 1, stride - 1, stride + 1)
+        table = []
+        for point in range(stride * stride):
+            if cells[point] == BORDER:
+                table.append(())
+                continue
+            table.append(tuple(point + offset for offset in offsets))
+        DIAGONAL_TABLES[size] = table
+    return DIAGONAL_TABLES[size]
+
+class PlayoutBoard:
+    """Board which plays moves in place without keeping any history.
+
+    Stones are grouped in chains, each identified by one of its stones, its head. The
+    stones of a chain form a circular list through nextStone. Liberties are counted as
+    pseudo-liberties, once per adjacent stone, along with their sum and sum of squares:
+    a chain is in atari exactly when all its pseudo-liberties are the same point, that
+    is when count * sumOfSquares == sum * sum.
+
+    Empty points are kept in a list, with the position of each point in it, so they can
+    be added, removed and sampled in constant time.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.cells = getNewBoard(size)
+        self.neighbours = getNeighbourTable(size)
+        self.diagonals = getDiagonalTable(size)
+        self.zobrist = getZobristTable(size)
+        nPoints = len(self.cells)
+        self.chainHead = [0] * nPoints
+        self.nextStone = [0] * nPoints
+        self.chainSize = [0] * nPoints
+        self.libCount = [0] * nPoints
+        self.libSum = [0] * nPoints
+        self.libSumSquares = [0] * nPoints
+        self.emptyPoints = [point for point in range(nPoints)
+                if self.cells[point] == EMPTY]
+        self.emptyIndex = [-1] * nPoints
+        for index, point in enumerate(self.emptyPoints):
+            self.emptyIndex[point] = index
+        self.koPoint = None
+        self.hash = 0
+
+    @classmethod
+    def fromGameBoard(cls, gameBoard, koPoint=None):
+        """Returns a playout board with the position of a GameBoard."""
+        board = cls(gameBoard.size)
+        cells = board.cells
+        cells[:] = gameBoard.cells
+        board.hash = gameBoard.hash
+        board.koPoint = koPoint
+        board.emptyPoints = [point for point in range(len(cells))
+                if cells[point] == EMPTY]
+        board.emptyIndex = [-1] * len(cells)
+        for index, point in enumerate(board.emptyPoints):
+            board.emptyIndex[point] = index
+
+        seenGroups = set()
+        for group in gameBoard.groups:
+            if group is None or id(group) in seenGroups:
+                continue
+            seenGroups.add(id(group))
+            stones = sorted(group.stones)
+            head = stones[0]
+            for index, stone in enumerate(stones):
+                board.chainHead[stone] = head
+                board.nextStone[stone] = stones[(index + 1) % len(stones)]
+                for neighbour in board.neighbours[stone]:
+                    if cells[neighbour] == EMPTY:
+                        board.libCount[head] += 1
+                        board.libSum[head] += neighbour
+                        board.libSumSquares[head] += neighbour * neighbour
+            board.chainSize[head] = len(stones)
+        return board
+
+    def copy(self):
+        """Returns a copy of the board."""
+        if instrumentation.enabled:
+            instrumentation.count("playoutBoardCopies")
+        board = PlayoutBoard.__new__(PlayoutBoard)
+        board.size = self.size
+        board.cells = self.cells[:]
+        board.neighbours = self.neighbours
+        board.diagonals = self.diagonals
+        board.zobrist = self.zobrist
+        board.chainHead = self.chainHead[:]
+        board.nextStone = self.nextStone[:]
+        board.chainSize = self.chainSize[:]
+        board.libCount = self.libCount[:]
+        board.libSum = self.libSum[:]
+        board.libSumSquares = self.libSumSquares[:]
+        board.emptyPoints = self.emptyPoints[:]
+        board.emptyIndex = self.emptyIndex[:]
+        board.koPoint = self.koPoint
+        board.hash = self.hash
+        return board
+
+    def getHash(self, player=None):
+        """Returns the Zobrist hash of the position. If the player to move is given it is
+        also taken into account.
+        """
+        if player == Player.WHITE:
+            return self.hash ^ SIDE_TO_MOVE_KEY
+        return self.hash
+
+    def isInAtari(self, head):
+        """Returns True if the chain with the given head has only one liberty."""
+        count = self.libCount[head]
+        total = self.libSum[head]
+        return count * self.libSumSquares[head] == total * total
+
+    def isSuicide(self, point, color):
+        """Returns True if placing a stone of the color in an empty point would leave its
+        chain without liberties and capture nothing.
+        """
+        cells = self.cells
+        chainHead = self.chainHead
+        libSum = self.libSum
+        for neighbour in self.neighbours[point]:
+            neighbourColor = cells[neighbour]
+            if neighbourColor == EMPTY:
+                return False
+            # Inlined isInAtari, this is the hottest check of the playouts
+            head = chainHead[neighbour]
+            inAtari = (self.libCount[head] * self.libSumSquares[head]
+                    == libSum[head] * libSum[head])
+            if (neighbourColor == color) != inAtari:
+                # A friend chain with more liberties or an enemy chain captured
+                return False
+        return True
+
+    def isEye(self, point, color):
+        """Returns True if an empty point is an eye of the color: all its neighbours are
+        stones of the color and not enough diagonals are enemy stones to make it false.
+        """
+        cells = self.cells
+        for neighbour in self.neighbours[point]:
+            if cells[neighbour] != color:
+                return False
+        enemy = BLACK + WHITE - color
+        enemyDiagonals = 0
+        onEdge = False
+        for diagonal in self.diagonals[point]:
+            diagonalColor = cells[diagonal]
+            if diagonalColor == enemy:
+                enemyDiagonals += 1
+            elif diagonalColor == BORDER:
+                onEdge = True
+        if onEdge:
+            return enemyDiagonals == 0
+        return enemyDiagonals < 2
+
+    def isLegal(self, point, color):
+        """Returns True if a stone of the color can be placed in the point, superko aside.
+        """
+        return (self.cells[point] == EMPTY and point != self.koPoint
+                and not self.isSuicide(point, color))
+
+    def getHashAfterMove(self, point, color):
+        """Returns the Zobrist hash the position would have after placing a stone of the
+        color in an empty point, without placing it.
+        """
+        cells = self.cells
+        enemy = BLACK + WHITE - color
+        enemyKeys = self.zobrist[enemy]
+        newHash = self.hash ^ self.zobrist[color][point]
+        capturedHeads = []
+        for neighbour in self.neighbours[point]:
+            if cells[neighbour] != enemy:
+                continue
+            head = self.chainHead[neighbour]
+            if head in capturedHeads or not self.isInAtari(head):
+                continue
+            capturedHeads.append(head)
+            stone = head
+            while True:
+                newHash ^= enemyKeys[stone]
+                stone = self.nextStone[stone]
+                if stone == head:
+                    break
+        return newHash
+
+    def play(self, point, color):
+        """Places a stone of the color in an empty point, removes the chains it captures
+        and returns the number of captured stones. The ko point is updated.
+        """
+        cells = self.cells
+        chainHead = self.chainHead
+        libCount = self.libCount
+        libSum = self.libSum
+        libSumSquares = self.libSumSquares
+        squaredPoint = point * point
+
+        cells[point] = color
+        self.hash ^= self.zobrist[color][point]
+        self.removeEmpty(point)
+
+        chainHead[point] = point
+        self.nextStone[point] = point
+        self.chainSize[point] = 1
+        libCount[point] = 0
+        libSum[point] = 0
+        libSumSquares[point] = 0
+
+        head = point
+        enemy = BLACK + WHITE - color
+        enemyHeads = []
+        for neighbour in self.neighbours[point]:
+            neighbourColor = cells[neighbour]
+            if neighbourColor == EMPTY:
+                libCount[head] += 1
+                libSum[head] += neighbour
+                libSumSquares[head] += neighbour * neighbour
+                continue
+            neighbourHead = chainHead[neighbour]
+            libCount[neighbourHead] -= 1
+            libSum[neighbourHead] -= point
+            libSumSquares[neighbourHead] -= squaredPoint
+            if neighbourColor == color:
+                if neighbourHead != head:
+                    head = self.mergeChains(head, neighbourHead)
+            elif neighbourColor == enemy and neighbourHead not in enemyHeads:
+                enemyHeads.append(neighbourHead)
+
+        captured = 0
+        capturedPoint = None
+        for enemyHead in enemyHeads:
+            if libCount[enemyHead] == 0:
+                captured += self.removeChain(enemyHead)
+                capturedPoint = enemyHead
+
+        self.koPoint = None
+        if captured == 1 and self.chainSize[head] == 1 and libCount[head] == 1:
+            self.koPoint = capturedPoint
+        return captured
+
+    def playPass(self):
+        """Passes, which lifts any ko."""
+        self.koPoint = None
+
+    def mergeChains(self, head, otherHead):
+        """Joins two chains and returns the head of the resulting one."""
+        chainHead = self.chainHead
+        nextStone = self.nextStone
+        if self.chainSize[head] < self.chainSize[otherHead]:
+            head, otherHead = otherHead, head
+        stone = otherHead
+        while True:
+            chainHead[stone] = head
+            stone = nextStone[stone]
+            if stone == otherHead:
+                break
+        nextStone[head], nextStone[otherHead] = nextStone[otherHead], nextStone[head]
+        self.chainSize[head] += self.chainSize[otherHead]
+        self.libCount[head] += self.libCount[otherHead]
+        self.libSum[head] += self.libSum[otherHead]
+        self.libSumSquares[head] += self.libSumSquares[otherHead]
+        return head
+
+    def removeChain(self, head):
+        """Removes the stones of a chain, giving their points back as liberties to the
+        adjacent chains, and returns the number of removed stones.
+        """
+        cells = self.cells
+        chainHead = self.chainHead
+        nextStone = self.nextStone
+        keys = self.zobrist[cells[head]]
+        stones = []
+        stone = head
+        while True:
+            stones.append(stone)
+            cells[stone] = EMPTY
+            self.hash ^= keys[stone]
+            self.addEmpty(stone)
+            stone = nextStone[stone]
+            if stone == head:
+                break
+        for stone in stones:
+            squaredStone = stone * stone
+            for neighbour in self.neighbours[stone]:
+                if cells[neighbour] in (BLACK, WHITE):
+                    neighbourHead = chainHead[neighbour]
+                    self.libCount[neighbourHead] += 1
+                    self.libSum[neighbourHead] += stone
+                    self.libSumSquares[neighbourHead] += squaredStone
+        return len(stones)
+
+    def addEmpty(self, point):
+        """Adds a point to the list of empty points."""
+        self.emptyIndex[point] = len(self.emptyPoints)
+        self.emptyPoints.append(point)
+
+    def removeEmpty(self, point):
+        """Removes a point from the list of empty points."""
+        index = self.emptyIndex[point]
+        lastPoint = self.emptyPoints.pop()
+        if lastPoint != point:
+            self.emptyPoints[index] = lastPoint
+            self.emptyIndex[lastPoint] = index
+        self.emptyIndex[point] = -1
+
+    def playRandomMove(self, color, rand):
+        """Plays a random legal move for the color which does not fill one of its eyes.
+        Returns the point played or None if there is none and the color passes.
+        """
+        emptyPoints = self.emptyPoints
+        nEmpty = len(emptyPoints)
+        if nEmpty > 0:
+            # Points are tried from a random one onwards
+            start = int(rand() * nEmpty)
+            for offset in range(nEmpty):
+                point = emptyPoints[(start + offset) % nEmpty]
+                if (point != self.koPoint and not self.isEye(point, color)
+                    and not self.isSuicide(point, color)):
+                    self.play(point, color)
+                    return point
+        self.playPass()
+        return None
+
+    def playRandomGame(self, color, rand, maxMoves):
+        """Plays random moves starting with the color until both players pass or the
+        maximum number of moves is reached. Returns the number of moves played.
+        """
+        passes = 0
+        moves = 0
+        while passes < 2 and moves < maxMoves:
+            if self.playRandomMove(color, rand) is None:
+                passes += 1
+            else:
+                passes = 0
+            color = BLACK + WHITE - color
+            moves += 1
+        return moves
@@ -0,0 +1,137 @@
+"""Scoring of positions by area and by territory."""
+
+from random import Random
+
+from imago import instrumentation
+from imago.data.enums import ScoringRule
+from imago.gameLogic.gameBoard import EMPTY, BLACK, WHITE
+from imago.gameLogic.playoutBoard import PlayoutBoard, PLAYOUT_MOVES_PER_CELL
+
+# Random games played from a position to find out which stones are dead
+DEAD_STONE_PLAYOUTS = 100
+
+def getOwners(cells, neighbours):
+    """Returns the color code owning each point: the color of its stone or, for empty
+    points, the colors of the stones reached from their empty region, 0 if none and
+    BLACK + WHITE if both.
+    """
+    owners = bytearray(cells)
+    visited = bytearray(len(cells))
+    for start in range(len(cells)):
+        if cells[start] != EMPTY or visited[start]:
+            continue
+        # Iterative flood fill of the empty region
+        visited[start] = 1
+        region = [start]
+        index = 0
+        regionColors = 0
+        while index < len(region):
+            point = region[index]
+            index += 1
+            for neighbour in neighbours[point]:
+                color = cells[neighbour]
+                if color == EMPTY:
+                    if not visited[neighbour]:
+                        visited[neighbour] = 1
+                        region.append(neighbour)
+                else:
+                    regionColors |= color
+        if regionColors != EMPTY:
+            for point in region:
+                owners[point] = regionColors
+    if instrumentation.enabled:
+        instrumentation.count("floodFillCells", sum(visited))
+    return owners
+
+def removeStones(board, points):
+    """Returns a copy of the cells of a board without the stones of the given points."""
+    cells = bytearray(board.cells)
+    for point in points:
+        cells[point] = EMPTY
+    return cells
+
+def scoreArea(board, deadStones=()):
+    """Returns the points of black and white by Tromp-Taylor area scoring: their stones
+    and the empty points from which only their stones are reached. Dead stones, given as
+    points, are removed first.
+    """
+    cells = board.cells
+    if deadStones:
+        cells = removeStones(board, deadStones)
+    owners = getOwners(cells, board.neighbours)
+    return owners.count(BLACK), owners.count(WHITE)
+
+def scoreTerritory(board, deadStones=()):
+    """Returns the points of black and white by territory scoring: the empty points and
+    dead stones surrounded only by their stones plus their prisoners, both captured
+    and dead stones.
+    """
+    cells = removeStones(board, deadStones)
+    owners = getOwners(cells, board.neighbours)
+    territory = [0, 0, 0, 0]
+    for point in range(len(cells)):
+        if cells[point] == EMPTY:
+            territory[owners[point]] += 1
+    deadBlack = 0
+    deadWhite = 0
+    for point in deadStones:
+        if board.cells[point] == BLACK:
+            deadBlack += 1
+        else:
+            deadWhite += 1
+    return (territory[BLACK] + board.capturesBlack + deadWhite,
+            territory[WHITE] + board.capturesWhite + deadBlack)
+
+def getScore(board, komi, rule=ScoringRule.AREA, deadStones=()):
+    """Returns the points black is ahead of white, komi included."""
+    if rule == ScoringRule.TERRITORY:
+        black, white = scoreTerritory(board, deadStones)
+    else:
+        black, white = scoreArea(board, deadStones)
+    return black - white - komi
+
+def scoreToString(score):
+    """Returns a score as a result string such as B+3.5, W+0.5 or 0 for a draw."""
+    if score == 0:
+        return "0"
+    winner = "B" if score > 0 else "W"
+    return "%s+%g" % (winner, abs(score))
+
+def getOwnership(board, color, koPoint=None, playouts=DEAD_STONE_PLAYOUTS, seed=None):
+    """Returns, for each point of the board, the ratio of random games from the position,
+    starting with the color code, in which it ends as area of black and of white.
+    """
+    rand = Random(seed)
+    rootBoard = PlayoutBoard.fromGameBoard(board, koPoint)
+    maxMoves = PLAYOUT_MOVES_PER_CELL * board.size * board.size
+    blackCounts = [0] * len(board.cells)
+    whiteCounts = [0] * len(board.cells)
+    for _ in range(playouts):
+        playoutBoard = rootBoard.copy()
+        playoutBoard.playRandomGame(color, rand.random, maxMoves)
+        owners = getOwners(playoutBoard.cells, playoutBoard.neighbours)
+        for point, owner in enumerate(owners):
+            if owner == BLACK:
+                blackCounts[point] += 1
+            elif owner == WHITE:
+                whiteCounts[point] += 1
+    return ([count / playouts for count in blackCounts],
+            [count / playouts for count in whiteCounts])
+
+def getDeadStones(board, color, koPoint=None, playouts=DEAD_STONE_PLAYOUTS, seed=None):
+    """Returns the set of points of the stones of a GameBoard estimated to be dead: those
+    of the groups ending as area of the other color in most random games, starting
+    with the color code.
+    """
+    blackOwnership, whiteOwnership = getOwnership(board, color, koPoint, playouts, seed)
+    deadStones = set()
+    checkedGroups = set()
+    for group in board.groups:
+        if group is None or id(group) in checkedGroups:
+            continue
+        checkedGroups.add(id(group))
+        enemyOwnership = whiteOwnership if group.color == BLACK else blackOwnership
+        lostRatio = sum(enemyOwnership[point] for point in group.stones) / len(group.stones)
+        if lostRatio > 0.5:
+            deadStones.update(group.stones)
+    return deadStones
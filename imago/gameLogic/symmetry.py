@@ -0,0 +1,74 @@
+"""The 8 symmetries of a board: rotations and reflections.
+
+A symmetry is a number from 0 to 7 whose bits say which transformations are applied to
+a vertex, in order: 1 flips the rows, 2 flips the columns and 4 swaps rows and columns.
+"""
+
+from imago.gameLogic.zobrist import getZobristTable
+
+SYMMETRIES = 8
+
+HASH_BITS = 64
+HASH_MASK = (1 << HASH_BITS) - 1
+
+# The symmetry undoing each one. Flips are undone after swapping rows and columns, so
+# symmetries swapping them undo the flips of each other
+INVERSE_SYMMETRIES = (0, 1, 2, 3, 4, 6, 5, 7)
+
+SYMMETRY_TABLES = {}
+SYMMETRIC_ZOBRIST_TABLES = {}
+
+def transformVertex(row, col, size, symmetry):
+    """Returns the vertex the given one is moved to by a symmetry."""
+    if symmetry & 1:
+        row = size - 1 - row
+    if symmetry & 2:
+        col = size - 1 - col
+    if symmetry & 4:
+        row, col = col, row
+    return row, col
+
+def inverseTransformVertex(row, col, size, symmetry):
+    """Returns the vertex moved to the given one by a symmetry."""
+    return transformVertex(row, col, size, INVERSE_SYMMETRIES[symmetry])
+
+def getSymmetryTables(size):
+    """Returns, for each symmetry, a table with the point each point of a board of the
+    given size is moved to. Border points are left in place. Tables are shared between
+    boards of the same size.
+    """
+    if size not in SYMMETRY_TABLES:
+        stride = size + 2
+        tables = []
+        for symmetry in range(SYMMETRIES):
+            table = list(range(stride * stride))
+            for row in range(size):
+                for col in range(size):
+                    newRow, newCol = transformVertex(row, col, size, symmetry)
+                    table[(row+1) * stride + col + 1] = (newRow+1) * stride + newCol + 1
+            tables.append(table)
+        SYMMETRY_TABLES[size] = tables
+    return SYMMETRY_TABLES[size]
+
+def getSymmetricZobristTable(size):
+    """Returns a table with, for each color code and point of a board of the given size,
+    the Zobrist keys of the points it is moved to by each symmetry packed in one number,
+    64 bits for each symmetry. XORing them into a board's packed hashes keeps the hash of
+    each symmetric version of the board with a single operation.
+    """
+    if size not in SYMMETRIC_ZOBRIST_TABLES:
+        pointTables = getSymmetryTables(size)
+        table = []
+        for keys in getZobristTable(size):
+            packedKeys = [0] * len(keys)
+            for point in range(len(keys)):
+                for symmetry, pointTable in enumerate(pointTables):
+                    packedKeys[point] |= keys[pointTable[point]] << (HASH_BITS * symmetry)
+            table.append(packedKeys)
+        SYMMETRIC_ZOBRIST_TABLES[size] = table
+    return SYMMETRIC_ZOBRIST_TABLES[size]
+
+def unpackHashes(packedHashes):
+    """Returns the list of the 8 hashes packed in a number."""
+    return [(packedHashes >> (HASH_BITS * symmetry)) & HASH_MASK
+            for symmetry in range(SYMMETRIES)]
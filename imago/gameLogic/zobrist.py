@@ -0,0 +1,28 @@
+"""Random keys for Zobrist hashing of board positions."""
+
+from random import Random
+
+# Fixed seed so hashes are the same across runs and processes
+ZOBRIST_SEED = 0x1a9a90
+
+ZOBRIST_TABLES = {}
+
+SIDE_TO_MOVE_KEY = Random(ZOBRIST_SEED - 1).getrandbits(64)
+
+def getZobristTable(size):
+    """Returns a table with a random 64 bit key for each color code and point of a board
+    of the given size, accessed as table[color][point]. Tables are shared between boards
+    of the same size. Keys of empty cells and border cells are 0.
+    """
+    if size not in ZOBRIST_TABLES:
+        stride = size + 2
+        rand = Random(ZOBRIST_SEED + size)
+        table = [[0] * (stride * stride)]
+        for _ in range(2):
+            keys = [0] * (stride * stride)
+            for row in range(size):
+                for col in range(size):
+                    keys[(row+1) * stride + col + 1] = rand.getrandbits(64)
+            table.append(keys)
+        ZOBRIST_TABLES[size] = table
+    return ZOBRIST_TABLES[size]
@@ -0,0 +1,84 @@
+"""Counters and timers of the work done by the engine, toggled at runtime.
+
+Instrumented code checks the enabled flag before counting, so while it is off the cost
+is a single attribute lookup. Counters and timers are kept per process: the work of
+the worker processes of a parallel search is not included.
+"""
+
+import cProfile
+import io
+import json
+import pstats
+import sys
+import time
+
+enabled = False
+counters = {}
+timers = {}
+
+# Lines of profile statistics printed by profileCall
+PROFILE_LINES = 30
+
+def setEnabled(value):
+    """Turns counting on or off, keeping the values counted so far."""
+    global enabled
+    enabled = value
+
+def reset():
+    """Sets every counter and timer back to zero."""
+    counters.clear()
+    timers.clear()
+
+def count(name, amount=1):
+    """Adds an amount to a counter."""
+    counters[name] = counters.get(name, 0) + amount
+
+def addTime(name, seconds):
+    """Adds seconds to a timer."""
+    timers[name] = timers.get(name, 0.0) + seconds
+
+class Timer:
+    """Context manager adding the seconds spent inside it to a timer, if enabled."""
+
+    def __init__(self, name):
+        self.name = name
+        self.startTime = None
+
+    def __enter__(self):
+        if enabled:
+            self.startTime = time.perf_counter()
+        return self
+
+    def __exit__(self, *_):
+        if self.startTime is not None:
+            addTime(self.name, time.perf_counter() - self.startTime)
+            self.startTime = None
+
+def getStats():
+    """Returns the state, counters and timers as a dictionary."""
+    return {"enabled": enabled, "counters": dict(counters), "timers": dict(timers)}
+
+def toJson():
+    """Returns the state, counters and timers as JSON in one line."""
+    return json.dumps(getStats(), sort_keys=True)
+
+def dump(path):
+    """Writes the state, counters and timers to a JSON file."""
+    with open(path, "w") as statsFile:
+        json.dump(getStats(), statsFile, indent=4, sort_keys=True)
+
+def profileCall(function, args=(), path=None):
+    """Calls the function under cProfile and returns its result. The statistics are
+    written to the given file in pstats format or, if there is none, the most
+    expensive calls are printed on the standard error output.
+    """
+    profiler = cProfile.Profile()
+    result = profiler.runcall(function, *args)
+    if path is not None:
+        profiler.dump_stats(path)
+    else:
+        text = io.StringIO()
+        pstats.Stats(profiler, stream=text).sort_stats("cumulative") \
+                .print_stats(PROFILE_LINES)
+        print(text.getvalue(), file=sys.stderr)
+    return result
@@ -1,7 +1,5 @@
 from imago.gameLogic.gameTree import GameTree
-from imago.gameLogic.gameData import GameData
-from imago.gameLogic.gameMove import GameMove
-from imago.gameLogic.gameState import Player
+from imago.sgfParser.sgf import loadGameData, addNodeMove
 
 class ASTNode:
     """Abstract Syntax Tree Node of SGF parser"""
@@ -23,86 +21,24 @@ class ASTNode:
             children = children[0].children
         children.append(move)
 
+    def getPropertyLists(self):
+        """Returns the properties of this node with their values as lists"""
+        return {name: value if isinstance(value, list) else [value]
+                for name, value in self.props.items()}
+
     def toGameTree(self):
         """Converts this node and its subtree into a GameTree"""
-        gameData = GameData()
-        for prop in self.props:
-            if prop.name == "GM": # Type of game, 1 is Go
-                if prop.value != 1:
-                    print("ERROR") # TODO: Error handling
-            if prop.name == "SZ": # Size of board. [19] for squared, [10:12] for rect.
-                gameData.size = prop.value
-            if prop.name == "AN": # Annotator
-                gameData.annotator = prop.value
-            if prop.name == "BR": # Rank of black player
-                gameData.blackRank = prop.value
-            if prop.name == "WR": # Rank of white player
-                gameData.whiteRank = prop.value
-            if prop.name == "PB": # Name of black player
-                gameData.blackName = prop.value
-            if prop.name == "PW": # Name of white player
-                gameData.whiteName = prop.value
-            if prop.name == "BT": # Name of black team
-                gameData.blackTeam = prop.value
-            if prop.name == "WT": # Name of white team
-                gameData.whiteTeam = prop.value
-            if prop.name == "CP": # Copyright information
-                gameData.copyright = prop.value
-            if prop.name == "DT": # Date
-                gameData.date = prop.value
-            if prop.name == "EV": # Event information
-                gameData.event = prop.value
-            if prop.name == "GN": # Game nae
-                gameData.name = prop.value
-            if prop.name == "GC": # Extra game comment
-                gameData.gameComment = prop.value
-            if prop.name == "ON": # Description of opening played
-                gameData.openingInfo = prop.value
-            if prop.name == "OT": # Overtime method
-                gameData.overtimeInfo = prop.value
-            if prop.name == "PC": # Place where the game took place
-                gameData.place = prop.value
-            if prop.name == "RE": # Result of the game
-                gameData.result = prop.value
-            if prop.name == "RO": # Round number and type
-                gameData.roundInfo = prop.value
-            if prop.name == "RU": # Rules used for the game
-                gameData.rules = prop.value
-            if prop.name == "SO": # Source of the gamw
-                gameData.source = prop.source
-            if prop.name == "TM": # Time limit in seconds
-                gameData.timeInfo = prop.source
-            if prop.name == "US": # User or program which entered the game
-                gameData.user = prop.source
-
-        firstMoves = []
-        for child in self.children:
-            firstMoves.append(child.toGameMoveTree)
-
-        return GameTree(firstMoves, gameData)
-
-    def toGameMoveTree(self):
-        player = 0
-        coords = []
-        for prop in self.props:
-            if prop.name == "B": # White move
-                player = Player.BLACK
-                coords = textToCoords(prop.value)
-            if prop.name == "W": # White move
-                player = Player.WHITE
-                coords = textToCoords(prop.value)
-        gameMove = GameMove(player, coords[0], coords[1])
-        for child in self.children:
-            newMove = child.toGameMoveTree()
-            gameMove.nextMoves.append(newMove)
-            newMove.previousMove = gameMove
-        return gameMove
-
-def textToCoords(text): # Poner en PropertyMove, subclase de Property
-    col = ord(text[1]) - ord('a')
-    row = ord(text[0]) - ord('a')
-    return [row, col]
-
+        gameTree = GameTree()
+        rootProps = self.getPropertyLists()
+        loadGameData(gameTree.gameData, rootProps)
+        rootMove = addNodeMove(gameTree, None, rootProps)
+        # Nodes are visited with a stack, deep games would exceed the recursion limit
+        pendingNodes = [(child, rootMove) for child in reversed(self.children)]
+        while pendingNodes:
+            node, lastMove = pendingNodes.pop()
+            move = addNodeMove(gameTree, lastMove, node.getPropertyLists())
+            pendingNodes.extend((child, move) for child in reversed(node.children))
+        return gameTree
 
     def toString(self):
         """Returns a depth-first representation of the tree."""
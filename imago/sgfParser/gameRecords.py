@@ -0,0 +1,195 @@
+"""Compact binary files of game records, read through mmap.
+
+A file starts with a header holding the number of games and the offset of an index
+table, which has the offset of each game. Each game is a small header followed by its
+GameData as JSON and the moves of its main line, packed in one byte each on boards up
+to 11x11 and in two bytes each on bigger boards.
+"""
+
+import argparse
+import json
+import mmap
+import struct
+import sys
+from array import array
+
+from imago.data.enums import Player
+from imago.gameLogic.gameData import GameData
+from imago.sgfParser.sgf import readGames
+
+MAGIC = b"IMGR"
+VERSION = 1
+
+# Magic, version, reserved, number of games and offset of the index table
+FILE_HEADER = struct.Struct("<4sHHIQ")
+# Board size, bytes per move, reserved, length of the metadata and number of moves
+GAME_HEADER = struct.Struct("<BBHII")
+INDEX_ENTRY = struct.Struct("<Q")
+TWO_BYTE_MOVE = struct.Struct("<H")
+
+def getMoveBytes(size):
+    """Returns the bytes each move takes on a board of the given size."""
+    if 2 * (size * size + 1) <= 256:
+        return 1
+    return 2
+
+def encodeMove(player, row, col, size):
+    """Returns the code of a move: its point, or size * size for a pass, shifted for
+    white by the number of codes of each player.
+    """
+    code = size * size if row is None else row * size + col
+    if player == Player.WHITE:
+        code += size * size + 1
+    return code
+
+def decodeMove(code, size):
+    """Returns the player, row and column of a move code, row and column being None
+    for a pass.
+    """
+    player = Player.BLACK
+    if code > size * size:
+        player = Player.WHITE
+        code -= size * size + 1
+    if code == size * size:
+        return (player, None, None)
+    return (player, code // size, code % size)
+
+class GameRecordWriter:
+    """Writes game records to a binary file, one GameTree at a time."""
+
+    def __init__(self, path):
+        self.file = open(path, "wb")
+        self.offsets = array("Q")
+        self.file.write(FILE_HEADER.pack(MAGIC, VERSION, 0, 0, 0))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def addGame(self, gameTree):
+        """Appends the main line and data of a game."""
+        self.addRecord(gameTree.gameData, [(move.player, move.row, move.col)
+            for move in gameTree.getMainLine()])
+
+    def addRecord(self, gameData, moves):
+        """Appends the data of a game and its moves as (player, row, col) tuples."""
+        size = gameData.size
+        moveBytes = getMoveBytes(size)
+        codes = [encodeMove(player, row, col, size) for player, row, col in moves]
+        if moveBytes == 1:
+            packedMoves = bytes(codes)
+        else:
+            packedMoves = struct.pack("<%dH" % len(codes), *codes)
+        metadata = json.dumps(vars(gameData)).encode()
+        self.offsets.append(self.file.tell())
+        self.file.write(GAME_HEADER.pack(size, moveBytes, 0, len(metadata), len(codes)))
+        self.file.write(metadata)
+        self.file.write(packedMoves)
+
+    def close(self):
+        """Writes the index table and the header and closes the file."""
+        if self.file is None:
+            return
+        indexOffset = self.file.tell()
+        for offset in self.offsets:
+            self.file.write(INDEX_ENTRY.pack(offset))
+        self.file.seek(0)
+        self.file.write(FILE_HEADER.pack(MAGIC, VERSION, 0, len(self.offsets),
+            indexOffset))
+        self.file.close()
+        self.file = None
+
+class GameRecordReader:
+    """Gives access to the games of a binary file mapped in memory, without reading
+    the games which are not requested.
+    """
+
+    def __init__(self, path):
+        self.file = open(path, "rb")
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, self.gameCount, self.indexOffset = \
+                FILE_HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise Exception("Not a game records file of version %d" % VERSION)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def __len__(self):
+        return self.gameCount
+
+    def getGameHeader(self, index):
+        """Returns the offset, board size, bytes per move, metadata length and number of
+        moves of a game.
+        """
+        if index < 0 or index >= self.gameCount:
+            raise IndexError("Game index out of range")
+        offset, = INDEX_ENTRY.unpack_from(self.map,
+                self.indexOffset + index * INDEX_ENTRY.size)
+        size, moveBytes, _, metadataLength, moveCount = \
+                GAME_HEADER.unpack_from(self.map, offset)
+        return offset, size, moveBytes, metadataLength, moveCount
+
+    def getGameData(self, index):
+        """Returns the GameData of a game."""
+        offset, _, _, metadataLength, _ = self.getGameHeader(index)
+        start = offset + GAME_HEADER.size
+        metadata = json.loads(self.map[start:start + metadataLength].decode())
+        metadata["addedBlack"] = [tuple(point) for point in metadata["addedBlack"]]
+        metadata["addedWhite"] = [tuple(point) for point in metadata["addedWhite"]]
+        return GameData(**metadata)
+
+    def getPackedMoves(self, index):
+        """Returns the board size, the bytes per move and a memoryview of the packed
+        moves of a game, without copying them. The view must be released before
+        closing the reader.
+        """
+        offset, size, moveBytes, metadataLength, moveCount = self.getGameHeader(index)
+        start = offset + GAME_HEADER.size + metadataLength
+        return size, moveBytes, memoryview(self.map)[start:start + moveCount * moveBytes]
+
+    def getMoves(self, index):
+        """Returns the moves of the main line of a game as a list of (player, row, col)
+        tuples, as played by GameState.playMoveHistory.
+        """
+        size, moveBytes, packedMoves = self.getPackedMoves(index)
+        with packedMoves:
+            if moveBytes == 1:
+                codes = list(packedMoves)
+            else:
+                codes = [code for code, in TWO_BYTE_MOVE.iter_unpack(packedMoves)]
+        return [decodeMove(code, size) for code in codes]
+
+    def close(self):
+        """Unmaps and closes the file."""
+        if self.map is not None:
+            self.map.close()
+            self.map = None
+            self.file.close()
+
+def convertSgfFiles(inputPaths, outputPath):
+    """Writes the games of the given SGF files to a binary file and returns how many
+    were written.
+    """
+    count = 0
+    with GameRecordWriter(outputPath) as writer:
+        for inputPath in inputPaths:
+            for gameTree in readGames(inputPath):
+                writer.addGame(gameTree)
+                count += 1
+    return count
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+            description="Convert SGF files to a binary game records file.")
+    parser.add_argument("output", help="binary file to write")
+    parser.add_argument("inputs", nargs="+", help="SGF files to convert")
+    args = parser.parse_args()
+    print("%d games written" % convertSgfFiles(args.inputs, args.output),
+            file=sys.stderr)
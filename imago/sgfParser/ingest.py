@@ -0,0 +1,181 @@
+"""Parallel ingestion of SGF corpora into a binary game records file.
+
+SGF files are found in directories, zip and tar archives and sent to a pool of
+processes. Each worker parses its files with its own reader and validates each game by
+replaying it through a GameState. Valid games are merged into a single game records
+file and the problems found are written to a JSON lines report, one line per rejected
+game or unreadable file.
+"""
+
+import argparse
+import io
+import json
+import os
+import sys
+import tarfile
+import time
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from imago.gameLogic.gameState import GameState
+from imago.sgfParser.gameRecords import GameRecordWriter
+from imago.sgfParser.sgf import readGames
+
+SGF_EXTENSION = ".sgf"
+
+# Files sent to each worker at once
+TASKS_PER_BATCH = 16
+# Batches waiting or being ingested per worker, which bounds the memory used
+BATCHES_PER_WORKER = 2
+
+def isSgfName(name):
+    """Returns True if a file name has the SGF extension."""
+    return name.lower().endswith(SGF_EXTENSION)
+
+def getTasks(source):
+    """Yields the SGF files of a directory, archive or single file as (name, path,
+    member, data) tasks. Files of directories are read by the workers from their path,
+    zip members from the archive and members of tar archives, which can only be read
+    sequentially, are read here and sent as data.
+    """
+    if os.path.isdir(source):
+        for directory, _, fileNames in sorted(os.walk(source)):
+            for fileName in sorted(fileNames):
+                if isSgfName(fileName):
+                    path = os.path.join(directory, fileName)
+                    yield (path, path, None, None)
+    elif zipfile.is_zipfile(source):
+        with zipfile.ZipFile(source) as archive:
+            for member in archive.namelist():
+                if isSgfName(member):
+                    yield ("%s:%s" % (source, member), source, member, None)
+    elif tarfile.is_tarfile(source):
+        with tarfile.open(source) as archive:
+            for member in archive:
+                if member.isfile() and isSgfName(member.name):
+                    data = archive.extractfile(member).read()
+                    yield ("%s:%s" % (source, member.name), source, member.name, data)
+    else:
+        yield (source, source, None, None)
+
+def openTask(path, member, data):
+    """Returns a binary file-like object with the contents of a task."""
+    if data is not None:
+        return io.BytesIO(data)
+    if member is not None:
+        with zipfile.ZipFile(path) as archive:
+            return io.BytesIO(archive.read(member))
+    return open(path, "rb")
+
+def validateGame(gameTree):
+    """Replays the main line of a game through a GameState and returns its moves as
+    (player, row, col) tuples. Raises an Exception on the first illegal move.
+    """
+    gameData = gameTree.gameData
+    state = GameState(gameData.size)
+    state.addSetupStones(gameData.addedBlack, gameData.addedWhite)
+    moves = []
+    for move in gameTree.getMainLine():
+        if move.isPass():
+            state.playPassForPlayer(move.player)
+        elif (not state.isLegalMove(move.row, move.col, move.player)
+            or not state.playMoveForPlayer(move.row, move.col, move.player)):
+            raise Exception("Illegal move %d" % (len(moves) + 1))
+        moves.append((move.player, move.row, move.col))
+    return moves
+
+def ingestTask(task):
+    """Parses and validates the games of a task in a worker process. Returns the name of
+    the task, its valid games as (gameData, moves) pairs and its errors as dictionaries.
+    """
+    name, path, member, data = task
+    games = []
+    errors = []
+    gameIndex = 0
+    try:
+        with openTask(path, member, data) as sgfFile:
+            for gameTree in readGames(sgfFile):
+                try:
+                    games.append((gameTree.gameData, validateGame(gameTree)))
+                except Exception as error:
+                    errors.append({"file": name, "game": gameIndex, "error": str(error)})
+                gameIndex += 1
+    except Exception as error:
+        # Games after a syntax error can not be told apart
+        errors.append({"file": name, "game": gameIndex, "error": str(error)})
+    return name, games, errors
+
+def ingestBatch(tasks):
+    """Ingests several tasks in a worker process."""
+    return [ingestTask(task) for task in tasks]
+
+def getBatches(sources):
+    """Yields the tasks of the given sources in lists of TASKS_PER_BATCH."""
+    batch = []
+    for source in sources:
+        for task in getTasks(source):
+            batch.append(task)
+            if len(batch) == TASKS_PER_BATCH:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+def getResults(pool, batches, maxPending):
+    """Yields the results of ingesting the batches in the pool in their order, with at
+    most maxPending batches submitted at once.
+    """
+    pending = deque()
+    for batch in batches:
+        pending.append(pool.submit(ingestBatch, batch))
+        if len(pending) >= maxPending:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+def ingestCorpus(sources, outputPath, errorsPath, workers=None):
+    """Ingests the SGF files of the given directories, archives or files with a pool of
+    worker processes, all the cores by default. Valid games are written to a game
+    records file and errors to a JSON lines file. Returns the number of files, games
+    and errors.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    files = 0
+    games = 0
+    errors = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool, \
+            GameRecordWriter(outputPath) as writer, \
+            open(errorsPath, "w") as errorsFile:
+        # Results are merged in the order of the files
+        for results in getResults(pool, getBatches(sources),
+                workers * BATCHES_PER_WORKER):
+            for _, taskGames, taskErrors in results:
+                files += 1
+                for gameData, moves in taskGames:
+                    writer.addRecord(gameData, moves)
+                games += len(taskGames)
+                for error in taskErrors:
+                    errorsFile.write(json.dumps(error) + "\n")
+                errors += len(taskErrors)
+    return files, games, errors
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+            description="Ingest SGF files into a binary game records file.")
+    parser.add_argument("output", help="game records file to write")
+    parser.add_argument("sources", nargs="+",
+            help="directories, zip or tar archives or SGF files to ingest")
+    parser.add_argument("--errors", default="errors.jsonl",
+            help="JSON lines file for the errors found")
+    parser.add_argument("--workers", type=int, default=None,
+            help="worker processes, all the cores by default")
+    args = parser.parse_args()
+
+    startTime = time.perf_counter()
+    nFiles, nGames, nErrors = ingestCorpus(args.sources, args.output, args.errors,
+            args.workers)
+    seconds = time.perf_counter() - startTime
+    print("%d files, %d games, %d errors in %.2f s (%.1f games/s)" % (
+        nFiles, nGames, nErrors, seconds, nGames / seconds), file=sys.stderr)
@@ -1,11 +1,371 @@
 """Module for reading and writing of SGF files."""
 
-from imago.gameLogic.gameTree import GameTree
+import codecs
+import os
+import re
+
+from imago.data.enums import Player
 from imago.gameLogic.gameMove import GameMove
+from imago.gameLogic.gameTree import GameTree
+
+# Characters read from the source at once
+CHUNK_SIZE = 2**16
+
+DEF_ENCODING = "utf-8"
+
+# Game information properties and the GameData attributes storing them
+GAME_DATA_PROPERTIES = {
+    "AN": "annotator",
+    "BR": "blackRank",
+    "WR": "whiteRank",
+    "PB": "blackName",
+    "PW": "whiteName",
+    "BT": "blackTeam",
+    "WT": "whiteTeam",
+    "CP": "copyrightInfo",
+    "DT": "date",
+    "EV": "event",
+    "GN": "name",
+    "GC": "gameComment",
+    "ON": "openingInfo",
+    "OT": "overtimeInfo",
+    "PC": "placeInfo",
+    "RE": "result",
+    "RO": "roundInfo",
+    "RU": "rules",
+    "SO": "source",
+    "TM": "timeInfo",
+    "US": "user"
+}
+
+# Properties written before the game information ones
+SGF_HEADER = "GM[1]FF[4]CA[UTF-8]"
+
+# Brackets, parentheses and escapes, the characters delimiting games and values
+DELIMITER_PATTERN = re.compile(r"[\[\]\\()]")
+# A parenthesis, a semicolon or a property with its values
+TOKEN_PATTERN = re.compile(
+        r"\s*(?:([();])|([A-Za-z]+)\s*((?:\[(?:[^\]\\]|\\.)*\]\s*)+))", re.DOTALL)
+VALUE_PATTERN = re.compile(r"\[((?:[^\]\\]|\\.)*)\]", re.DOTALL)
+# Escaped characters and soft line breaks, which are removed
+ESCAPE_PATTERN = re.compile(r"\\(\r\n|\n\r|\n|\r|.)", re.DOTALL)
+
+def readGames(source, encoding=DEF_ENCODING, chunkSize=CHUNK_SIZE):
+    """Yields the GameTree of each game of an SGF collection, given as a path or as a
+    file-like object in text or binary mode. The source is read in chunks and only the
+    text of the game being parsed is kept in memory.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as sgfFile:
+            yield from readGames(sgfFile, encoding, chunkSize)
+        return
+    for text in splitGames(readChunks(source, encoding, chunkSize)):
+        yield parseGame(text)
+
+def loadGameTree(filename):
+    """Returns the GameTree of the first game of an SGF file, or None if it has none."""
+    games = readGames(filename)
+    try:
+        return next(games, None)
+    finally:
+        games.close()
+
+def readChunks(sgfFile, encoding=DEF_ENCODING, chunkSize=CHUNK_SIZE):
+    """Yields the text of a file-like object in chunks, decoding it if it is binary."""
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    while True:
+        chunk = sgfFile.read(chunkSize)
+        if not chunk:
+            break
+        if isinstance(chunk, bytes):
+            chunk = decoder.decode(chunk)
+        yield chunk
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+def splitGames(chunks):
+    """Yields the text of each top level game tree found in a sequence of text chunks.
+    Text outside game trees is skipped.
+    """
+    depth = 0
+    inValue = False
+    escapedPosition = -1
+    offset = 0
+    parts = []
+    for chunk in chunks:
+        gameStart = 0
+        for match in DELIMITER_PATTERN.finditer(chunk):
+            position = offset + match.start()
+            if position == escapedPosition:
+                continue
+            char = match.group()
+            if inValue:
+                if char == "\\":
+                    escapedPosition = position + 1
+                elif char == "]":
+                    inValue = False
+            elif char == "[":
+                inValue = depth > 0
+            elif char == "(":
+                if depth == 0:
+                    gameStart = match.start()
+                depth += 1
+            elif char == ")" and depth > 0:
+                depth -= 1
+                if depth == 0:
+                    parts.append(chunk[gameStart:match.end()])
+                    yield "".join(parts)
+                    parts = []
+        if depth > 0:
+            parts.append(chunk[gameStart:])
+        offset += len(chunk)
+    if depth > 0:
+        raise Exception("Unfinished SGF game tree")
+
+def parseGame(text):
+    """Returns the GameTree of the text of a single SGF game tree.
+
+    Nodes are read one after another keeping a stack with the last move before each
+    open variation, so deep games need no recursion.
+    """
+    gameTree = GameTree()
+    # Last move of the current sequence, None before the first move
+    lastMove = None
+    variationStarts = []
+    node = None
+    isRoot = True
+    position = 0
+    while True:
+        match = TOKEN_PATTERN.match(text, position)
+        if match is None:
+            if text[position:].strip():
+                raise Exception("Malformed SGF at character %d" % position)
+            break
+        position = match.end()
+        symbol, propId, values = match.groups()
+        if symbol is None:
+            if node is None:
+                raise Exception("SGF property outside of a node at character %d"
+                        % position)
+            node[propId] = [ESCAPE_PATTERN.sub(unescape, value) if "\\" in value
+                    else value for value in VALUE_PATTERN.findall(values)]
+            continue
+        if node is not None:
+            if isRoot:
+                loadGameData(gameTree.gameData, node)
+                isRoot = False
+            lastMove = addNodeMove(gameTree, lastMove, node)
+            node = None
+        if symbol == ";":
+            node = {}
+        elif symbol == "(":
+            variationStarts.append(lastMove)
+        else:
+            if not variationStarts:
+                raise Exception("Unbalanced SGF parenthesis at character %d" % position)
+            lastMove = variationStarts.pop()
+    if variationStarts:
+        raise Exception("Unfinished SGF game tree")
+    return gameTree
+
+def unescape(match):
+    """Returns the character of an escape sequence, nothing for soft line breaks."""
+    char = match.group(1)
+    if char in ("\r\n", "\n\r", "\n", "\r"):
+        return ""
+    return char
+
+def loadGameData(gameData, node):
+    """Stores the game information properties of the root node of a game."""
+    if node.get("GM", ["1"])[0] != "1":
+        raise Exception("SGF game is not of Go")
+    if "SZ" in node:
+        gameData.size = int(node["SZ"][0].split(":")[0])
+    if "KM" in node:
+        gameData.komi = float(node["KM"][0])
+    for propId, attribute in GAME_DATA_PROPERTIES.items():
+        if propId in node:
+            setattr(gameData, attribute, node[propId][0])
+    for value in node.get("AB", []):
+        gameData.addedBlack.extend(parsePointList(value, gameData.size))
+    for value in node.get("AW", []):
+        gameData.addedWhite.extend(parsePointList(value, gameData.size))
+
+def addNodeMove(gameTree, lastMove, node):
+    """Adds the move of a node after the given move, or as a first move if it is None,
+    and returns it. Nodes without a move leave the last move as it was.
+    """
+    if "B" in node:
+        player = Player.BLACK
+        value = node["B"][0]
+    elif "W" in node:
+        player = Player.WHITE
+        value = node["W"][0]
+    else:
+        return lastMove
+    vertex = parsePoint(value, gameTree.gameData.size)
+    row, col = (None, None) if vertex is None else vertex
+    if lastMove is None:
+        move = GameMove(player, row, col)
+        gameTree.firstMoves.append(move)
+        return move
+    return lastMove.addMove(player, row, col)
+
+def writeGameTree(gameTree, sgfFile):
+    """Writes a game with all its variations to a text file-like object."""
+    sgfFile.write(gameTreeToSgf(gameTree))
+
+def saveGameTree(gameTree, filename):
+    """Saves a game with all its variations to an SGF file."""
+    with open(filename, "w", encoding=DEF_ENCODING) as sgfFile:
+        writeGameTree(gameTree, sgfFile)
+
+def gameTreeToSgf(gameTree):
+    """Returns the SGF text of a game with all its variations.
+
+    The tree is walked with an explicit stack holding moves still to write and the
+    parentheses closing their variations, so deep games need no recursion.
+    """
+    size = gameTree.gameData.size
+    parts = ["(", gameDataToSgf(gameTree.gameData)]
+    pending = [")\n"]
+    pushVariations(pending, gameTree.firstMoves)
+    while pending:
+        item = pending.pop()
+        if isinstance(item, str):
+            parts.append(item)
+            continue
+        parts.append(moveToSgf(item.player, item.row, item.col, size))
+        pushVariations(pending, item.nextMoves)
+    return "".join(parts)
+
+def pushVariations(pending, moves):
+    """Adds to the stack of pending items the next moves of a sequence, each one in its
+    own variation if there are several.
+    """
+    if len(moves) == 1:
+        pending.append(moves[0])
+        return
+    for move in reversed(moves):
+        pending.append(")")
+        pending.append(move)
+        pending.append("(")
+
+def gameDataToSgf(gameData):
+    """Returns the SGF root node with the information of a game."""
+    parts = [";", SGF_HEADER, "SZ[%d]" % gameData.size]
+    if gameData.komi is not None:
+        parts.append("KM[%g]" % gameData.komi)
+    for propId, attribute in GAME_DATA_PROPERTIES.items():
+        value = getattr(gameData, attribute)
+        # Unknown ranks and results are the default
+        if value is not None and value != "?":
+            parts.append("%s[%s]" % (propId, escapeValue(str(value))))
+    for propId, points in (("AB", gameData.addedBlack), ("AW", gameData.addedWhite)):
+        if points:
+            parts.append(propId + "".join("[%s]" % pointToSgf(row, col)
+                for row, col in points))
+    return "".join(parts)
+
+def moveToSgf(player, row, col, size):
+    """Returns the SGF node of a move, row and column being None for a pass."""
+    propId = "B" if player == Player.BLACK else "W"
+    if row is None:
+        return ";%s[]" % propId
+    return ";%s[%s]" % (propId, pointToSgf(row, col))
+
+def pointToSgf(row, col):
+    """Returns the SGF point of a row and column."""
+    return chr(ord("a") + col) + chr(ord("a") + row)
+
+def escapeValue(text):
+    """Escapes the characters which end or escape an SGF value."""
+    return text.replace("\\", "\\\\").replace("]", "\\]")
+
+class SgfRecorder:
+    """Appends games to an SGF file move by move, as they are played.
+
+    The file always ends with the parenthesis closing the game being recorded, so it is
+    a valid SGF collection after every move. Undone moves are truncated away.
+    """
+
+    def __init__(self, filename):
+        mode = "r+b" if os.path.exists(filename) else "w+b"
+        self.file = open(filename, mode)
+        self.size = None
+        self.moveOffsets = []
+        # Position of the closing parenthesis of the game, None if there is no game
+        self.endOffset = None
+
+    def isRecording(self):
+        """Returns True if a game is being recorded."""
+        return self.endOffset is not None
+
+    def startGame(self, gameData):
+        """Starts recording a new game after the end of the file."""
+        self.endGame()
+        self.file.seek(0, os.SEEK_END)
+        self.size = gameData.size
+        self.moveOffsets = []
+        self.write("(" + gameDataToSgf(gameData))
+
+    def addMove(self, player, row, col):
+        """Appends a move of the game, row and column being None for a pass."""
+        self.moveOffsets.append(self.endOffset)
+        self.file.seek(self.endOffset)
+        self.write(moveToSgf(player, row, col, self.size))
+
+    def undo(self):
+        """Removes the last move of the game, if there is one."""
+        if not self.moveOffsets:
+            return
+        self.file.seek(self.moveOffsets.pop())
+        self.write("")
+
+    def endGame(self):
+        """Stops recording the current game, whose moves are kept."""
+        self.endOffset = None
+        self.moveOffsets = []
+
+    def write(self, text):
+        """Writes the text and the end of the game at the current position and drops
+        whatever followed it.
+        """
+        self.file.write(text.encode(DEF_ENCODING))
+        self.endOffset = self.file.tell()
+        self.file.write(b")\n")
+        self.file.truncate()
+        self.file.flush()
+
+    def close(self):
+        """Closes the file."""
+        self.endGame()
+        self.file.close()
+
+def parsePoint(value, size):
+    """Returns the row and column of an SGF point or None for a pass, which is empty or
+    tt on boards up to 19x19. The first letter is the column and the second one the
+    row, a being the top left corner.
+    """
+    value = value.strip()
+    if value == "" or (value == "tt" and size <= 19):
+        return None
+    if len(value) != 2:
+        raise Exception("Wrong SGF point %s" % value)
+    col = ord(value[0]) - ord("a")
+    row = ord(value[1]) - ord("a")
+    if row < 0 or col < 0 or row >= size or col >= size:
+        raise Exception("Wrong SGF point %s" % value)
+    return (row, col)
 
-# def loadGameTree(filename):
-# PLY?
-#     """Parses a GameTree instance from a source SGF file."""
-#     sgf = open(filename, "r")
-#
-#     a = GameTree()
+def parsePointList(value, size):
+    """Returns the points of an SGF point or a compressed rectangle of points like
+    aa:cc.
+    """
+    if ":" not in value:
+        return [parsePoint(value, size)]
+    first, second = (parsePoint(corner, size) for corner in value.split(":"))
+    return [(row, col)
+            for row in range(min(first[0], second[0]), max(first[0], second[0]) + 1)
+            for col in range(min(first[1], second[1]), max(first[1], second[1]) + 1)]
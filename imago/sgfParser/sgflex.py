@@ -74,8 +74,6 @@ def t_error(t):
 #B[bb]
 #'''
 
-lexer = lex.lex()
-#lexer.input(data)
-
-#for token in lexer:
-#    print(token)
+def getLexer():
+    """Builds a new lexer, so that each process or thread can have its own."""
+    return lex.lex()
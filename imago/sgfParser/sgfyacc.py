@@ -7,8 +7,8 @@
 
 import ply.yacc as yacc
 
-from sgflex import tokens
-from astNode import ASTNode, Property
+from imago.sgfParser.sgflex import tokens, getLexer
+from imago.sgfParser.astNode import ASTNode, Property
 
 def p_tree(p):
     '''tree : LPAREN node RPAREN
@@ -47,15 +47,26 @@ def p_error(_):
     """Error rule for syntax errors"""
     print("Syntax error in input!")
 
-# Build the parser
-parser = yacc.yacc()
-
-while True:
-    try:
-        s = input('calc > ')
-    except EOFError:
-        break
-    if not s:
-        continue
-    result = parser.parse(s)
-    print(result.toString())
+def getParser():
+    """Builds the parser."""
+    return yacc.yacc()
+
+def parseText(text, parser=None):
+    """Returns the syntax tree of the SGF text of a game. A new lexer is used for each
+    text, and a new parser too if none is given.
+    """
+    if parser is None:
+        parser = getParser()
+    return parser.parse(text, lexer=getLexer())
+
+if __name__ == "__main__":
+    parser = getParser()
+    while True:
+        try:
+            s = input('calc > ')
+        except EOFError:
+            break
+        if not s:
+            continue
+        result = parseText(s, parser)
+        print(result.toString())
@@ -2,8 +2,72 @@
 
 """Run the Imago engine."""
 
+import argparse
+import asyncio
+import sys
+
+from imago import instrumentation
+from imago.data.enums import ScoringRule
+from imago.engine.core import GameEngine, DEF_PLAYOUTS, DEF_TIME_LIMIT, DEF_TABLE_SIZE
+from imago.engine.gtpServer import GtpServer
 from imago.engine.imagoIO import ImagoIO
+from imago.engine.openingBook import OpeningBook
+from imago.sgfParser.sgf import SgfRecorder
 
 if __name__ == "__main__":
-    io = ImagoIO()
+    parser = argparse.ArgumentParser(description="Imago GTP engine.")
+    parser.add_argument("--playouts", type=int, default=DEF_PLAYOUTS,
+            help="maximum playouts per move")
+    parser.add_argument("--time", type=float, default=DEF_TIME_LIMIT,
+            help="maximum seconds of search per move, 0 for no limit")
+    parser.add_argument("--seed", type=int, default=None,
+            help="seed for the random number generator")
+    parser.add_argument("--workers", type=int, default=1,
+            help="processes searching in parallel on each move")
+    parser.add_argument("--tt-size", type=float, default=DEF_TABLE_SIZE,
+            help="megabytes of the transposition table, 0 to disable it")
+    parser.add_argument("--ponder", action="store_true",
+            help="keep searching while waiting for the opponent's move")
+    parser.add_argument("--scoring", choices=("area", "territory"), default="area",
+            help="rules counting the final score")
+    parser.add_argument("--record", default=None,
+            help="SGF file the games played are appended to as they are played")
+    parser.add_argument("--book", default=None,
+            help="opening book file whose moves are played without searching")
+    parser.add_argument("--port", type=int, default=None,
+            help="serve GTP sessions on this TCP port instead of the standard input")
+    parser.add_argument("--host", default="127.0.0.1",
+            help="address the TCP port is opened on")
+    parser.add_argument("--socket", default=None,
+            help="serve GTP sessions on this Unix socket instead of the standard input")
+    parser.add_argument("--pool", type=int, default=None,
+            help="worker processes shared by the sessions served, all the cores by "
+            "default")
+    parser.add_argument("--stats", action="store_true",
+            help="count the work of the engine, shown by the imago_stats GTP command")
+    parser.add_argument("--profile", action="store_true",
+            help="print cProfile statistics of each genmove on the standard error")
+    args = parser.parse_args()
+
+    instrumentation.setEnabled(args.stats)
+
+    if args.port is not None or args.socket is not None:
+        server = GtpServer(args.pool, (args.playouts, args.time or None, args.seed, 1,
+            args.tt_size, ScoringRule[args.scoring.upper()]))
+        try:
+            asyncio.run(server.serveForever(args.host, args.port, args.socket))
+        except KeyboardInterrupt:
+            pass
+        sys.exit(0)
+
+    book = None
+    if args.book is not None:
+        book = OpeningBook(args.book)
+    engine = GameEngine(args.playouts, args.time or None, args.seed, args.workers,
+            args.tt_size, ScoringRule[args.scoring.upper()], book)
+    recorder = None
+    if args.record is not None:
+        recorder = SgfRecorder(args.record)
+    io = ImagoIO(engine, args.ponder, recorder)
+    io.profile = args.profile
     io.start()
@@ -0,0 +1,39 @@
+#!/usr/bin/python
+
+"""Make the Imago engine play against itself."""
+
+import argparse
+import sys
+
+from imago.engine.core import DEF_KOMI
+from imago.engine.monteCarlo import DEF_PLAYOUTS
+from imago.engine.selfPlay import runSelfPlay
+
+def reportProgress(games, moves, seconds):
+    """Prints the games finished and the rates reached so far."""
+    print("%d games, %d moves in %.1f s (%.1f games/hour, %.1f moves/s)" % (
+        games, moves, seconds, games * 3600 / seconds, moves / seconds),
+        file=sys.stderr)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Imago self-play games.")
+    parser.add_argument("--games", type=int, default=10,
+            help="number of games to play")
+    parser.add_argument("--size", type=int, default=9,
+            help="size of the board")
+    parser.add_argument("--komi", type=float, default=DEF_KOMI,
+            help="komi of the games")
+    parser.add_argument("--playouts", type=int, default=DEF_PLAYOUTS,
+            help="playouts per move")
+    parser.add_argument("--workers", type=int, default=None,
+            help="games played at once, all the cores by default")
+    parser.add_argument("--seed", type=int, default=None,
+            help="seed for the random number generators")
+    parser.add_argument("--results", default="selfplay.jsonl",
+            help="JSON lines file the results are appended to")
+    parser.add_argument("--records", default="selfplay.sgf",
+            help="SGF file the games are appended to")
+    args = parser.parse_args()
+
+    runSelfPlay(args.games, args.size, args.komi, args.playouts, args.workers,
+            args.seed, args.results, args.records, reportProgress)
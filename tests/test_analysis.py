@@ -0,0 +1,84 @@
+"""Tests for analysis module."""
+
+import io
+import json
+import os
+import tempfile
+import unittest
+
+from imago.data.enums import Player
+from imago.engine.analysis import Position, analyzePositions, readJsonPositions, \
+        readSgfPositions, setPosition
+from imago.engine.core import GameEngine
+
+TEST_BOARD_SIZE = 5
+
+TEST_POSITIONS = """{"id": "a", "size": 5, "moves": [["B", "C3"], ["W", "B2"]]}
+{"id": "b", "size": 5, "moves": [["B", "C3"]]}
+
+{"size": 5, "moves": [["B", "C3"], ["W", "C3"]]}
+not a position
+{"id": "c", "size": 5, "moves": [["B", "pass"]], "player": "b"}
+{"id": "d", "size": 5, "setup": [["B", "C3"]], "moves": [["W", "C3"]]}
+"""
+
+class TestAnalysis(unittest.TestCase):
+    """Test analysis module."""
+
+    def testSetPosition(self):
+        """Test going between positions undoes only the moves they do not share."""
+        engine = GameEngine(playouts=10, timeLimit=None, seed=1)
+        first = Position("a", TEST_BOARD_SIZE, 0.5, [(Player.BLACK, 2, 2),
+            (Player.WHITE, 1, 1), (Player.BLACK, 3, 3)])
+        second = Position("b", TEST_BOARD_SIZE, 0.5, [(Player.BLACK, 2, 2),
+            (Player.WHITE, 1, 3)])
+        moves = setPosition(engine, [], first)
+        firstMove = engine.gameState.lastMove.previousMove.previousMove
+        moves = setPosition(engine, moves, second)
+        self.assertEqual(moves, list(second.moves))
+        self.assertEqual(second.player, Player.BLACK)
+        self.assertIs(engine.gameState.lastMove.previousMove, firstMove)
+
+    def testAnalyzePositions(self):
+        """Test results are written in order, with errors for wrong positions."""
+        output = io.StringIO()
+        count, _ = analyzePositions(readJsonPositions(io.StringIO(TEST_POSITIONS)),
+                output, workers=2, engineOptions=(50, None, 1))
+        results = [json.loads(line) for line in output.getvalue().splitlines()]
+        self.assertEqual(count, 6)
+        self.assertEqual([result["id"] for result in results],
+                ["a", "b", 4, 5, "c", "d"])
+        self.assertEqual([result["player"] for result in results[:2]], ["B", "W"])
+        self.assertGreaterEqual(results[0]["visits"], 50)
+        self.assertEqual(results[0]["pv"][0], results[0]["move"])
+        self.assertLessEqual(results[0]["winrate"], 1)
+        self.assertEqual(results[2]["error"], "Illegal move 2")
+        self.assertIn("error", results[3])
+        self.assertEqual(results[4]["player"], "B")
+        self.assertEqual(results[5]["error"], "Illegal move 1")
+
+    def testSetupStones(self):
+        """Test setup stones of SGF games are placed before the moves."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "handicap.sgf")
+            with open(path, "w") as sgfFile:
+                sgfFile.write("(;SZ[5]KM[0.5]AB[aa][ee]AW[cc];W[bb])")
+            positions = list(readSgfPositions(path, everyMove=True))
+        self.assertEqual(len(positions), 2)
+        self.assertEqual(positions[1].setupStones, ([(0, 0), (4, 4)], [(2, 2)]))
+
+        engine = GameEngine(playouts=10, timeLimit=None, seed=1)
+        moves = setPosition(engine, [], positions[1])
+        board = engine.gameState.getBoard()
+        self.assertEqual(board.getPlayer(4, 4), Player.BLACK)
+        self.assertEqual(board.getPlayer(2, 2), Player.WHITE)
+        self.assertEqual(board.getPlayer(1, 1), Player.WHITE)
+        moves = setPosition(engine, moves, positions[0])
+        self.assertEqual(moves, [])
+        self.assertEqual(engine.gameState.getBoard().getPlayer(4, 4), Player.BLACK)
+
+        setPosition(engine, moves, Position("empty", TEST_BOARD_SIZE, 0.5, []))
+        self.assertEqual(engine.gameState.getBoard().getPlayer(4, 4), Player.EMPTY)
+
+if __name__ == '__main__':
+    unittest.main()
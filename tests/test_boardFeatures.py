@@ -0,0 +1,72 @@
+"""Tests for boardFeatures module."""
+
+import unittest
+
+from imago.data.enums import Player
+from imago.gameLogic import boardFeatures
+from imago.gameLogic.boardFeatures import (getStoneArrays, getLibertyCounts,
+        getFeatures, getAreaScores, getInfluence)
+from imago.gameLogic.gameState import GameState
+from imago.gameLogic.scoring import scoreArea
+
+TEST_BOARD_SIZE = 5
+
+@unittest.skipIf(boardFeatures.np is None, "NumPy is not installed")
+class TestBoardFeatures(unittest.TestCase):
+    """Test boardFeatures module."""
+
+    def testLibertyCounts(self):
+        """Test liberty counts match those of the groups of the boards."""
+        first = GameState(TEST_BOARD_SIZE)
+        for row, col in ((0, 0), (2, 2), (0, 1), (2, 3), (1, 0), (3, 2), (4, 4)):
+            first.playMove(row, col)
+        second = GameState(TEST_BOARD_SIZE)
+        second.playMove(2, 2)
+        boards = [first.getBoard(), second.getBoard()]
+        liberties = getLibertyCounts(getStoneArrays(boards))
+        for index, board in enumerate(boards):
+            for row in range(TEST_BOARD_SIZE):
+                for col in range(TEST_BOARD_SIZE):
+                    expected = board.getGroupLibertyCount(row, col)
+                    if board.getPlayer(row, col) == Player.EMPTY:
+                        expected = 0
+                    self.assertEqual(liberties[index, row, col], expected)
+
+    def testFeatures(self):
+        """Test the feature planes of a position with a ko."""
+        state = GameState(TEST_BOARD_SIZE)
+        for row, col in ((0, 1), (0, 2), (1, 0), (1, 3), (2, 1), (2, 2), (3, 3),
+                (1, 1), (1, 2)):
+            state.playMove(row, col)
+        features = getFeatures([state, GameState(TEST_BOARD_SIZE)])
+        self.assertEqual(features.shape, (2, boardFeatures.N_PLANES,
+            TEST_BOARD_SIZE, TEST_BOARD_SIZE))
+        self.assertEqual(features[0, boardFeatures.BLACK_STONES, 1, 2], 1)
+        self.assertEqual(features[0, boardFeatures.LIBERTIES_1, 1, 2], 1)
+        self.assertEqual(features[0, boardFeatures.KO_POINT, 1, 1], 1)
+        self.assertEqual(features[0, boardFeatures.KO_POINT].sum(), 1)
+        self.assertEqual(features[0, boardFeatures.LAST_MOVE, 1, 2], 1)
+        self.assertEqual(features[0, boardFeatures.SECOND_LAST_MOVE, 1, 1], 1)
+        self.assertEqual(features[1].sum(), 0)
+
+    def testAreaScores(self):
+        """Test area scores match those of finished playouts."""
+        state = GameState(TEST_BOARD_SIZE)
+        for row in range(TEST_BOARD_SIZE):
+            state.playMoveForPlayer(row, 1, Player.BLACK)
+            state.playMoveForPlayer(row, 3, Player.WHITE)
+        scores = getAreaScores(getStoneArrays([state.getBoard()]))
+        self.assertEqual(tuple(scores[0]), scoreArea(state.getBoard()))
+
+    def testInfluence(self):
+        """Test each color has influence around its stones."""
+        state = GameState(TEST_BOARD_SIZE)
+        state.playMoveForPlayer(0, 0, Player.BLACK)
+        state.playMoveForPlayer(4, 4, Player.WHITE)
+        influence = getInfluence(getStoneArrays([state.getBoard()]))
+        self.assertGreater(influence[0, 1, 1], 0)
+        self.assertLess(influence[0, 3, 3], 0)
+        self.assertAlmostEqual(float(influence[0, 2, 2]), 0.0, places=5)
+
+if __name__ == '__main__':
+    unittest.main()
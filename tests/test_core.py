@@ -0,0 +1,123 @@
+"""Tests for core module."""
+
+import time
+import unittest
+
+from imago.data.enums import Player
+from imago.engine.core import GameEngine
+
+TEST_BOARD_SIZE = 5
+
+class TestCore(unittest.TestCase):
+    """Test core module."""
+
+    def testPondering(self):
+        """Test the tree searched while pondering is kept for the opponent's move."""
+        engine = GameEngine(playouts=50, timeLimit=None, seed=1)
+        engine.setBoardsize(TEST_BOARD_SIZE)
+        engine.genmove(Player.BLACK)
+        engine.startPondering()
+        time.sleep(0.5)
+        engine.stopPondering()
+        tree = engine.getSearchTree(Player.WHITE)
+        self.assertGreater(tree.visits, 0)
+
+        # The most visited answer is surely expanded
+        best = tree.getBestChild()
+        vertex = engine.gameState.getBoard().toVertex(best.point)
+        engine.play(Player.WHITE, vertex)
+        self.assertIs(engine.getSearchTree(Player.BLACK), best)
+        self.assertIsNone(best.parent)
+        self.assertIsNone(engine.getSearchTree(Player.WHITE))
+
+        previousVisits = best.visits
+        engine.genmove(Player.BLACK)
+        self.assertEqual(best.visits, previousVisits + engine.search.playoutCount)
+
+    def testPonderLimit(self):
+        """Test pondering restarted on the same tree stops at the playouts limit."""
+        engine = GameEngine(playouts=50, timeLimit=None, seed=1)
+        engine.setBoardsize(TEST_BOARD_SIZE)
+        engine.ponderPlayouts = 120
+        for _ in range(3):
+            engine.startPondering()
+            time.sleep(0.2)
+            engine.stopPondering()
+        tree = engine.getSearchTree(Player.BLACK)
+        self.assertEqual(tree.visits, 120)
+        engine.startPondering()
+        self.assertIsNone(engine.ponderThread)
+
+    def testTreeReuse(self):
+        """Test the subtree of each move played is the root of the next search."""
+        engine = GameEngine(playouts=200, timeLimit=None, seed=1)
+        engine.setBoardsize(TEST_BOARD_SIZE)
+        engine.genmove(Player.BLACK)
+        tree = engine.getSearchTree(Player.WHITE)
+        self.assertGreater(tree.visits, 0)
+        self.assertIsNone(tree.parent)
+
+        engine.genmove(Player.WHITE)
+        self.assertEqual(engine.reusedVisits, tree.visits - engine.search.playoutCount)
+        tree = engine.getSearchTree(Player.BLACK)
+        self.assertIsNotNone(tree)
+        self.assertGreater(tree.visits, 0)
+        engine.genmove(Player.BLACK)
+        self.assertGreater(engine.reusedVisits, 0)
+        self.assertEqual(engine.reusedVisits, tree.visits - engine.search.playoutCount)
+
+    def testParallelTreeReuse(self):
+        """Test only the root moves merged by a parallel search count as reused."""
+        engine = GameEngine(playouts=100, timeLimit=None, seed=1, workers=2)
+        try:
+            engine.setBoardsize(TEST_BOARD_SIZE)
+            engine.genmove(Player.BLACK)
+            tree = engine.getSearchTree(Player.WHITE)
+            self.assertGreater(tree.visits, 0)
+            self.assertEqual(tree.children, [])
+            engine.genmove(Player.WHITE)
+            self.assertEqual(engine.reusedVisits, 0)
+
+            root = engine.search.searchRoot(engine.gameState, Player.BLACK)
+            self.assertEqual(engine.search.getReusedVisits(root), root.visits)
+        finally:
+            engine.setWorkers(1)
+
+    def testSearchTreeInvalidation(self):
+        """Test kept trees are not used for other positions."""
+        engine = GameEngine(playouts=50, timeLimit=None, seed=1)
+        engine.setBoardsize(TEST_BOARD_SIZE)
+        engine.startPondering()
+        time.sleep(0.1)
+        engine.stopPondering()
+        self.assertIsNotNone(engine.getSearchTree(Player.BLACK))
+        engine.play(Player.BLACK, [4, 4])
+        engine.undo()
+        self.assertIsNone(engine.getSearchTree(Player.BLACK))
+
+        engine.genmove(Player.BLACK)
+        self.assertIsNotNone(engine.getSearchTree(Player.WHITE))
+        engine.clearBoard()
+        self.assertIsNone(engine.getSearchTree(Player.WHITE))
+        self.assertIsNone(engine.getSearchTree(Player.BLACK))
+
+        engine.genmove(Player.BLACK)
+        engine.setBoardsize(TEST_BOARD_SIZE)
+        self.assertIsNone(engine.getSearchTree(Player.WHITE))
+
+    def testFinalScore(self):
+        """Test the final score and status of stones with a dead stone."""
+        engine = GameEngine(playouts=50, timeLimit=None, seed=1)
+        engine.setBoardsize(TEST_BOARD_SIZE)
+        engine.setKomi(0.5)
+        for row in range(TEST_BOARD_SIZE):
+            engine.play(Player.BLACK, [row, 1])
+            engine.play(Player.WHITE, [row, 3])
+        engine.play(Player.BLACK, [2, 4])
+        self.assertEqual(engine.getFinalScore(), "W+0.5")
+        self.assertEqual(engine.getFinalStatusList("dead"), [[2, 4]])
+        self.assertEqual(len(engine.getFinalStatusList("alive")), 10)
+        self.assertEqual(engine.getFinalStatusList("seki"), [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,152 @@
+"""Tests for gameBoard module."""
+
+import unittest
+
+from imago.data.enums import Player
+from imago.gameLogic.gameBoard import GameBoard
+from imago.gameLogic.symmetry import SYMMETRIES, transformVertex
+
+TEST_BOARD_SIZE = 19
+
+class TestGameBoard(unittest.TestCase):
+    """Test gameBoard module."""
+
+    def testGroupLiberties(self):
+        """Test liberties of groups as stones are placed."""
+        board = GameBoard(TEST_BOARD_SIZE)
+        self.assertEqual(board.getGroupLiberties(0, 0), -1)
+
+        board.placeStone(0, 0, Player.BLACK)
+        self.assertEqual(board.getGroupLiberties(0, 0), {(0, 1), (1, 0)})
+
+        board.placeStone(0, 1, Player.BLACK)
+        self.assertEqual(board.getGroupLiberties(0, 0), {(0, 2), (1, 0), (1, 1)})
+        self.assertEqual(board.getGroupCells(0, 1), {(0, 0), (0, 1)})
+
+        board.placeStone(1, 0, Player.WHITE)
+        self.assertEqual(board.getGroupLibertyCount(0, 0), 2)
+        self.assertEqual(board.getGroupLiberties(1, 0), {(1, 1), (2, 0)})
+
+    def testMergeGroups(self):
+        """Test a stone joining several groups."""
+        board = GameBoard(TEST_BOARD_SIZE)
+        board.placeStone(4, 3, Player.BLACK)
+        board.placeStone(4, 5, Player.BLACK)
+        board.placeStone(3, 4, Player.BLACK)
+        board.placeStone(4, 4, Player.BLACK)
+        self.assertEqual(board.getGroupSize(4, 3), 4)
+        self.assertIs(board.groups[board.toPoint(4, 3)],
+                board.groups[board.toPoint(4, 5)])
+        self.assertEqual(board.getGroupLibertyCount(4, 4), 8)
+
+    def testCapture(self):
+        """Test capturing a group and the liberties given back to its neighbours."""
+        board = GameBoard(TEST_BOARD_SIZE)
+        board.placeStone(0, 0, Player.WHITE)
+        board.placeStone(0, 1, Player.WHITE)
+        board.placeStone(1, 0, Player.BLACK)
+        board.placeStone(1, 1, Player.BLACK)
+        self.assertTrue(board.isInAtari(0, 0))
+        captured = board.placeStone(0, 2, Player.BLACK)
+
+        self.assertEqual(sorted(captured), [(0, 0), (0, 1)])
+        self.assertEqual(board.board[0][0], Player.EMPTY)
+        self.assertEqual(board.getGroupLiberties(0, 0), -1)
+        self.assertEqual(board.capturesBlack, 2)
+        self.assertIn((0, 0), board.getGroupLiberties(1, 0))
+        self.assertIn((0, 1), board.getGroupLiberties(0, 2))
+
+        board.revertStone(0, 2, captured, (1, 1))
+        self.assertEqual(board.lastStone, (1, 1))
+        self.assertEqual(board.board[0][0], Player.WHITE)
+        self.assertEqual(board.capturesBlack, 0)
+        self.assertEqual(board.moveCapture(0, 2, Player.BLACK), 2)
+        self.assertEqual(board.lastStone, (0, 2))
+
+    def testSuicide(self):
+        """Test detection of suicide moves."""
+        board = GameBoard(TEST_BOARD_SIZE)
+        board.placeStone(0, 1, Player.BLACK)
+        board.placeStone(1, 0, Player.BLACK)
+        self.assertTrue(board.isSuicide(0, 0, Player.WHITE))
+        self.assertFalse(board.isSuicide(0, 0, Player.BLACK))
+
+        # Playing inside is legal if it captures
+        board.placeStone(0, 2, Player.WHITE)
+        board.placeStone(1, 1, Player.WHITE)
+        board.placeStone(2, 0, Player.WHITE)
+        self.assertFalse(board.isSuicide(0, 0, Player.WHITE))
+
+    def testDeepCopy(self):
+        """Test copies do not share groups with the original board."""
+        board = GameBoard(TEST_BOARD_SIZE)
+        board.placeStone(3, 3, Player.BLACK)
+        copy = board.getDeepCopy()
+        copy.placeStone(3, 4, Player.BLACK)
+        self.assertEqual(board.getGroupSize(3, 3), 1)
+        self.assertEqual(copy.getGroupSize(3, 3), 2)
+        self.assertIs(copy.groups[copy.toPoint(3, 3)],
+                copy.groups[copy.toPoint(3, 4)])
+
+    def testCanonicalHash(self):
+        """Test symmetric positions share their canonical hash through captures and
+        reverted stones, and vertices are mapped to and from the canonical position.
+        """
+        stones = [(0, 1, Player.BLACK), (1, 2, Player.BLACK), (0, 2, Player.WHITE),
+                (5, 3, Player.WHITE), (1, 0, Player.WHITE)]
+        boards = []
+        for symmetry in range(SYMMETRIES):
+            board = GameBoard(TEST_BOARD_SIZE)
+            for row, col, player in stones:
+                board.placeStone(*transformVertex(row, col, TEST_BOARD_SIZE, symmetry),
+                        player)
+            boards.append(board)
+        canonicalHash, symmetry = boards[0].getCanonicalHash(Player.WHITE)
+        self.assertEqual(boards[0].getSymmetricHashes()[0], boards[0].getHash())
+        self.assertEqual(boards[symmetry].getHash(Player.WHITE), canonicalHash)
+        for board in boards:
+            self.assertEqual(board.getCanonicalHash(Player.WHITE)[0], canonicalHash)
+            self.assertNotEqual(board.getCanonicalHash()[0], canonicalHash)
+
+        board = boards[3]
+        _, symmetry = board.getCanonicalHash()
+        vertex = board.toCanonicalVertex(4, 7, symmetry)
+        self.assertEqual(board.fromCanonicalVertex(*vertex, symmetry), (4, 7))
+
+        captured = board.placeStone(*transformVertex(0, 3, TEST_BOARD_SIZE, 3),
+                Player.BLACK)
+        self.assertEqual(len(captured), 1)
+        board.revertStone(*transformVertex(0, 3, TEST_BOARD_SIZE, 3), captured)
+        self.assertEqual(board.getCanonicalHash()[0], boards[0].getCanonicalHash()[0])
+        board.captureGroup(*transformVertex(5, 3, TEST_BOARD_SIZE, 3))
+        boards[0].captureGroup(5, 3)
+        self.assertEqual(board.getCanonicalHash()[0], boards[0].getCanonicalHash()[0])
+
+    def testBigGroup(self):
+        """Test groups spanning the whole board."""
+        board = GameBoard(TEST_BOARD_SIZE)
+        for row in range(TEST_BOARD_SIZE):
+            for col in range(TEST_BOARD_SIZE):
+                if col != 1 or row == 0:
+                    board.placeStone(row, col, Player.BLACK)
+        self.assertEqual(board.getGroupLibertyCount(0, 0), TEST_BOARD_SIZE - 1)
+        self.assertEqual(board.getGroupSize(TEST_BOARD_SIZE-1, TEST_BOARD_SIZE-1),
+                TEST_BOARD_SIZE * TEST_BOARD_SIZE - (TEST_BOARD_SIZE - 1))
+
+    def testBoardView(self):
+        """Test reading cells through the board[row][col] view."""
+        board = GameBoard(TEST_BOARD_SIZE)
+        board.placeStone(0, TEST_BOARD_SIZE-1, Player.WHITE)
+        board.placeStone(TEST_BOARD_SIZE-1, 0, Player.BLACK)
+        self.assertEqual(len(board.board), TEST_BOARD_SIZE)
+        self.assertEqual(board.board[0][TEST_BOARD_SIZE-1], Player.WHITE)
+        self.assertEqual(board.board[-1][0], Player.BLACK)
+        self.assertEqual(board.board[0][0], Player.EMPTY)
+        self.assertEqual(board.getPlayer(TEST_BOARD_SIZE-1, 0), Player.BLACK)
+        self.assertEqual(list(board.board[0])[-2:], [Player.EMPTY, Player.WHITE])
+        self.assertEqual(board.board[0][-2:], [Player.EMPTY, Player.WHITE])
+        with self.assertRaises(IndexError):
+            _ = board.board[0][TEST_BOARD_SIZE]
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+"""Tests for gameRecords module."""
+
+import os
+import tempfile
+import unittest
+
+from imago.data.enums import Player
+from imago.gameLogic.gameState import GameState
+from imago.sgfParser.gameRecords import (GameRecordWriter, GameRecordReader,
+        convertSgfFiles, encodeMove, decodeMove)
+from imago.sgfParser.sgf import readGames
+
+TEST_SGF = """(;SZ[9]KM[7]PB[Black]AB[cc];W[ee];B[ge](;W[];B[gg])(;W[aa]))
+(;SZ[19]RE[B+R];B[pd];W[dp];B[pp];W[dd];B[tt])
+"""
+
+class TestGameRecords(unittest.TestCase):
+    """Test gameRecords module."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.sgfPath = os.path.join(self.directory.name, "games.sgf")
+        with open(self.sgfPath, "w") as sgfFile:
+            sgfFile.write(TEST_SGF)
+        self.recordsPath = os.path.join(self.directory.name, "games.igr")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def testMoveCodes(self):
+        """Test moves and passes of both players survive encoding."""
+        for move in ((Player.BLACK, 0, 0), (Player.WHITE, 18, 18),
+                (Player.BLACK, None, None), (Player.WHITE, None, None)):
+            self.assertEqual(decodeMove(encodeMove(*move, 19), 19), move)
+        self.assertLess(encodeMove(Player.WHITE, None, None, 11), 256)
+
+    def testConvertAndRead(self):
+        """Test converting SGF files and reading the games back."""
+        self.assertEqual(convertSgfFiles([self.sgfPath], self.recordsPath), 2)
+        with GameRecordReader(self.recordsPath) as reader:
+            self.assertEqual(len(reader), 2)
+            gameData = reader.getGameData(0)
+            self.assertEqual(gameData.size, 9)
+            self.assertEqual(gameData.komi, 7)
+            self.assertEqual(gameData.blackName, "Black")
+            self.assertEqual(gameData.addedBlack, [(2, 2)])
+            self.assertEqual(reader.getMoves(0), [(Player.WHITE, 4, 4),
+                (Player.BLACK, 4, 6), (Player.WHITE, None, None),
+                (Player.BLACK, 6, 6)])
+
+            size, moveBytes, packedMoves = reader.getPackedMoves(1)
+            with packedMoves:
+                self.assertEqual((size, moveBytes, len(packedMoves)), (19, 2, 10))
+            self.assertEqual(reader.getGameData(1).result, "B+R")
+            state = GameState(19)
+            self.assertTrue(state.playMoveHistory(reader.getMoves(1)))
+            self.assertTrue(state.lastMove.isPass())
+            with self.assertRaises(IndexError):
+                reader.getMoves(2)
+
+    def testWriter(self):
+        """Test an empty file and games written one at a time."""
+        with GameRecordWriter(self.recordsPath):
+            pass
+        with GameRecordReader(self.recordsPath) as reader:
+            self.assertEqual(len(reader), 0)
+        with GameRecordWriter(self.recordsPath) as writer:
+            for gameTree in readGames(self.sgfPath):
+                writer.addGame(gameTree)
+                writer.addGame(gameTree)
+        with GameRecordReader(self.recordsPath) as reader:
+            self.assertEqual(len(reader), 4)
+            self.assertEqual(reader.getMoves(2), reader.getMoves(3))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,146 @@
+"""Tests for gameState module."""
+
+import random
+import unittest
+
+from imago.data.enums import Player, KoRule
+from imago.gameLogic import gameState
+from imago.gameLogic.gameState import GameState
+
+TEST_BOARD_SIZE = 9
+
+def playRandomGame(state, nMoves, seed):
+    """Plays up to nMoves random legal moves on the state."""
+    rand = random.Random(seed)
+    for _ in range(nMoves):
+        board = state.getBoard().board
+        empty = [(row, col) for row in range(state.size) for col in range(state.size)
+                if board[row][col] == Player.EMPTY]
+        rand.shuffle(empty)
+        for row, col in empty:
+            if state.playMove(row, col):
+                break
+
+def boardContents(board):
+    """Returns a comparable copy of the cells of a board."""
+    return [row[:] for row in board.board]
+
+class TestGameState(unittest.TestCase):
+    """Test gameState module."""
+
+    def testKo(self):
+        """Test a ko can not be retaken immediately."""
+        state = GameState(TEST_BOARD_SIZE)
+        moves = [(1, 0), (0, 2), (0, 1), (2, 2), (2, 1), (1, 3), (1, 2), (1, 1)]
+        for row, col in moves:
+            self.assertTrue(state.playMove(row, col))
+        self.assertEqual(state.lastMove.makesKo, (1, 2))
+        self.assertFalse(state.playMove(1, 2))
+
+    def testSuperko(self):
+        """Test a position can not be repeated even when the simple ko check allows it."""
+        for koRule in KoRule:
+            state = GameState(TEST_BOARD_SIZE, koRule)
+            moves = [(1, 0), (0, 2), (0, 1), (2, 2), (2, 1), (1, 3), (1, 2), (1, 1)]
+            for row, col in moves:
+                self.assertTrue(state.playMove(row, col))
+            state.lastMove.makesKo = None
+            self.assertFalse(state.playMove(1, 2))
+            self.assertTrue(state.playMove(8, 8))
+
+    def testHash(self):
+        """Test the incremental hash matches the hash of the position built again."""
+        state = GameState(TEST_BOARD_SIZE)
+        hashes = []
+        for seed in range(80):
+            hashes.append(state.getHash())
+            board = state.getBoard()
+            player = state.getCurrentPlayer()
+            empty = [(row, col) for row in range(TEST_BOARD_SIZE)
+                    for col in range(TEST_BOARD_SIZE)
+                    if board.getPlayer(row, col) == Player.EMPTY
+                    and not board.isSuicide(row, col, player)]
+            row, col = random.Random(seed).choice(empty)
+            expectedHash = board.getHashAfterMove(row, col, player)
+            if state.playMove(row, col):
+                self.assertEqual(board.getHash(), expectedHash)
+                self.assertEqual(state.getBoardAtMove(state.lastMove).getHash(),
+                        expectedHash)
+            else:
+                hashes.pop()
+        self.assertEqual(state.getHash(),
+                state.getBoard().getHash(state.getCurrentPlayer()))
+        self.assertNotEqual(state.getBoard().getHash(Player.WHITE),
+                state.getBoard().getHash(Player.BLACK))
+        for expectedHash in reversed(hashes):
+            state.undo()
+            self.assertEqual(state.getHash(), expectedHash)
+        self.assertEqual(state.getHash(), 0)
+
+    def testUndo(self):
+        """Test undoing moves gives back the previous positions."""
+        state = GameState(TEST_BOARD_SIZE)
+        positions = []
+        for seed in range(60):
+            positions.append(boardContents(state.getBoard()))
+            playRandomGame(state, 1, seed)
+        for position in reversed(positions):
+            state.undo()
+            self.assertEqual(boardContents(state.getBoard()), position)
+        self.assertIsNone(state.lastMove)
+
+    def testUndoRestoresGroups(self):
+        """Test groups are correct after undoing a capture."""
+        state = GameState(TEST_BOARD_SIZE)
+        for row, col in [(0, 1), (0, 0), (1, 1), (1, 0), (7, 7), (5, 5), (2, 0)]:
+            self.assertTrue(state.playMove(row, col))
+        board = state.getBoard()
+        self.assertEqual(board.board[0][0], Player.EMPTY)
+        self.assertEqual(board.capturesBlack, 2)
+        state.undo()
+        self.assertEqual(board.getGroupCells(0, 0), {(0, 0), (1, 0)})
+        self.assertEqual(board.getGroupLiberties(0, 0), {(2, 0)})
+        self.assertEqual(board.getGroupLiberties(1, 1), {(0, 2), (1, 2), (2, 1)})
+        self.assertEqual(board.capturesBlack, 0)
+
+    def testBoardAtMove(self):
+        """Test rebuilding past positions from snapshots."""
+        state = GameState(TEST_BOARD_SIZE)
+        positions = {}
+        for seed in range(gameState.SNAPSHOT_INTERVAL + 10):
+            playRandomGame(state, 1, seed)
+            positions[state.lastMove] = boardContents(state.getBoard())
+        for move, position in positions.items():
+            self.assertEqual(boardContents(state.getBoardAtMove(move)), position)
+
+    def testSetupStones(self):
+        """Test stones placed before the first move."""
+        state = GameState(TEST_BOARD_SIZE)
+        state.addSetupStones([(2, 2), (2, 6)], [(4, 4)])
+        self.assertEqual(state.getBoard().getPlayer(2, 6), Player.BLACK)
+        self.assertEqual(state.getCurrentPlayer(), Player.BLACK)
+        state.playMoveForPlayer(0, 0, Player.WHITE)
+        self.assertEqual(state.getBoardAtMove(state.lastMove).getPlayer(4, 4),
+                Player.WHITE)
+        with self.assertRaises(Exception):
+            state.addSetupStones([(1, 1)], [])
+
+    def testWrongSetupStones(self):
+        """Test repeated, overlapping and captured setup stones are rejected without
+        changing the board.
+        """
+        for blackVertices, whiteVertices in (
+                ([(2, 2), (2, 2)], []),
+                ([(2, 2)], [(2, 2)]),
+                ([(0, 1), (1, 0)], [(0, 0)]),
+                ([(0, 0)], [(0, 1), (1, 0)])):
+            state = GameState(TEST_BOARD_SIZE)
+            with self.assertRaises(Exception):
+                state.addSetupStones(blackVertices, whiteVertices)
+            self.assertEqual(state.getBoard().getHash(), 0)
+            self.assertEqual(state.getBoard().getPlayer(0, 0), Player.EMPTY)
+            state.addSetupStones([(2, 2)], [(2, 3)])
+            self.assertEqual(state.getBoard().getGroupLibertyCount(2, 2), 3)
+
+if __name__ == '__main__':
+    unittest.main()
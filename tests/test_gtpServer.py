@@ -0,0 +1,114 @@
+"""Tests for gtpServer module."""
+
+import asyncio
+import os
+import tempfile
+import unittest
+
+from imago.engine.gtpServer import GtpServer
+
+TEST_BOARD_SIZE = 5
+
+async def readResponse(reader):
+    """Reads a response up to the empty line ending it."""
+    lines = []
+    while True:
+        line = (await reader.readline()).decode()
+        if line in ("\n", ""):
+            return "".join(lines)
+        lines.append(line)
+
+async def runSession(path, commands):
+    """Sends the commands through a new connection and returns their responses."""
+    reader, writer = await asyncio.open_unix_connection(path)
+    responses = []
+    for command in commands:
+        writer.write((command + "\n").encode())
+        await writer.drain()
+        responses.append(await readResponse(reader))
+    writer.close()
+    return responses
+
+class TestGtpServer(unittest.TestCase):
+    """Test gtpServer module."""
+
+    def testSessions(self):
+        """Test concurrent connections are served by their own engines."""
+        async def serve(path):
+            server = GtpServer(2, (10, None, 1))
+            await server.start(path=path)
+            try:
+                return await asyncio.gather(*(runSession(path, [
+                    "boardsize %d" % TEST_BOARD_SIZE,
+                    "play b %s" % vertex,
+                    "1 genmove w",
+                    "play b %s" % vertex,
+                    "quit"
+                ]) for vertex in ("a1", "b2", "c3")))
+            finally:
+                await server.stop()
+
+        with tempfile.TemporaryDirectory() as directory:
+            sessions = asyncio.run(serve(os.path.join(directory, "gtp.sock")))
+        for responses in sessions:
+            self.assertEqual(responses[:2], ["= \n", "= \n"])
+            self.assertRegex(responses[2], r"^=1 [A-HJ-Z][0-9]+\n$")
+            self.assertEqual(responses[3:], ["? illegal move\n", "= \n"])
+
+    def testQuickCommandDuringSearch(self):
+        """Test a session sharing its worker with one running genmove is answered
+        before the search ends.
+        """
+        async def serve(path):
+            server = GtpServer(1, (100000, 2, 1))
+            await server.start(path=path)
+            try:
+                searching = asyncio.ensure_future(runSession(path, [
+                    "boardsize %d" % TEST_BOARD_SIZE,
+                    "genmove b"
+                ]))
+                await asyncio.sleep(0.5)
+                quick = await runSession(path, ["1 protocol_version", "2 play b a1"])
+                searchDone = searching.done()
+                await searching
+                return quick, searchDone
+            finally:
+                await server.stop()
+
+        with tempfile.TemporaryDirectory() as directory:
+            quick, searchDone = asyncio.run(serve(os.path.join(directory, "gtp.sock")))
+        self.assertEqual(quick, ["=1 2\n", "=2 \n"])
+        self.assertFalse(searchDone)
+
+    def testStopWithOpenSessions(self):
+        """Test stopping the server with sessions open, one of them searching, ends
+        them without errors.
+        """
+        errors = []
+        async def serve(path):
+            asyncio.get_running_loop().set_exception_handler(
+                    lambda _, context: errors.append(context))
+            server = GtpServer(1, (100000, 2, 1))
+            await server.start(path=path)
+            idle = await asyncio.open_unix_connection(path)
+            searching = await asyncio.open_unix_connection(path)
+            for _, writer in (idle, searching):
+                writer.write(("boardsize %d\n" % TEST_BOARD_SIZE).encode())
+                await writer.drain()
+            for reader, _ in (idle, searching):
+                await readResponse(reader)
+            searching[1].write(b"genmove b\n")
+            await searching[1].drain()
+            await asyncio.sleep(0.3)
+            await server.stop()
+            await asyncio.sleep(0.1)
+            return server
+
+        with tempfile.TemporaryDirectory() as directory:
+            server = asyncio.run(serve(os.path.join(directory, "gtp.sock")))
+        self.assertEqual(errors, [])
+        self.assertEqual(server.workers, [])
+        self.assertEqual(server.handlers, set())
+
+if __name__ == '__main__':
+    unittest.main()
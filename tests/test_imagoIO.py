@@ -0,0 +1,71 @@
+"""Tests for imagoIO module."""
+
+import io
+import unittest
+
+from imago.engine.core import GameEngine
+from imago.engine.imagoIO import ImagoIO
+
+TEST_BOARD_SIZE = 5
+
+def runSession(commands):
+    """Runs the given lines through a new engine and returns its output."""
+    engine = GameEngine(playouts=10, timeLimit=None, seed=1)
+    output = io.StringIO()
+    imagoIO = ImagoIO(engine, inputStream=io.StringIO(commands), outputStream=output)
+    imagoIO.start()
+    return output.getvalue()
+
+class TestImagoIO(unittest.TestCase):
+    """Test imagoIO module."""
+
+    def testResponses(self):
+        """Test responses are framed with their ids and errors do not end the session."""
+        output = runSession("\n".join([
+            "1 boardsize %d" % TEST_BOARD_SIZE,
+            "",
+            "# Only a comment",
+            "known_command\tplay # Tabs and comments",
+            "2 play b c3",
+            "3 play w c3",
+            "4 play w z9",
+            "komi",
+            "5 frobnicate",
+            "boardsize 99",
+            "6 undo",
+            "undo",
+            "quit",
+            "name"
+        ]) + "\n")
+        self.assertEqual(output, "".join([
+            "=1 \n\n",
+            "= true\n\n",
+            "=2 \n\n",
+            "?3 illegal move\n\n",
+            "?4 syntax error\n\n",
+            "? syntax error\n\n",
+            "?5 unknown command\n\n",
+            "? unacceptable size\n\n",
+            "=6 \n\n",
+            "? cannot undo\n\n",
+            "= \n\n"
+        ]))
+
+    def testGenmoveAndShowboard(self):
+        """Test genmove answers only the vertex and showboard prints the board."""
+        output = runSession("boardsize %d\ngenmove b\nshowboard\n" % TEST_BOARD_SIZE)
+        responses = output.split("\n\n")
+        self.assertRegex(responses[1], r"^= ([A-HJ-Z][0-9]+|pass)$")
+        self.assertTrue(responses[2].startswith("= \n    A B C D E"))
+        self.assertEqual(len(responses[2].splitlines()), TEST_BOARD_SIZE + 2)
+
+    def testListCommands(self):
+        """Test every listed command is known."""
+        output = runSession("list_commands\n")
+        commands = output[2:-2].splitlines()
+        self.assertIn("genmove", commands)
+        self.assertIn("showboard", commands)
+        self.assertEqual(len(commands), len(set(commands)))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+"""Tests for ingest module."""
+
+import json
+import os
+import tarfile
+import tempfile
+import unittest
+import zipfile
+
+from imago.sgfParser.gameRecords import GameRecordReader
+from imago.sgfParser.ingest import ingestCorpus
+
+TEST_GAMES = {
+    "first.sgf": "(;SZ[9];B[ee];W[ce])(;SZ[9]AB[cc][gg];W[ee];B[tt])",
+    "illegal.sgf": "(;SZ[9];B[ee];W[ee])",
+    "malformed.sgf": "(;SZ[9];B[ee];W[ce]",
+    "setup.sgf": "(;SZ[9]AB[cc]AW[cc];B[ee])",
+    "notes.txt": "Not a game record"
+}
+
+class TestIngest(unittest.TestCase):
+    """Test ingest module."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.corpus = os.path.join(self.directory.name, "corpus")
+        os.mkdir(self.corpus)
+        for fileName, text in TEST_GAMES.items():
+            with open(os.path.join(self.corpus, fileName), "w") as gameFile:
+                gameFile.write(text)
+        self.zipPath = os.path.join(self.directory.name, "games.zip")
+        with zipfile.ZipFile(self.zipPath, "w") as archive:
+            archive.writestr("zipped.sgf", "(;SZ[13];B[gg])")
+        self.tarPath = os.path.join(self.directory.name, "games.tar.gz")
+        with tarfile.open(self.tarPath, "w:gz") as archive:
+            archive.add(os.path.join(self.corpus, "first.sgf"), "tarred.sgf")
+        self.outputPath = os.path.join(self.directory.name, "games.igr")
+        self.errorsPath = os.path.join(self.directory.name, "errors.jsonl")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def testIngestCorpus(self):
+        """Test ingesting a directory and archives, keeping only the valid games."""
+        files, games, errors = ingestCorpus(
+                [self.corpus, self.zipPath, self.tarPath],
+                self.outputPath, self.errorsPath, workers=2)
+        self.assertEqual((files, games, errors), (6, 5, 3))
+
+        with GameRecordReader(self.outputPath) as reader:
+            self.assertEqual(len(reader), 5)
+            self.assertEqual([reader.getGameData(index).size for index in range(5)],
+                    [9, 9, 13, 9, 9])
+            self.assertEqual(reader.getGameData(1).addedBlack, [(2, 2), (6, 6)])
+
+        with open(self.errorsPath) as errorsFile:
+            reports = [json.loads(line) for line in errorsFile]
+        self.assertEqual([os.path.basename(report["file"]) for report in reports],
+                ["illegal.sgf", "malformed.sgf", "setup.sgf"])
+        self.assertEqual(reports[0]["error"], "Illegal move 2")
+        self.assertEqual(reports[2]["error"], "Setup stone on an occupied cell")
+
+if __name__ == '__main__':
+    unittest.main()
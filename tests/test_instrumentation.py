@@ -0,0 +1,90 @@
+"""Tests for instrumentation module."""
+
+import io
+import json
+import os
+import pstats
+import tempfile
+import unittest
+
+from imago import instrumentation
+from imago.data.enums import Player
+from imago.engine.core import GameEngine
+from imago.engine.imagoIO import ImagoIO
+from imago.gameLogic.gameState import GameState
+
+TEST_BOARD_SIZE = 5
+
+class TestInstrumentation(unittest.TestCase):
+    """Test instrumentation module."""
+
+    def setUp(self):
+        instrumentation.reset()
+
+    def tearDown(self):
+        instrumentation.setEnabled(False)
+        instrumentation.reset()
+
+    def testCounters(self):
+        """Test the work is counted only while enabled."""
+        state = GameState(TEST_BOARD_SIZE)
+        state.playMoveForPlayer(0, 1, Player.BLACK)
+        self.assertEqual(instrumentation.getStats()["counters"], {})
+
+        instrumentation.setEnabled(True)
+        state.playMoveForPlayer(0, 0, Player.WHITE)
+        state.playMoveForPlayer(1, 0, Player.BLACK)
+        state.getBoard().getDeepCopy()
+        state.undo()
+        counters = instrumentation.getStats()["counters"]
+        self.assertEqual(counters["moves"], 2)
+        self.assertEqual(counters["capturedStones"], 1)
+        self.assertEqual(counters["boardCopies"], 1)
+        self.assertGreater(counters["floodFillCells"], 0)
+
+        engine = GameEngine(playouts=20, timeLimit=None, seed=1)
+        engine.setBoardsize(TEST_BOARD_SIZE)
+        engine.genmove(Player.BLACK)
+        stats = instrumentation.getStats()
+        self.assertEqual(stats["counters"]["playouts"], 20)
+        self.assertEqual(stats["counters"]["searches"], 1)
+        self.assertGreater(stats["counters"]["nodesExpanded"], 0)
+        for phase in ("selection", "expansion", "simulation", "backpropagation"):
+            self.assertGreater(stats["timers"][phase], 0)
+        self.assertLess(stats["timers"]["simulation"], stats["timers"]["genmove"])
+
+    def testMoveCaptureCounters(self):
+        """Test the stones captured through GameBoard.moveCapture are counted."""
+        board = GameState(TEST_BOARD_SIZE).getBoard()
+        board.placeStone(0, 0, Player.WHITE)
+        board.placeStone(0, 1, Player.BLACK)
+        instrumentation.setEnabled(True)
+        self.assertEqual(board.moveCapture(1, 0, Player.BLACK), 1)
+        counters = instrumentation.getStats()["counters"]
+        self.assertEqual(counters["capturedStones"], 1)
+
+    def testImagoIO(self):
+        """Test the GTP commands turning on counters and the profiler."""
+        with tempfile.TemporaryDirectory() as directory:
+            statsPath = os.path.join(directory, "stats.json")
+            profilePath = os.path.join(directory, "genmove.prof")
+            imagoIO = ImagoIO(GameEngine(playouts=10, timeLimit=None, seed=1),
+                    inputStream=io.StringIO("\n".join([
+                        "boardsize %d" % TEST_BOARD_SIZE,
+                        "imago_stats on",
+                        "imago_profile on %s" % profilePath,
+                        "genmove b",
+                        "imago_stats dump %s" % statsPath,
+                        "imago_stats",
+                        "imago_stats sideways"
+                    ]) + "\n"), outputStream=io.StringIO())
+            imagoIO.start()
+            responses = imagoIO.output.getvalue().split("\n\n")
+            with open(statsPath) as statsFile:
+                self.assertEqual(json.load(statsFile)["counters"]["playouts"], 10)
+            self.assertGreater(pstats.Stats(profilePath).total_calls, 0)
+        self.assertTrue(json.loads(responses[5][2:])["enabled"])
+        self.assertEqual(responses[6], "? syntax error")
+
+if __name__ == '__main__':
+    unittest.main()
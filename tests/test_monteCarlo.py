@@ -0,0 +1,73 @@
+"""Tests for monteCarlo module."""
+
+import unittest
+
+from imago.data.enums import Player
+from imago.engine.core import GameEngine
+from imago.engine.monteCarlo import MCTS, scoreArea
+from imago.gameLogic.gameState import GameState
+
+TEST_BOARD_SIZE = 5
+
+class TestMonteCarlo(unittest.TestCase):
+    """Test monteCarlo module."""
+
+    def testScoreArea(self):
+        """Test area counting of a finished position."""
+        state = GameState(TEST_BOARD_SIZE)
+        for row in range(TEST_BOARD_SIZE):
+            state.playMoveForPlayer(row, 1, Player.BLACK)
+            state.playMoveForPlayer(row, 3, Player.WHITE)
+        self.assertEqual(scoreArea(state.getBoard()), (10, 10))
+
+    def testCapture(self):
+        """Test the search captures a big group in atari."""
+        state = GameState(TEST_BOARD_SIZE)
+        for col in range(TEST_BOARD_SIZE):
+            state.playMoveForPlayer(1, col, Player.WHITE)
+            state.playMoveForPlayer(2, col, Player.BLACK)
+        for col in range(TEST_BOARD_SIZE - 1):
+            state.playMoveForPlayer(0, col, Player.BLACK)
+        search = MCTS(7.5, playouts=200, timeLimit=None, seed=1)
+        self.assertEqual(search.search(state, Player.BLACK), (0, TEST_BOARD_SIZE - 1))
+        self.assertLessEqual(search.playoutCount, 200)
+        self.assertGreater(search.getPlayoutRate(), 0)
+
+    def testStopWhenDecided(self):
+        """Test the search stops early only when the move can not change."""
+        state = GameState(TEST_BOARD_SIZE)
+        search = MCTS(0.5, playouts=300, timeLimit=None, seed=1)
+        root = search.searchRoot(state, Player.BLACK)
+        visits = sorted(child.visits for child in root.children)
+        if search.playoutCount < 300:
+            self.assertGreater(visits[-1] - visits[-2], 300 - search.playoutCount)
+        search = MCTS(0.5, playouts=300, timeLimit=None, seed=1, stopWhenDecided=False)
+        search.search(state, Player.BLACK)
+        self.assertEqual(search.playoutCount, 300)
+
+    def testTimeBudget(self):
+        """Test the search stops when its time budget runs out."""
+        state = GameState(TEST_BOARD_SIZE)
+        search = MCTS(0.5, playouts=10**9, timeLimit=None, seed=1, stopWhenDecided=False)
+        search.search(state, Player.BLACK, timeBudget=0.2)
+        self.assertGreaterEqual(search.searchTime, 0.2)
+        self.assertLess(search.searchTime, 0.5)
+
+    def testSelfPlay(self):
+        """Test the engine plays legal moves until both players pass."""
+        engine = GameEngine(playouts=20, timeLimit=None, seed=1)
+        engine.setBoardsize(TEST_BOARD_SIZE)
+        player = Player.BLACK
+        for _ in range(TEST_BOARD_SIZE * TEST_BOARD_SIZE * 3):
+            lastMove = engine.gameState.lastMove
+            move = engine.genmove(player)
+            if move is not None:
+                self.assertIsNot(engine.gameState.lastMove, lastMove)
+                self.assertEqual(engine.gameState.lastMove.row, move[0])
+            if engine.gameState.isFinished():
+                break
+            player = Player.otherPlayer(player)
+        self.assertTrue(engine.gameState.isFinished())
+
+if __name__ == '__main__':
+    unittest.main()
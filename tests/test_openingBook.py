@@ -0,0 +1,70 @@
+"""Tests for openingBook module."""
+
+import os
+import tempfile
+import unittest
+
+from imago.data.enums import Player
+from imago.engine.core import GameEngine
+from imago.engine.openingBook import OpeningBook, buildBook
+
+TEST_BOARD_SIZE = 9
+
+# The same opening in the four corners, and a game on another board size
+TEST_GAMES = """(;SZ[9]RE[B+R];B[cc];W[gg];B[cg])
+(;SZ[9]RE[W+2.5];B[gc];W[cg];B[gg])
+(;SZ[9]RE[B+R];B[cg];W[gc];B[gg])
+(;SZ[9]RE[B+R];B[gg];W[cc];B[gc])
+(;SZ[13];B[dd])
+"""
+
+class TestOpeningBook(unittest.TestCase):
+    """Test openingBook module."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.gamesPath = os.path.join(self.directory.name, "games.sgf")
+        with open(self.gamesPath, "w") as gamesFile:
+            gamesFile.write(TEST_GAMES)
+        self.bookPath = os.path.join(self.directory.name, "book.bin")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def testBuildBook(self):
+        """Test positions are merged over their symmetries."""
+        games, positions = buildBook([self.gamesPath], self.bookPath, TEST_BOARD_SIZE,
+                minCount=2)
+        self.assertEqual((games, positions), (4, 3))
+        engine = GameEngine(playouts=10, timeLimit=None, seed=1)
+        engine.setBoardsize(TEST_BOARD_SIZE)
+        with OpeningBook(self.bookPath) as book:
+            board = engine.gameState.getBoard()
+            vertex, played, winRate = book.getEntry(board, Player.BLACK)
+            self.assertIn(vertex, [[2, 2], [2, 6], [6, 2], [6, 6]])
+            self.assertEqual((played, winRate), (4, 0.75))
+            engine.play(Player.BLACK, [6, 2])
+            self.assertEqual(book.getMove(board, Player.WHITE), [2, 6])
+            self.assertIsNone(book.getMove(board, Player.BLACK))
+            self.assertEqual(book.getEntry(board, Player.WHITE)[1:], (4, 0.25))
+            engine.play(Player.WHITE, [2, 6])
+            self.assertIn(book.getMove(board, Player.BLACK), [[2, 2], [6, 6]])
+
+    def testGenmove(self):
+        """Test the engine plays book moves and reports no search for them."""
+        buildBook([self.gamesPath], self.bookPath, TEST_BOARD_SIZE, minCount=2)
+        with OpeningBook(self.bookPath) as book:
+            engine = GameEngine(playouts=10, timeLimit=None, seed=1, book=book)
+            engine.setBoardsize(TEST_BOARD_SIZE)
+            engine.play(Player.BLACK, [4, 4])
+            engine.genmove(Player.WHITE)
+            self.assertFalse(engine.bookMove)
+            self.assertGreater(engine.getSearchStats()[0], 0)
+            engine.clearBoard()
+            engine.play(Player.BLACK, [2, 2])
+            self.assertEqual(engine.genmove(Player.WHITE), [6, 6])
+            self.assertTrue(engine.bookMove)
+            self.assertEqual(engine.getSearchStats(), (0, 0.0, 0.0))
+
+if __name__ == '__main__':
+    unittest.main()
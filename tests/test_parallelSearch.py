@@ -0,0 +1,56 @@
+"""Tests for parallelSearch module."""
+
+import unittest
+
+from imago.data.enums import Player
+from imago.engine.parallelSearch import ParallelSearch
+from imago.gameLogic.gameState import GameState
+
+TEST_BOARD_SIZE = 5
+
+class TestParallelSearch(unittest.TestCase):
+    """Test parallelSearch module."""
+
+    def testMergedSearch(self):
+        """Test statistics of all workers are merged and a capture is found."""
+        state = GameState(TEST_BOARD_SIZE)
+        for col in range(TEST_BOARD_SIZE):
+            state.playMoveForPlayer(1, col, Player.WHITE)
+            state.playMoveForPlayer(2, col, Player.BLACK)
+        for col in range(TEST_BOARD_SIZE - 1):
+            state.playMoveForPlayer(0, col, Player.BLACK)
+        search = ParallelSearch(7.5, playouts=200, timeLimit=None, workers=2, seed=1)
+        try:
+            root = search.searchRoot(state, Player.BLACK)
+        finally:
+            search.shutdown()
+        self.assertLessEqual(search.playoutCount, 200)
+        self.assertEqual(sum(child.visits for child in root.children),
+                search.playoutCount)
+        best = root.getBestChild()
+        self.assertEqual(state.getBoard().toVertex(best.point), (0, TEST_BOARD_SIZE - 1))
+
+    def testSetupStonesAndTable(self):
+        """Test workers search the setup stones and only count their own playouts when
+        their tables keep statistics of earlier searches.
+        """
+        state = GameState(TEST_BOARD_SIZE)
+        state.addSetupStones([(2, 1), (1, 2), (3, 2)],
+                [(0, 0), (0, 1), (0, 2), (0, 3), (1, 1), (1, 3), (2, 3)])
+        state.playMoveForPlayer(3, 3, Player.WHITE)
+        search = ParallelSearch(7.5, playouts=200, timeLimit=None, workers=2, seed=1,
+                tableSize=1)
+        try:
+            for _ in range(2):
+                root = search.searchRoot(state, Player.BLACK)
+                self.assertEqual(sum(child.visits for child in root.children),
+                        search.playoutCount)
+        finally:
+            search.shutdown()
+        board = state.getBoard()
+        points = [child.point for child in root.children]
+        self.assertNotIn(board.toPoint(0, 0), points)
+        self.assertIn(board.toPoint(2, 2), points)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -67,6 +67,8 @@ class TestParseHelpers(unittest.TestCase):
             "A19", TEST_BOARD_SIZE),
             [0,0])
 
+        self.assertIsNone(parseHelpers.parseVertex("pass", TEST_BOARD_SIZE))
+
     def testVertexToString(self):
         """Test converting vertices to strings."""
         self.assertEqual(parseHelpers.vertexToString([0,0], TEST_BOARD_SIZE), "A19")
@@ -77,6 +79,7 @@ class TestParseHelpers(unittest.TestCase):
         self.assertEqual(parseHelpers.vertexToString([0,18], TEST_BOARD_SIZE), "T19")
         self.assertEqual(parseHelpers.vertexToString([18,0], TEST_BOARD_SIZE), "A1")
         self.assertEqual(parseHelpers.vertexToString([18,18], TEST_BOARD_SIZE), "T1")
+        self.assertEqual(parseHelpers.vertexToString(None, TEST_BOARD_SIZE), "pass")
 
         self.assertEqual(parseHelpers.vertexToString([-1,0], TEST_BOARD_SIZE),
                 parseHelpers.ParseCodes.ERROR)
@@ -0,0 +1,95 @@
+"""Tests for playoutBoard module."""
+
+import unittest
+from random import Random
+
+from imago.data.enums import Player
+from imago.gameLogic.gameBoard import EMPTY, BLACK, WHITE, GameBoard
+from imago.gameLogic.playoutBoard import PlayoutBoard
+from imago.gameLogic.scoring import scoreArea
+
+TEST_BOARD_SIZE = 9
+
+class TestPlayoutBoard(unittest.TestCase):
+    """Test playoutBoard module."""
+
+    def testMatchesGameBoard(self):
+        """Test random moves leave the same stones and hash as on a GameBoard."""
+        rand = Random(1)
+        gameBoard = GameBoard(TEST_BOARD_SIZE)
+        board = PlayoutBoard.fromGameBoard(gameBoard)
+        color = BLACK
+        for _ in range(TEST_BOARD_SIZE * TEST_BOARD_SIZE * 2):
+            point = board.playRandomMove(color, rand.random)
+            if point is not None:
+                gameBoard.placeStoneAtPoint(point, color)
+            self.assertEqual(board.cells, gameBoard.cells)
+            self.assertEqual(board.hash, gameBoard.hash)
+            self.assertEqual(sorted(board.emptyPoints), [point for point in
+                range(len(board.cells)) if board.cells[point] == EMPTY])
+            color = BLACK + WHITE - color
+        for point in range(len(board.cells)):
+            group = gameBoard.groups[point]
+            if group is None:
+                continue
+            head = board.chainHead[point]
+            self.assertEqual(board.chainSize[head], len(group.stones))
+            self.assertEqual(board.isInAtari(head), len(group.liberties) == 1)
+
+    def testCaptureAndKo(self):
+        """Test captures, the ko point and the hash of a capture before playing it."""
+        gameBoard = GameBoard(TEST_BOARD_SIZE)
+        gameBoard.placeStone(0, 1, Player.BLACK)
+        gameBoard.placeStone(1, 0, Player.BLACK)
+        gameBoard.placeStone(1, 2, Player.BLACK)
+        gameBoard.placeStone(2, 1, Player.BLACK)
+        gameBoard.placeStone(0, 2, Player.WHITE)
+        gameBoard.placeStone(1, 3, Player.WHITE)
+        gameBoard.placeStone(2, 2, Player.WHITE)
+        gameBoard.placeStone(1, 1, Player.WHITE)
+        board = PlayoutBoard.fromGameBoard(gameBoard)
+
+        whiteStone = gameBoard.toPoint(1, 1)
+        retakePoint = gameBoard.toPoint(1, 2)
+        self.assertTrue(board.isInAtari(board.chainHead[whiteStone]))
+        self.assertFalse(board.isSuicide(retakePoint, BLACK))
+        hashAfterMove = board.getHashAfterMove(retakePoint, BLACK)
+        self.assertEqual(board.play(retakePoint, BLACK), 1)
+        self.assertEqual(board.hash, hashAfterMove)
+        self.assertEqual(board.cells[whiteStone], EMPTY)
+        self.assertEqual(board.koPoint, whiteStone)
+        self.assertFalse(board.isLegal(whiteStone, WHITE))
+        board.playPass()
+        self.assertTrue(board.isLegal(whiteStone, WHITE))
+
+    def testEyes(self):
+        """Test true and false eyes."""
+        gameBoard = GameBoard(TEST_BOARD_SIZE)
+        for row, col in ((0, 1), (1, 0), (1, 1)):
+            gameBoard.placeStone(row, col, Player.BLACK)
+        for row, col in ((3, 4), (4, 3), (4, 5), (5, 4)):
+            gameBoard.placeStone(row, col, Player.BLACK)
+        board = PlayoutBoard.fromGameBoard(gameBoard)
+        corner = gameBoard.toPoint(0, 0)
+        center = gameBoard.toPoint(4, 4)
+        self.assertTrue(board.isEye(corner, BLACK))
+        self.assertFalse(board.isEye(corner, WHITE))
+        self.assertTrue(board.isEye(center, BLACK))
+
+        board.play(gameBoard.toPoint(3, 3), WHITE)
+        self.assertTrue(board.isEye(center, BLACK))
+        board.play(gameBoard.toPoint(5, 5), WHITE)
+        self.assertFalse(board.isEye(center, BLACK))
+
+    def testRandomGame(self):
+        """Test a random game fills the board but for eyes and is scored by area."""
+        board = PlayoutBoard(TEST_BOARD_SIZE)
+        board.playRandomGame(BLACK, Random(1).random, 3 * TEST_BOARD_SIZE ** 2)
+        for point in board.emptyPoints:
+            self.assertTrue(board.isEye(point, BLACK) or board.isEye(point, WHITE)
+                    or board.isSuicide(point, BLACK) and board.isSuicide(point, WHITE))
+        black, white = scoreArea(board)
+        self.assertEqual(black + white, TEST_BOARD_SIZE * TEST_BOARD_SIZE)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+"""Tests for scoring module."""
+
+import unittest
+
+from imago.data.enums import Player, ScoringRule
+from imago.gameLogic.gameBoard import BLACK
+from imago.gameLogic.gameState import GameState
+from imago.gameLogic.scoring import (scoreArea, scoreTerritory, getScore,
+        scoreToString, getDeadStones)
+
+TEST_BOARD_SIZE = 5
+
+def getSplitState():
+    """Returns a state with a black wall on column 1 and a white wall on column 3."""
+    state = GameState(TEST_BOARD_SIZE)
+    for row in range(TEST_BOARD_SIZE):
+        state.playMoveForPlayer(row, 1, Player.BLACK)
+        state.playMoveForPlayer(row, 3, Player.WHITE)
+    return state
+
+class TestScoring(unittest.TestCase):
+    """Test scoring module."""
+
+    def testScoreArea(self):
+        """Test area scoring with neutral points between both colors."""
+        state = getSplitState()
+        self.assertEqual(scoreArea(state.getBoard()), (10, 10))
+        state.playMoveForPlayer(0, 4, Player.BLACK)
+        self.assertEqual(scoreArea(state.getBoard()), (11, 5))
+        self.assertEqual(getScore(state.getBoard(), 0.5), 5.5)
+
+    def testScoreTerritory(self):
+        """Test territory scoring counts captures and dead stones as prisoners."""
+        state = getSplitState()
+        board = state.getBoard()
+        self.assertEqual(scoreTerritory(board), (5, 5))
+        state.playMoveForPlayer(2, 0, Player.WHITE)
+        deadStone = board.toPoint(2, 0)
+        self.assertEqual(scoreTerritory(board, {deadStone}), (6, 5))
+        self.assertEqual(getScore(board, 0.5, ScoringRule.TERRITORY, {deadStone}), 0.5)
+
+    def testScoreToString(self):
+        """Test results as strings."""
+        self.assertEqual(scoreToString(3.5), "B+3.5")
+        self.assertEqual(scoreToString(-7), "W+7")
+        self.assertEqual(scoreToString(0), "0")
+
+    def testDeadStones(self):
+        """Test a lone stone inside the area of the other color is found dead."""
+        state = getSplitState()
+        state.playMoveForPlayer(2, 0, Player.WHITE)
+        board = state.getBoard()
+        deadStones = getDeadStones(board, BLACK, seed=1)
+        self.assertEqual(deadStones, {board.toPoint(2, 0)})
+
+if __name__ == '__main__':
+    unittest.main()
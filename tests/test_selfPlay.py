@@ -0,0 +1,45 @@
+"""Tests for selfPlay module."""
+
+import io
+import json
+import os
+import tempfile
+import unittest
+
+from imago.engine.selfPlay import playGame, runSelfPlay
+from imago.sgfParser.sgf import readGames
+
+TEST_BOARD_SIZE = 5
+
+class TestSelfPlay(unittest.TestCase):
+    """Test selfPlay module."""
+
+    def testPlayGame(self):
+        """Test a game is played to the end and recorded."""
+        result, moves, seconds, sgf = playGame(TEST_BOARD_SIZE, 0.5, 20, seed=1)
+        self.assertRegex(result, r"^[BW]\+")
+        self.assertGreater(seconds, 0)
+        game = next(readGames(io.StringIO(sgf)))
+        self.assertEqual(len(game.getMainLine()), moves)
+        self.assertEqual(game.gameData.result, result)
+
+    def testRunSelfPlay(self):
+        """Test games played by a pool are written as they finish."""
+        progress = []
+        with tempfile.TemporaryDirectory() as directory:
+            resultsPath = os.path.join(directory, "results.jsonl")
+            recordsPath = os.path.join(directory, "records.sgf")
+            games, moves, _ = runSelfPlay(3, TEST_BOARD_SIZE, 0.5, 10, workers=2,
+                    seed=1, resultsPath=resultsPath, recordsPath=recordsPath,
+                    onGame=lambda *stats: progress.append(stats))
+            with open(resultsPath) as resultsFile:
+                results = [json.loads(line) for line in resultsFile]
+            records = list(readGames(recordsPath))
+        self.assertEqual(games, 3)
+        self.assertEqual(sorted(result["game"] for result in results), [0, 1, 2])
+        self.assertEqual(sum(result["moves"] for result in results), moves)
+        self.assertEqual(len(records), 3)
+        self.assertEqual([stats[0] for stats in progress], [1, 2, 3])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,155 @@
+"""Tests for sgf module."""
+
+import io
+import os
+import tempfile
+import unittest
+
+from imago.data.enums import Player
+from imago.engine.core import GameEngine
+from imago.engine.imagoIO import ImagoIO
+from imago.gameLogic.gameData import GameData
+from imago.sgfParser.astNode import ASTNode
+from imago.sgfParser.sgf import readGames, parsePoint, gameTreeToSgf, SgfRecorder
+
+try:
+    from imago.sgfParser import sgfyacc
+except ImportError:
+    sgfyacc = None
+
+TEST_COLLECTION = """Text before the games is ignored.
+(;GM[1]SZ[9]KM[6.5]PB[Black \\] player]PW[White]RE[W+R]AB[aa:ab]
+C[A comment with ( and ; inside]
+;B[cd];W[dc]
+(;B[ee];W[]C[pass])
+(;B[ff]))
+(;SZ[19];B[pd];W[tt])
+"""
+
+class TestSgf(unittest.TestCase):
+    """Test sgf module."""
+
+    def testReadCollection(self):
+        """Test reading several games with variations in small chunks."""
+        games = list(readGames(io.StringIO(TEST_COLLECTION), chunkSize=7))
+        self.assertEqual(len(games), 2)
+
+        first = games[0]
+        self.assertEqual(first.gameData.size, 9)
+        self.assertEqual(first.gameData.komi, 6.5)
+        self.assertEqual(first.gameData.blackName, "Black ] player")
+        self.assertEqual(first.gameData.result, "W+R")
+        self.assertEqual(first.gameData.addedBlack, [(0, 0), (1, 0)])
+        mainLine = first.getMainLine()
+        self.assertEqual([(move.player, move.row, move.col) for move in mainLine], [
+            (Player.BLACK, 3, 2), (Player.WHITE, 2, 3),
+            (Player.BLACK, 4, 4), (Player.WHITE, None, None)])
+        self.assertEqual(mainLine[-1].moveNumber, 4)
+        variations = mainLine[1].nextMoves
+        self.assertEqual(len(variations), 2)
+        self.assertEqual((variations[1].row, variations[1].col), (5, 5))
+        self.assertIs(variations[1].previousMove, mainLine[1])
+
+        second = games[1]
+        self.assertEqual(second.gameData.size, 19)
+        self.assertTrue(second.getMainLine()[1].isPass())
+
+    def testDeepGame(self):
+        """Test games much longer than the recursion limit are read from binary files."""
+        moves = "".join(";%s[%s]" % ("BW"[index % 2], "aa" if index % 2 else "")
+                for index in range(5000))
+        source = io.BytesIO(("(;SZ[19]%s)" % moves).encode())
+        game = next(readGames(source))
+        self.assertEqual(len(game.getMainLine()), 5000)
+
+    def testMalformed(self):
+        """Test errors on unbalanced and unfinished game trees."""
+        with self.assertRaises(Exception):
+            list(readGames(io.StringIO("(;B[aa]")))
+        with self.assertRaises(Exception):
+            list(readGames(io.StringIO("(;B[aa] junk)")))
+
+    def testParsePoint(self):
+        """Test SGF points, letters being column and row from the top left corner."""
+        self.assertEqual(parsePoint("ab", 19), (1, 0))
+        self.assertIsNone(parsePoint("", 19))
+        self.assertIsNone(parsePoint("tt", 19))
+        self.assertEqual(parsePoint("tt", 21), (19, 19))
+
+    def testAstNode(self):
+        """Test the conversion of a syntax tree to a game tree."""
+        root = ASTNode(props={"SZ": "9"})
+        root.addToSequence(ASTNode(props={"B": "aa"}))
+        root.addToSequence(ASTNode(props={"W": "bb"}))
+        gameTree = root.toGameTree()
+        self.assertEqual(gameTree.gameData.size, 9)
+        self.assertEqual([(move.row, move.col) for move in gameTree.getMainLine()],
+                [(0, 0), (1, 1)])
+
+    @unittest.skipIf(sgfyacc is None, "PLY is not installed")
+    def testPlyParser(self):
+        """Test the PLY parser builds the syntax tree of a game with its own lexer."""
+        root = sgfyacc.parseText("(;SZ[9];B[aa];W[bb])")
+        self.assertEqual(root.props["SZ"], "9")
+        gameTree = root.toGameTree()
+        self.assertEqual(gameTree.gameData.size, 9)
+        self.assertEqual([(move.row, move.col) for move in gameTree.getMainLine()],
+                [(0, 0), (1, 1)])
+
+    def testWriteGameTree(self):
+        """Test games written with their variations are read back the same."""
+        game = next(readGames(io.StringIO(TEST_COLLECTION)))
+        text = gameTreeToSgf(game)
+        self.assertIn(";B[cd];W[dc](;B[ee];W[])(;B[ff]))", text)
+        copy = next(readGames(io.StringIO(text)))
+        self.assertEqual(copy.gameData.blackName, "Black ] player")
+        self.assertEqual(copy.gameData.addedBlack, [(0, 0), (1, 0)])
+        self.assertEqual(gameTreeToSgf(copy), text)
+
+        moves = ";B[aa]" * 5000
+        deepGame = next(readGames(io.StringIO("(;SZ[19]%s)" % moves)))
+        self.assertIn(moves, gameTreeToSgf(deepGame))
+
+    def testRecorder(self):
+        """Test the recorded file is a valid collection after every change."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "record.sgf")
+            recorder = SgfRecorder(path)
+            recorder.startGame(GameData(size=9, komi=6.5))
+            recorder.addMove(Player.BLACK, 2, 3)
+            recorder.addMove(Player.WHITE, None, None)
+            recorder.addMove(Player.BLACK, 4, 4)
+            recorder.undo()
+            recorder.startGame(GameData(size=13))
+            recorder.addMove(Player.BLACK, 0, 0)
+            recorder.close()
+
+            recorder = SgfRecorder(path)
+            recorder.startGame(GameData(size=5))
+            recorder.close()
+            games = list(readGames(path))
+        self.assertEqual([game.gameData.size for game in games], [9, 13, 5])
+        self.assertEqual([(move.row, move.col) for move in games[0].getMainLine()],
+                [(2, 3), (None, None)])
+
+    def testImagoIORecord(self):
+        """Test the moves played through the GTP engine are recorded."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "record.sgf")
+            engine = GameEngine(playouts=10, timeLimit=None, seed=1)
+            imagoIO = ImagoIO(engine, recorder=SgfRecorder(path))
+            imagoIO.boardsize(["5"])
+            imagoIO.play(["b", "c3"])
+            with self.assertRaises(Exception):
+                imagoIO.play(["w", "c3"])
+            imagoIO.genmove(["w"])
+            imagoIO.undo([])
+            imagoIO.play(["w", "pass"])
+            imagoIO.recorder.close()
+            game = next(readGames(path))
+        self.assertEqual([(move.player, move.row, move.col)
+            for move in game.getMainLine()],
+            [(Player.BLACK, 2, 2), (Player.WHITE, None, None)])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,33 @@
+"""Tests for symmetry module."""
+
+import unittest
+
+from imago.gameLogic.symmetry import SYMMETRIES, transformVertex, \
+        inverseTransformVertex, getSymmetryTables
+
+TEST_BOARD_SIZE = 9
+
+class TestSymmetry(unittest.TestCase):
+    """Test symmetry module."""
+
+    def testTransformVertex(self):
+        """Test the 8 symmetries are different and undone by their inverse."""
+        images = set()
+        for symmetry in range(SYMMETRIES):
+            vertex = transformVertex(1, 2, TEST_BOARD_SIZE, symmetry)
+            images.add(vertex)
+            self.assertEqual(inverseTransformVertex(*vertex, TEST_BOARD_SIZE, symmetry),
+                    (1, 2))
+        self.assertEqual(len(images), SYMMETRIES)
+        self.assertEqual(transformVertex(1, 2, TEST_BOARD_SIZE, 5), (2, 7))
+
+    def testSymmetryTables(self):
+        """Test point tables move points like vertices and leave the border alone."""
+        stride = TEST_BOARD_SIZE + 2
+        table = getSymmetryTables(TEST_BOARD_SIZE)[5]
+        self.assertEqual(table[2 * stride + 3], 3 * stride + 8)
+        self.assertEqual(table[0], 0)
+        self.assertEqual(sorted(table), list(range(stride * stride)))
+
+if __name__ == '__main__':
+    unittest.main()
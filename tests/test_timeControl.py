@@ -0,0 +1,67 @@
+"""Tests for timeControl module."""
+
+import unittest
+
+from imago.data.enums import Player
+from imago.engine.timeControl import TimeControl
+
+TEST_BOARD_SIZE = 19
+
+class TestTimeControl(unittest.TestCase):
+    """Test timeControl module."""
+
+    def testNoLimits(self):
+        """Test byo-yomi time without stones means no time limits."""
+        clock = TimeControl()
+        self.assertIsNone(clock.getMoveBudget(Player.BLACK, TEST_BOARD_SIZE, 0))
+        clock.setTimeSettings(0, 10, 0)
+        self.assertIsNone(clock.getMoveBudget(Player.BLACK, TEST_BOARD_SIZE, 0))
+
+    def testMainTime(self):
+        """Test main time is spread over the expected moves."""
+        clock = TimeControl()
+        clock.setTimeSettings(600, 0, 0)
+        opening = clock.getMoveBudget(Player.BLACK, TEST_BOARD_SIZE, 0)
+        self.assertGreater(opening, 0)
+        self.assertLess(opening, 600 / 50)
+        clock.setTimeLeft(Player.BLACK, 60, 0)
+        self.assertLess(clock.getMoveBudget(Player.BLACK, TEST_BOARD_SIZE, 200), 60 / 10)
+
+    def testByoYomi(self):
+        """Test byo-yomi periods are never exceeded and start after main time."""
+        clock = TimeControl()
+        clock.setTimeSettings(10, 30, 5)
+        clock.registerMoveTime(Player.WHITE, 10)
+        self.assertEqual(clock.stonesLeft[Player.WHITE], 0)
+        self.assertLess(clock.getMoveBudget(Player.WHITE, TEST_BOARD_SIZE, 100), 30 / 5)
+        clock.registerMoveTime(Player.WHITE, 5)
+        self.assertEqual(clock.stonesLeft[Player.WHITE], 4)
+        self.assertEqual(clock.timeLeft[Player.WHITE], 25)
+        for _ in range(3):
+            clock.registerMoveTime(Player.WHITE, 5)
+        self.assertEqual(clock.stonesLeft[Player.WHITE], 1)
+        self.assertLess(clock.getMoveBudget(Player.WHITE, TEST_BOARD_SIZE, 100), 10)
+        clock.registerMoveTime(Player.WHITE, 5)
+        self.assertEqual(clock.stonesLeft[Player.WHITE], 5)
+        self.assertEqual(clock.timeLeft[Player.WHITE], 30)
+        self.assertFalse(clock.hasLostOnTime(Player.WHITE))
+
+    def testMainTimeOverflow(self):
+        """Test a move running out of main time charges the rest of the move and its
+        stone to the first byo-yomi period, and loses on time if it does not fit.
+        """
+        clock = TimeControl()
+        clock.setTimeSettings(10, 30, 5)
+        clock.registerMoveTime(Player.BLACK, 14)
+        self.assertEqual(clock.timeLeft[Player.BLACK], 26)
+        self.assertEqual(clock.stonesLeft[Player.BLACK], 4)
+        self.assertFalse(clock.hasLostOnTime(Player.BLACK))
+
+        clock.registerMoveTime(Player.WHITE, 45)
+        self.assertTrue(clock.hasLostOnTime(Player.WHITE))
+        self.assertEqual(clock.getMoveBudget(Player.WHITE, TEST_BOARD_SIZE, 100), 0)
+        clock.setTimeLeft(Player.WHITE, 30, 5)
+        self.assertFalse(clock.hasLostOnTime(Player.WHITE))
+
+if __name__ == '__main__':
+    unittest.main()
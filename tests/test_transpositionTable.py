@@ -0,0 +1,52 @@
+"""Tests for transpositionTable module."""
+
+import unittest
+
+from imago.data.enums import Player
+from imago.engine.monteCarlo import MCTS
+from imago.engine.transpositionTable import TranspositionTable, ENTRY_BYTES
+from imago.gameLogic.gameState import GameState
+
+TEST_BOARD_SIZE = 3
+
+class TestTranspositionTable(unittest.TestCase):
+    """Test transpositionTable module."""
+
+    def testEviction(self):
+        """Test the least recently used entries are evicted when the table is full."""
+        table = TranspositionTable(3 * ENTRY_BYTES / 2**20)
+        self.assertEqual(table.capacity, 3)
+        first = table.getStats(1)
+        table.getStats(2)
+        table.getStats(3)
+        self.assertIs(table.getStats(1), first)
+        table.getStats(4)
+        self.assertEqual(len(table), 3)
+        self.assertNotIn(2, table.entries)
+        self.assertIs(table.getStats(1), first)
+        self.assertEqual(table.hits, 2)
+        self.assertEqual(table.misses, 4)
+        table.setSize(ENTRY_BYTES / 2**20)
+        self.assertEqual(list(table.entries), [1])
+
+    def testSharedStats(self):
+        """Test nodes of transposed positions share their statistics."""
+        table = TranspositionTable()
+        search = MCTS(0.5, playouts=300, timeLimit=None, seed=1, stopWhenDecided=False,
+                table=table)
+        root = search.searchRoot(GameState(TEST_BOARD_SIZE), Player.BLACK)
+        self.assertGreater(table.hits, 0)
+        nodesByStats = {}
+        pending = [root]
+        while pending:
+            node = pending.pop()
+            pending.extend(node.children)
+            nodesByStats.setdefault(id(node.stats), []).append(node)
+        shared = [nodes for nodes in nodesByStats.values() if len(nodes) > 1]
+        self.assertTrue(shared)
+        for nodes in shared:
+            self.assertEqual(len({node.color for node in nodes}), 1)
+            self.assertEqual(len({node.visits for node in nodes}), 1)
+
+if __name__ == '__main__':
+    unittest.main()